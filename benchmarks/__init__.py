@@ -0,0 +1,5 @@
+"""
+Benchmarks of the log analysis on generated logs.
+
+Run them with `python -m benchmarks`.
+"""
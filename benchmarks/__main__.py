@@ -0,0 +1,57 @@
+from os import makedirs, path
+import json
+import shutil
+import sys
+import click
+
+from benchmarks.suite import BENCHMARKS, SCALES, compare_results, run_benchmarks
+
+RESULTS_DIR = path.join(path.dirname(__file__), "results")
+
+
+@click.command()
+@click.option("-s", "--scale", "scales", help="the number of log lines to benchmark", type=click.Choice(list(SCALES)), multiple=True, default=["10k"])
+@click.option("--only", "names", help="only run these benchmarks", type=click.Choice(list(BENCHMARKS)), multiple=True)
+@click.option("-r", "--repeat", help="how often to run every benchmark, the fastest run counts", type=int, default=3)
+@click.option("-o", "--output", help="the file to store the results in", type=str, default=path.join(RESULTS_DIR, "latest.json"))
+@click.option("-b", "--baseline", help="the results to compare to", type=str, default=path.join(RESULTS_DIR, "baseline.json"))
+@click.option("--save-baseline", help="use these results as the new baseline", is_flag=True, default=False)
+@click.option("-t", "--threshold", help="the relative slowdown that counts as a regression", type=float, default=0.1)
+def benchmark(scales, names, repeat, output, baseline, save_baseline, threshold):
+    results = run_benchmarks(list(scales), list(names) if names else None, repeat, echo=click.echo)
+
+    makedirs(path.dirname(path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+    click.echo(f"Results written to {output}.")
+
+    if save_baseline:
+        makedirs(path.dirname(path.abspath(baseline)), exist_ok=True)
+        shutil.copyfile(output, baseline)
+        click.echo(f"Saved as baseline to {baseline}.")
+        return
+
+    if not path.isfile(baseline):
+        click.echo("No baseline to compare to, create one with --save-baseline.")
+        return
+
+    with open(baseline) as f:
+        comparisons = compare_results(results, json.load(f), threshold)
+
+    if len(comparisons) == 0:
+        click.echo("The baseline has none of these benchmarks.")
+        return
+
+    click.echo(f"{'Scale':<6} {'Benchmark':<28} {'Baseline (s)':>13} {'Current (s)':>12} {'Ratio':>7}")
+    for comparison in comparisons:
+        marker = "  REGRESSION" if comparison.is_regression else ""
+        click.echo(f"{comparison.scale:<6} {comparison.name:<28} {comparison.baseline:>13.4f} "
+                   f"{comparison.current:>12.4f} {comparison.ratio:>7.2f}{marker}")
+
+    if any(comparison.is_regression for comparison in comparisons):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    benchmark()
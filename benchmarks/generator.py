@@ -0,0 +1,167 @@
+"""
+Deterministic generator for synthetic bot logs and transcriptions.
+"""
+from typing import Dict, List
+from datetime import datetime, timedelta
+import itertools
+import random
+
+FOOTER = ("^^I'm&#32;a&#32;human&#32;volunteer&#32;content&#32;transcriber&#32;for&#32;Reddit&#32;"
+          "and&#32;you&#32;could&#32;be&#32;too!&#32;[If&#32;you'd&#32;like&#32;more&#32;"
+          "information&#32;on&#32;what&#32;we&#32;do&#32;and&#32;why&#32;we&#32;do&#32;it,&#32;"
+          "click&#32;here!](https://www.reddit.com/r/TranscribersOfReddit/wiki/index)")
+
+# Headers as they are written by the volunteers, including unusual spellings
+HEADERS = [
+    ("Image", "Twitter"), ("Image", "Tumblr"), ("Image", "Reddit"), ("Image", "Meme"),
+    ("Image", "Photograph"), ("Image", "Discord Messages"), ("Image", "Text"),
+    ("Image", "Code"), ("Image", "Review"), ("Image", "Facebook Post"), ("Image", "Comic"),
+    ("Image", "Social Media"), ("Image", "GIF"), ("Video", "YouTube"), ("Video", ""),
+    ("Audio", "Podcast"),
+]
+
+WORDS = ["the", "a", "transcription", "volunteer", "image", "text", "reddit", "post",
+         "comment", "meme", "user", "of", "and", "to", "in", "is", "that", "for", "it"]
+
+# Bot messages that are not "done"s
+OTHER_MESSAGES = [
+    "[INFO] - process_claim - post {post} - user {user}",
+    "[INFO] - check_inbox - Checking inbox for new messages",
+    "[DEBUG] - process_comment - Processing comment {post} from {user}",
+    "[INFO] - process_unclaim - post {post} - user {user}",
+    "[INFO] - process_done - post {post} - user {user} - Moderator override",
+]
+
+
+class GeneratorOptions():
+    """
+    The shape of the generated log.
+    """
+
+    def __init__(self, lines: int = 10000, done_ratio: float = 0.2, users: int = 500,
+                 user_skew: float = 1.1, subreddits: int = 200, subreddit_skew: float = 1.0,
+                 start: datetime = datetime(2021, 3, 1, 12), duration: timedelta = timedelta(days=1),
+                 seed: int = 0):
+        self._lines = lines
+        self._done_ratio = done_ratio
+        self._users = users
+        self._user_skew = user_skew
+        self._subreddits = subreddits
+        self._subreddit_skew = subreddit_skew
+        self._start = start
+        self._duration = duration
+        self._seed = seed
+
+    @property
+    def lines(self) -> int:
+        "The number of log lines."
+        return self._lines
+
+    @property
+    def done_ratio(self) -> float:
+        "The share of log lines that mark a post as done."
+        return self._done_ratio
+
+    @property
+    def users(self) -> int:
+        return self._users
+
+    @property
+    def user_skew(self) -> float:
+        "The Zipf exponent of the transcriptions per user, 0 for a uniform distribution."
+        return self._user_skew
+
+    @property
+    def subreddits(self) -> int:
+        return self._subreddits
+
+    @property
+    def subreddit_skew(self) -> float:
+        "The Zipf exponent of the transcriptions per subreddit."
+        return self._subreddit_skew
+
+    @property
+    def start(self) -> datetime:
+        return self._start
+
+    @property
+    def duration(self) -> timedelta:
+        return self._duration
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+
+def _zipf_weights(count: int, skew: float) -> List[float]:
+    "The cumulative weights of a Zipf distribution over the ranks."
+    return list(itertools.accumulate(1 / (rank ** skew) for rank in range(1, count + 1)))
+
+
+def _transcription_body(rng: random.Random) -> str:
+    t_format, t_type = rng.choice(HEADERS)
+    header = f"*{t_format} Transcription: {t_type}*" if t_type else f"*{t_format} Transcription*"
+    # Transcription lengths are skewed, most are short and some are very long
+    word_count = min(int(rng.lognormvariate(4, 1)) + 1, 5000)
+    content = " ".join(rng.choices(WORDS, k=word_count))
+    return f"{header}\n\n---\n\n{content}\n\n---\n\n{FOOTER}"
+
+
+class Dataset():
+    """
+    A generated bot log with the transcriptions of all its "done"s, in the cache format.
+    """
+
+    def __init__(self, lines: List[str], transcriptions: Dict[str, Dict]):
+        self._lines = lines
+        self._transcriptions = transcriptions
+
+    @property
+    def lines(self) -> List[str]:
+        return self._lines
+
+    @property
+    def transcriptions(self) -> Dict[str, Dict]:
+        "The transcriptions by post id, like in transcriptions.json."
+        return self._transcriptions
+
+
+def generate_dataset(options: GeneratorOptions) -> Dataset:
+    """
+    Generates a bot log and its transcriptions.
+    The same options always generate the same dataset.
+    """
+    rng = random.Random(options.seed)
+    users = [f"volunteer_{i}" for i in range(options.users)]
+    subreddits = [f"subreddit_{i}" for i in range(options.subreddits)]
+    user_weights = _zipf_weights(options.users, options.user_skew)
+    subreddit_weights = _zipf_weights(options.subreddits, options.subreddit_skew)
+
+    step = options.duration / max(options.lines, 1)
+    lines = []
+    transcriptions = {}
+
+    for i in range(options.lines):
+        time = options.start + step * i
+        timestamp = time.strftime("%b %d %H:%M:%S")
+        user = rng.choices(users, cum_weights=user_weights)[0]
+        post = f"t3_{i:08x}"
+
+        if rng.random() < options.done_ratio:
+            message = f"[INFO] - process_done - post {post} - user {user}"
+            comment_id = f"c{i:08x}"
+            transcriptions[post] = {
+                "id": comment_id,
+                "url": f"https://www.reddit.com/r/{post}/comments/{comment_id}",
+                "subreddit": rng.choices(subreddits, cum_weights=subreddit_weights)[0],
+                "username": user,
+                # Volunteers comment a bit before they mark the post as done
+                "timestamp": str(time - timedelta(seconds=rng.randint(1, 600))),
+                "body": _transcription_body(rng),
+            }
+        else:
+            message = rng.choice(OTHER_MESSAGES).format(post=post, user=user)
+
+        lines.append(f"{timestamp} tor bot[1234]: {message}")
+
+    return Dataset(lines, transcriptions)
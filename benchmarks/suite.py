@@ -0,0 +1,241 @@
+"""
+The benchmarks of the analysis steps and the comparison with a baseline.
+"""
+from typing import Callable, Dict, List, Optional
+from os import makedirs
+import platform
+import statistics
+import tempfile
+import time
+
+from tor_log_analyzer import __version__
+from tor_log_analyzer.config import Config, config_from_dict_or_defaults
+from tor_log_analyzer.aggregation import aggregate, aggregate_table
+from tor_log_analyzer.data_processors import load_transcription_cache, process_lines, write_transcription_cache
+from tor_log_analyzer.data.rollup_data import rollup_from_table
+from tor_log_analyzer.data.transcription_store import TranscriptionStore
+from tor_log_analyzer.data.transcription_table import transcription_table_from_transcriptions
+from tor_log_analyzer.transcription import extract_components, extract_format_and_type, transcription_from_dict
+from benchmarks.generator import Dataset, GeneratorOptions, generate_dataset
+
+# The number of log lines of every scale
+SCALES = {
+    "10k": 10000,
+    "100k": 100000,
+    "1M": 1000000,
+}
+
+# The version of the results format, increase on incompatible changes
+RESULTS_VERSION = 1
+
+
+class BenchmarkContext():
+    """
+    The dataset of a scale and everything derived from it, computed on first use.
+    """
+
+    def __init__(self, dataset: Dataset, output_dir: str):
+        self._dataset = dataset
+        self._config = config_from_dict_or_defaults({
+            "output-dir": output_dir,
+            "auth": {"client-id": None, "client-secret": None},
+            "event": {"name": "Benchmark", "abrv": "BM", "organization": "ToR"},
+        })
+        makedirs(self._config.cache_dir, exist_ok=True)
+        self._derived: Dict[str, object] = {}
+
+    @property
+    def config(self) -> Config:
+        return self._config
+
+    @property
+    def dataset(self) -> Dataset:
+        return self._dataset
+
+    def _get(self, key: str, compute: Callable):
+        if key not in self._derived:
+            self._derived[key] = compute()
+        return self._derived[key]
+
+    def write_cache(self):
+        "Writes the transcriptions of the dataset to the cache, once."
+        self._get("cache", lambda: write_transcription_cache(self._config, self._dataset.transcriptions))
+
+    @property
+    def store(self) -> TranscriptionStore:
+        return self._get("store", lambda: TranscriptionStore(
+            transcription_from_dict(tr) for tr in self._dataset.transcriptions.values()))
+
+    @property
+    def aggregates(self):
+        return self._get("aggregates", lambda: aggregate(self.store))
+
+    @property
+    def rollups(self):
+        return self._get("rollups", lambda: {
+            "hour": rollup_from_table(transcription_table_from_transcriptions(self.store))})
+
+
+# The cache is read and written like in an analysis, with the atomic writes and the checksums
+def _load_cache(context: BenchmarkContext) -> Callable:
+    context.write_cache()
+
+    def run():
+        return [transcription_from_dict(tr) for tr in load_transcription_cache(context.config).values()]
+    return run
+
+
+def _save_cache(context: BenchmarkContext) -> Callable:
+    store = context.store
+
+    def run():
+        write_transcription_cache(context.config, dict((tr.id, tr.to_dict()) for tr in store))
+    return run
+
+
+def _extract_format_and_type(context: BenchmarkContext) -> Callable:
+    headers = [extract_components(tr["body"])[0] for tr in context.dataset.transcriptions.values()]
+
+    def run():
+        for header in headers:
+            extract_format_and_type(header)
+    return run
+
+
+def _aggregate(context: BenchmarkContext) -> Callable:
+    store = context.store
+    return lambda: aggregate(store)
+
+
+def _aggregate_table(context: BenchmarkContext) -> Callable:
+    store = context.store
+
+    def run():
+        return aggregate_table(transcription_table_from_transcriptions(store))
+    return run
+
+
+def _chart(name: str) -> Callable:
+    def setup(context: BenchmarkContext) -> Callable:
+        from tor_log_analyzer.main import chart_stages, configure_plot_style
+
+        configure_plot_style(context.config)
+        stage = next(stage for stage in chart_stages(context.config) if stage.name == name)
+        args = stage.arguments(context.config, {
+            "fetch": context.store,
+            "aggregate": context.aggregates,
+            "rollup": context.rollups,
+        })
+        return lambda: stage.run(*args)
+    return setup
+
+
+# The benchmarks by name, each prepares its inputs outside of the timing
+# and returns the function to time
+BENCHMARKS: Dict[str, Callable[[BenchmarkContext], Callable]] = {
+    "process_lines": lambda context: lambda: process_lines(context.config, context.dataset.lines),
+    "extract_format_and_type": _extract_format_and_type,
+    "cache_load": _load_cache,
+    "cache_save": _save_cache,
+    "aggregate": _aggregate,
+    "aggregate_table": _aggregate_table,
+    **dict((f"chart.{name}", _chart(name)) for name in [
+        "general_stats", "history", "throughput", "user_gamma", "sub_gamma",
+        "post_formats", "post_types", "user_max_length", "user_count_length",
+    ]),
+}
+
+
+def time_benchmark(run: Callable, repeat: int) -> Dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    return {
+        "min": min(times),
+        "mean": statistics.mean(times),
+        "runs": repeat,
+    }
+
+
+def run_benchmarks(scales: List[str], names: Optional[List[str]] = None, repeat: int = 3,
+                   echo: Callable[[str], None] = print) -> Dict:
+    """
+    Runs the benchmarks at every scale and returns the timings in seconds.
+    """
+    names = names if names is not None else list(BENCHMARKS)
+    results = {}
+
+    for scale in scales:
+        echo(f"Generating {scale} log lines.")
+        dataset = generate_dataset(GeneratorOptions(lines=SCALES[scale]))
+        results[scale] = {}
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            context = BenchmarkContext(dataset, output_dir)
+            for name in names:
+                run = BENCHMARKS[name](context)
+                results[scale][name] = time_benchmark(run, repeat)
+                echo(f"  {name}: {results[scale][name]['min']:.4f} s")
+
+    return {
+        "version": RESULTS_VERSION,
+        "tool-version": __version__,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+class Comparison():
+    """
+    The timing of a benchmark compared to the baseline.
+    """
+
+    def __init__(self, scale: str, name: str, baseline: float, current: float, threshold: float):
+        self._scale = scale
+        self._name = name
+        self._baseline = baseline
+        self._current = current
+        self._threshold = threshold
+
+    @property
+    def scale(self) -> str:
+        return self._scale
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def baseline(self) -> float:
+        return self._baseline
+
+    @property
+    def current(self) -> float:
+        return self._current
+
+    @property
+    def ratio(self) -> float:
+        "The current time relative to the baseline, above 1 is slower."
+        return self._current / self._baseline if self._baseline > 0 else float("inf")
+
+    @property
+    def is_regression(self) -> bool:
+        return self.ratio > 1 + self._threshold
+
+
+def compare_results(results: Dict, baseline: Dict, threshold: float = 0.1) -> List[Comparison]:
+    """
+    Compares the fastest runs of all benchmarks that are in both results.
+    """
+    comparisons = []
+    for scale, timings in results["results"].items():
+        baseline_timings = baseline["results"].get(scale, {})
+        for name, timing in timings.items():
+            if name in baseline_timings:
+                comparisons.append(Comparison(scale, name, baseline_timings[name]["min"],
+                                              timing["min"], threshold))
+    return comparisons
@@ -1,18 +1,40 @@
 #!/usr/bin/env python
 import json
-import yaml
 import click
 
 from tor_log_analyzer import __project_name__, __version__, __description__
-from tor_log_analyzer.main import analyze_logs
 from tor_log_analyzer.util import clean_dict
 from tor_log_analyzer.config import Config, config_from_dict_or_defaults
 
 
+def load_config_file(path: str):
+    """
+    Loads the content of a .json, .yml or .yaml file.
+    """
+    ext = path.split(".")[-1]
+
+    with open(path) as f:
+        if ext in ["json"]:
+            return json.load(f)
+        elif ext in ["yml", "yaml"]:
+            import yaml
+            return yaml.load(f, Loader=yaml.SafeLoader)
+        else:
+            raise RuntimeError(f"Unsupported file extension '.{ext}'.")
+
+
+def stage_names(values):
+    """
+    The stage names of a repeatable option, which can also be separated by commas.
+    """
+    names = [name.strip() for value in values or [] for name in value.split(",") if name.strip()]
+    return names if len(names) > 0 else None
+
+
 def config_from_options(
         # General
         config_file, input_file, output_dir, top_count,
-        no_cache, force_cache,
+        no_cache, force_cache, jobs, batch_file, render_profile, output_mode, only, skip, profile, cache_max_size, artifacts, serve, port, prefetch, prefetch_share, approximate_user_chars, heavy_hitters,
         # Auth
         auth_client_id, auth_client_secret,
         # Colors
@@ -28,15 +50,10 @@ def config_from_options(
 
     # Load base config file if specified
     if config_file:
-        ext = config_file.split(".")[-1]
+        base_config = load_config_file(config_file)
 
-        with open(config_file) as f:
-            if ext in ["json"]:
-                base_config = json.load(f)
-            elif ext in ["yml", "yaml"]:
-                base_config = yaml.load(f, Loader=yaml.SafeLoader)
-            else:
-                raise RuntimeError(f"Unsupported file extension '.{ext}'.")
+    # Load the batch events if specified
+    batch = load_config_file(batch_file) if batch_file else None
 
     # Assemble cli parameters
 
@@ -46,8 +63,15 @@ def config_from_options(
         "client-secret": auth_client_secret,
     })
 
-    merged_auth_config_dict = {
-        **base_config["auth"], **auth_config_dict} if "auth" in base_config else auth_config_dict
+    if isinstance(base_config.get("auth"), list):
+        # A pool of Reddit apps, the app given on the command line is added to it
+        if len(auth_config_dict) == 1:
+            raise click.UsageError(
+                "Use --auth.client-id together with --auth.client-secret to add an app to the auth list of the config file.")
+        merged_auth_config_dict = ([auth_config_dict] if auth_config_dict else []) + base_config["auth"]
+    else:
+        merged_auth_config_dict = {
+            **base_config["auth"], **auth_config_dict} if "auth" in base_config else auth_config_dict
 
     # Colors
     color_config_dict = clean_dict({
@@ -81,6 +105,21 @@ def config_from_options(
         "top-count": top_count,
         "no-cache": no_cache,
         "force-cache": force_cache,
+        "jobs": jobs,
+        "batch": batch,
+        "render-profile": render_profile,
+        "output-mode": output_mode,
+        "only": stage_names(only),
+        "skip": stage_names(skip),
+        "profile": profile,
+        "cache-max-size": cache_max_size,
+        "artifacts": artifacts,
+        "serve": serve,
+        "port": port,
+        "prefetch": prefetch,
+        "prefetch-share": prefetch_share,
+        "approximate-user-chars": approximate_user_chars,
+        "heavy-hitters": heavy_hitters,
         "auth": merged_auth_config_dict,
         "colors": merged_color_config_dict,
         "event": merged_event_config_dict
@@ -103,6 +142,21 @@ def config_from_options(
 @click.option("-t", "--top-count", "top_count", help="the number of entires in the top X diagrams", type=int)
 @click.option("--no-cache/--cache", "no_cache", default=False, help="disables the cache", type=bool)
 @click.option("--force-cache", "force_cache", is_flag=True, default=False, help="forces to use the cache and doesn't pull data from Reddit", type=bool)
+@click.option("-j", "--jobs", "jobs", help="the number of processes to use for parallel work", type=int)
+@click.option("--render-profile", "render_profile", help="the quality of the rendered charts, 'draft' for fast previews or 'final'", type=click.Choice(["draft", "final"]))
+@click.option("--output-mode", "output_mode", help="generate PNG 'images', a static HTML 'dashboard' or 'both'", type=click.Choice(["images", "dashboard", "both"]))
+@click.option("--only", "only", help="only run these stages and what they need, e.g. 'history' (repeatable or comma-separated)", type=str, multiple=True)
+@click.option("--skip", "skip", help="don't run these stages and what depends on them (repeatable or comma-separated)", type=str, multiple=True)
+@click.option("--cache-max-size", "cache_max_size", help="the size in MB the caches in the output folder may take up, the least recently used event caches are deleted above it", type=int)
+@click.option("--artifacts", "artifacts", help="the intermediate files to write to the cache folder: 'none', 'summary' (per user and subreddit) or 'full' (also every done)", type=click.Choice(["none", "summary", "full"]))
+@click.option("--approximate-user-chars", "approximate_user_chars", help="estimate the median transcription length of every user in constant memory, for very large logs", default=None, is_flag=True)
+@click.option("--heavy-hitters", "heavy_hitters", help="track this many of the most active users and subreddits in bounded memory and write them to top_users.json and top_subreddits.json, for very large logs", type=int)
+@click.option("--profile", "profile", help="record the time and memory of every stage in profile.json", default=None, is_flag=True)
+@click.option("--serve", "serve", help="keep running, follow the log and serve the stats and charts on a local HTTP port", default=None, is_flag=True)
+@click.option("--port", "port", help="the local port to serve on, 8000 by default", type=int)
+@click.option("--prefetch", "prefetch", help="keep running, follow the log and fetch the transcriptions of new dones into the cache", default=None, is_flag=True)
+@click.option("--prefetch-share", "prefetch_share", help="the share of the Reddit API budget to use for prefetching, 0.5 by default", type=float)
+@click.option("-b", "--batch-file", "batch_file", help="path to a .json, .yml or .yaml file with a list of events to analyze in one run", type=str)
 # Auth options
 @click.option("--auth.client-id", "auth_client_id", help="the client id assigned by reddit", type=str)
 @click.option("--auth.client-secret", "auth_client_secret", help="the client secret assigned by reddit", type=str)
@@ -122,7 +176,7 @@ def config_from_options(
 def log_analyzer(
         version=False, about=False,
         config_file=None, input_file=None, output_dir=None, top_count=None,
-        no_cache=None, force_cache=None,
+        no_cache=None, force_cache=None, jobs=None, batch_file=None, render_profile=None, output_mode=None, only=None, skip=None, profile=None, cache_max_size=None, artifacts=None, serve=None, port=None, prefetch=None, prefetch_share=None, approximate_user_chars=None, heavy_hitters=None,
         event_name=None, event_abrv=None, event_organization=None, event_start=None, event_end=None,
         auth_client_id=None, auth_client_secret=None,
         colors_primary=None, colors_secondary=None, colors_tertiary=None,
@@ -132,10 +186,13 @@ def log_analyzer(
         click.echo(f"{__project_name__}, version v{__version__}\n\n{__description__}")
         return 0
 
+    # Only load the analysis and its heavy dependencies when needed
+    from tor_log_analyzer.main import analyze_logs
+
     config = config_from_options(
         # General
         config_file, input_file, output_dir, top_count,
-        no_cache, force_cache,
+        no_cache, force_cache, jobs, batch_file, render_profile, output_mode, only, skip, profile, cache_max_size, artifacts, serve, port, prefetch, prefetch_share, approximate_user_chars, heavy_hitters,
         # Auth
         auth_client_id, auth_client_secret,
         # Colors
@@ -0,0 +1,28 @@
+from typing import Dict, Optional
+from datetime import datetime
+from os import makedirs
+
+from tor_log_analyzer.config import Config, config_from_dict_or_defaults
+from tor_log_analyzer.transcription import Transcription
+
+
+def create_transcription(tid: str, username: str, subreddit: str, time: datetime, content: str,
+                         header: str = "*Image Transcription: Twitter*") -> Transcription:
+    body = f"{header}\n\n---\n\n{content}\n\n---\n\nFooter"
+    return Transcription(tid, f"https://www.reddit.com/{tid}", subreddit, username, time, body)
+
+
+def create_config(output_dir=None, options: Optional[Dict] = None) -> Config:
+    """
+    A configuration without Reddit credentials with the given options.
+    With an output folder, its cache folder is created as well.
+    """
+    config = config_from_dict_or_defaults({
+        **({"output-dir": str(output_dir)} if output_dir is not None else {}),
+        "auth": {"client-id": None, "client-secret": None},
+        "event": {},
+        **(options or {}),
+    })
+    if output_dir is not None:
+        makedirs(config.cache_dir, exist_ok=True)
+    return config
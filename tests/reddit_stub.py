@@ -0,0 +1,150 @@
+"""
+A local stand-in for the parts of the Reddit API that the fetching uses.
+"""
+from typing import Dict, List, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import base64
+import json
+import threading
+
+TOR_LINK = "https://www.reddit.com/r/TranscribersOfReddit/wiki/index"
+
+
+def transcription_body(content: str) -> str:
+    return f"*Image Transcription*\n\n---\n\n{content}\n\n---\n\n^[I'm&#32;a&#32;human]({TOR_LINK})"
+
+
+def comment_thing(submission_id: str, comment_id: str, author: str, body: str) -> Dict:
+    return {"kind": "t1", "data": {
+        "id": comment_id, "name": f"t1_{comment_id}", "author": author, "body": body,
+        "created_utc": 1614600000.0, "subreddit": "sub", "link_id": f"t3_{submission_id}",
+        "parent_id": f"t3_{submission_id}", "permalink": f"/r/sub/comments/{submission_id}/_/{comment_id}/",
+        "replies": "", "depth": 0,
+    }}
+
+
+class RedditStub():
+    """
+    Serves ToR posts that link to target posts with transcription comments.
+
+    The transcription of a target post can be hidden behind a "load more comments".
+    Every response carries rate limit headers, counted per client: a client may
+    make `remaining` requests, the window resets in `reset` seconds.
+    """
+
+    def __init__(self, remaining: int = 600, reset: int = 0):
+        self._submissions: Dict[str, Dict] = {}
+        self._more: Dict[str, Dict] = {}
+        self._remaining = remaining
+        self._reset = reset
+        self._lock = threading.Lock()
+        self.requests: List[Dict] = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._create_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def praw_options(self) -> Dict:
+        return {"oauth_url": self.url, "reddit_url": self.url}
+
+    def add_transcription(self, tor_id: str, target_id: str, author: str, content: str,
+                          hidden: bool = False):
+        self._submissions[tor_id] = {
+            "url": f"https://www.reddit.com/r/sub/comments/{target_id}/title/", "comments": []}
+        comment = comment_thing(target_id, f"c{target_id}", author, transcription_body(content))
+        other = comment_thing(target_id, f"o{target_id}", "someone", "Nice")
+        if hidden:
+            more = {"kind": "more", "data": {
+                "count": 1, "children": [comment["data"]["id"]], "id": comment["data"]["id"],
+                "name": f"t1_{comment['data']['id']}", "parent_id": f"t3_{target_id}", "depth": 0}}
+            self._more[comment["data"]["id"]] = comment
+            comments = [other, more]
+        else:
+            comments = [other, comment]
+        self._submissions[target_id] = {"url": f"https://i.redd.it/{target_id}.png", "comments": comments}
+
+    def use(self, client: str, count: int):
+        "Counts requests the client made before."
+        with self._lock:
+            self.requests.extend({"client": client, "path": ""} for _ in range(count))
+
+    def requests_by_client(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for request in self.requests:
+            counts[request["client"]] = counts.get(request["client"], 0) + 1
+        return counts
+
+    def __enter__(self) -> "RedditStub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _respond(self, client: str, path: str, query: Dict) -> Optional[object]:
+        parts = [part for part in path.split("/") if part]
+        if parts[:1] == ["comments"] and parts[1] in self._submissions:
+            submission_id = parts[1]
+            submission = self._submissions[submission_id]
+            link = {"kind": "t3", "data": {
+                "id": submission_id, "name": f"t3_{submission_id}", "url": submission["url"],
+                "title": "Title", "subreddit": "sub", "author": "poster", "created_utc": 1614600000.0,
+                "permalink": f"/r/sub/comments/{submission_id}/title/", "num_comments": 2,
+            }}
+            return [{"kind": "Listing", "data": {"children": [link]}},
+                    {"kind": "Listing", "data": {"children": submission["comments"]}}]
+        if parts == ["api", "morechildren"]:
+            children = query["children"][0].split(",")
+            return {"json": {"errors": [], "data": {"things": [self._more[child] for child in children]}}}
+        return None
+
+    def _create_handler(self) -> type:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, status: int, data, client: str = ""):
+                body = json.dumps(data).encode("utf8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if client:
+                    with stub._lock:
+                        used = sum(1 for request in stub.requests if request["client"] == client)
+                    self.send_header("x-ratelimit-remaining", str(max(0, stub._remaining - used)))
+                    self.send_header("x-ratelimit-used", str(used))
+                    self.send_header("x-ratelimit-reset", str(stub._reset))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _api(self, query: Dict):
+                client = self.headers.get("Authorization", "").split("token-")[-1]
+                path = urlparse(self.path).path
+                with stub._lock:
+                    stub.requests.append({"client": client, "path": path})
+                data = stub._respond(client, path, query)
+                if data is None:
+                    self._send(404, {"message": "Not Found", "error": 404}, client)
+                else:
+                    self._send(200, data, client)
+
+            def do_POST(self):
+                form = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf8"))
+                if urlparse(self.path).path != "/api/v1/access_token":
+                    self._api(form)
+                    return
+                credentials = self.headers.get("Authorization", "").split(" ")[-1]
+                client_id = base64.b64decode(credentials).decode("utf8").split(":")[0]
+                self._send(200, {"access_token": f"token-{client_id}", "token_type": "bearer",
+                                 "expires_in": 3600, "scope": "*"})
+
+            def do_GET(self):
+                self._api(parse_qs(urlparse(self.path).query))
+
+            def log_message(self, format: str, *args):
+                pass
+
+        return Handler
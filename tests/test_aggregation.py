@@ -0,0 +1,142 @@
+from datetime import datetime
+import json
+import os
+
+from tor_log_analyzer import aggregation, data_processors
+from tor_log_analyzer.aggregation import Aggregator, HeavyHitterAggregator, aggregate, aggregate_table, aggregates_from_state_dict, register_aggregator, registered_aggregators
+from tor_log_analyzer.data.transcription_table import transcription_table_from_transcriptions
+from tor_log_analyzer.data_processors import process_aggregates
+from tests.helpers import create_config, create_transcription
+
+
+TRANSCRIPTIONS = [
+    create_transcription("a", "alice", "sub1", datetime(2021, 3, 1, 10, 5), "one two"),
+    create_transcription("b", "bob", "sub1", datetime(2021, 3, 1, 10, 55), "three"),
+    create_transcription("c", "alice", "sub2", datetime(2021, 3, 1, 11, 30), "four five six"),
+]
+
+
+def test_aggregate_counts_all_statistics_in_one_pass():
+    aggregates = aggregate(TRANSCRIPTIONS)
+
+    assert aggregates.user_gamma.to_dict() == {"alice": 2, "bob": 1}
+    assert aggregates.sub_gamma.to_dict() == {"sub1": 2, "sub2": 1}
+    assert aggregates.post_types.to_dict() == {"Twitter": 3}
+    assert aggregates.post_formats.to_dict() == {"Image": 3}
+    assert aggregates.words == 6
+    assert aggregates.characters == len("one two") + len("three") + len("four five six")
+    assert aggregates.user_chars["alice"].maximum == len("four five six")
+
+
+def test_aggregate_only_runs_selected_aggregators():
+    aggregates = aggregate(TRANSCRIPTIONS, ["sub_gamma"])
+
+    assert "sub_gamma" in aggregates
+    assert "user_gamma" not in aggregates
+
+
+def test_registered_aggregator_is_included_in_the_pass():
+    class LongestIdAggregator(Aggregator):
+        def __init__(self):
+            self._longest = ""
+
+        def add(self, transcription):
+            if len(transcription.id) > len(self._longest):
+                self._longest = transcription.id
+
+        def result(self):
+            return self._longest
+
+    register_aggregator("test_longest_id", LongestIdAggregator)
+    try:
+        assert "test_longest_id" in registered_aggregators()
+
+        aggregates = aggregate(TRANSCRIPTIONS)
+
+        assert aggregates["test_longest_id"] == "a"
+    finally:
+        aggregation._AGGREGATORS.pop("test_longest_id")
+
+
+def test_merged_shards_equal_single_pass():
+    expected = aggregate(TRANSCRIPTIONS)
+    merged = aggregate(TRANSCRIPTIONS[:1]).merge(aggregate(TRANSCRIPTIONS[1:]))
+
+    assert merged.state_dict() == expected.state_dict()
+    assert merged.user_chars.to_dict() == expected.user_chars.to_dict()
+
+
+def test_state_dict_round_trip():
+    aggregates = aggregate(TRANSCRIPTIONS)
+    restored = aggregates_from_state_dict(aggregates.state_dict())
+
+    assert restored.state_dict() == aggregates.state_dict()
+
+
+def test_process_aggregates_folds_in_new_transcriptions(tmp_path, monkeypatch):
+    config = create_config(tmp_path)
+
+    process_aggregates(config, TRANSCRIPTIONS[:2])
+
+    # Only the transcription after the watermark may be aggregated again
+    aggregated = []
+    original_aggregate = data_processors.aggregate
+
+    def tracked_aggregate(transcriptions, *args, **kwargs):
+        aggregated.extend(transcriptions)
+        return original_aggregate(transcriptions, *args, **kwargs)
+
+    monkeypatch.setattr(data_processors, "aggregate", tracked_aggregate)
+    aggregates = process_aggregates(config, TRANSCRIPTIONS)
+
+    assert aggregated == TRANSCRIPTIONS[2:]
+    assert aggregates.state_dict() == aggregate(TRANSCRIPTIONS).state_dict()
+
+
+def test_process_aggregates_ignores_the_state_if_included_transcriptions_changed(tmp_path):
+    config = create_config(tmp_path)
+    process_aggregates(config, TRANSCRIPTIONS)
+
+    # Same count and last timestamp, but another transcription before the watermark
+    replaced = [create_transcription("d", "dave", "sub3", datetime(2021, 3, 1, 10, 10), "seven"),
+                *TRANSCRIPTIONS[1:]]
+    aggregates = process_aggregates(config, replaced)
+
+    assert aggregates.state_dict() == aggregate(replaced).state_dict()
+    assert "dave" in aggregates.user_gamma
+
+
+def test_process_aggregates_approximates_user_chars_if_configured(tmp_path):
+    exact = process_aggregates(create_config(tmp_path), TRANSCRIPTIONS)
+    # The cached exact state isn't reused for the approximate lengths
+    approximate = process_aggregates(
+        create_config(tmp_path, {"approximate-user-chars": True}), TRANSCRIPTIONS)
+
+    assert not exact.user_chars["alice"].approximate
+    assert approximate.user_chars["alice"].approximate
+    assert approximate.user_chars["alice"].total == exact.user_chars["alice"].total
+    assert approximate.user_chars.to_dict() == exact.user_chars.to_dict()
+
+
+def test_process_aggregates_tracks_heavy_hitters_if_configured(tmp_path):
+    config = create_config(tmp_path, {"heavy-hitters": 10})
+
+    aggregates = process_aggregates(config, TRANSCRIPTIONS)
+
+    assert aggregates["top_users"]["alice"] == 2
+    with open(f"{config.cache_dir}/top_subreddits.json") as f:
+        top_subreddits = json.load(f)
+    assert top_subreddits["total"] == 3
+    assert top_subreddits["entries"][0] == {"name": "sub1", "count": 2, "error": 0}
+    # The summaries aren't part of the cached state, so nothing is cached
+    assert not os.path.exists(f"{config.cache_dir}/aggregates.json")
+
+
+def test_aggregate_table_runs_added_aggregators():
+    factories = {"top_users": lambda: HeavyHitterAggregator(lambda tr: tr.username, 10)}
+    table = transcription_table_from_transcriptions(TRANSCRIPTIONS)
+
+    aggregates = aggregate_table(table, TRANSCRIPTIONS, factories=factories)
+
+    assert aggregates["top_users"]["alice"] == 2
+    assert aggregates.user_gamma.to_dict() == aggregate(TRANSCRIPTIONS).user_gamma.to_dict()
@@ -0,0 +1,73 @@
+from datetime import datetime
+import json
+import os
+
+import pytest
+
+from tor_log_analyzer.api import analyze
+from tor_log_analyzer.cache_store import MemoryCacheStore
+from tests.helpers import create_transcription
+
+LINES = [
+    "Mar 01 12:00:00 tor bot[1234]: [INFO] - process_done - post t3_a - user alice\n",
+    "Mar 01 12:05:00 tor bot[1234]: [INFO] - process_done - post t3_b - user bob\n",
+    "Mar 01 12:06:00 tor bot[1234]: [INFO] - process_done - post t3_c - user alice\n",
+]
+
+OPTIONS = {"force-cache": True, "event": {"name": "Test", "abrv": "T"}}
+
+
+def create_cache() -> MemoryCacheStore:
+    year = datetime.now().year
+    transcriptions = [
+        create_transcription("c_a", "alice", "sub_a", datetime(year, 3, 1, 11, 59), "Hello"),
+        create_transcription("c_b", "bob", "sub_a", datetime(year, 3, 1, 12, 4), "Hello there"),
+        create_transcription("c_c", "alice", "sub_b", datetime(year, 3, 1, 12, 5), "Hi"),
+    ]
+    cache = MemoryCacheStore()
+    cache.write_json("transcriptions.json", dict(
+        (f"t3_{tr.id[-1]}", tr.to_dict()) for tr in transcriptions))
+    return cache
+
+
+def test_analyze_lines_without_writing_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = create_cache()
+
+    result = analyze(LINES, OPTIONS, cache=cache)
+
+    assert len(result.dones) == 3
+    assert [tr.id for tr in result.transcriptions] == ["c_a", "c_b", "c_c"]
+    assert result.aggregates.user_gamma["alice"] == 2
+    assert result.charts == {}
+    assert os.listdir(tmp_path) == []
+    # The aggregates are kept for the next call
+    assert json.loads(cache.read_text("aggregates.json"))["watermark"]["count"] == 3
+
+
+def test_analyze_renders_charts_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    result = analyze(LINES, OPTIONS, cache=create_cache(), charts=["history", "user_gamma"],
+                     image_format="svg")
+
+    assert list(result.charts) == ["history", "user_gamma"]
+    assert result.charts["history"].startswith(b"<?xml")
+    assert os.listdir(tmp_path) == []
+
+
+def test_analyze_keeps_the_global_plot_style(tmp_path, monkeypatch):
+    import matplotlib
+
+    monkeypatch.chdir(tmp_path)
+    style = dict(matplotlib.rcParams)
+
+    analyze(LINES, {**OPTIONS, "colors": {"background": "#123456"}}, cache=create_cache(),
+            charts=["history"])
+
+    assert dict(matplotlib.rcParams) == style
+
+
+def test_analyze_rejects_unknown_charts():
+    with pytest.raises(RuntimeError, match="Unknown charts: nope"):
+        analyze(LINES, OPTIONS, cache=create_cache(), charts=["nope"])
@@ -0,0 +1,86 @@
+from datetime import datetime
+import json
+
+import pytest
+
+from tor_log_analyzer.cache_store import MemoryCacheStore
+from tor_log_analyzer.config import config_for_event, config_from_dict_or_defaults
+from tor_log_analyzer.event_config import EventConfig
+from tor_log_analyzer.main import analyze_batch, batch_output_dirs, batch_window
+from tests.helpers import create_config, create_transcription
+
+
+def test_batch_window_covers_all_events():
+    window = batch_window([
+        EventConfig(start=datetime(2021, 3, 2), end=datetime(2021, 3, 3)),
+        EventConfig(start=datetime(2021, 3, 1), end=datetime(2021, 3, 2)),
+    ])
+
+    assert window.start == datetime(2021, 3, 1)
+    assert window.end == datetime(2021, 3, 3)
+
+
+def test_batch_window_is_open_if_an_event_is_open():
+    window = batch_window([
+        EventConfig(start=datetime(2021, 3, 2)),
+        EventConfig(start=datetime(2021, 3, 1), end=datetime(2021, 3, 2)),
+    ])
+
+    assert window.start == datetime(2021, 3, 1)
+    assert window.end is None
+
+
+def test_batch_output_dirs_are_named_after_the_events():
+    config = create_config(options={
+        "output-dir": "out",
+        "batch": [{"abrv": "TE 1"}, {"name": "Day Two"}, {}, {"abrv": "te 1"}],
+    })
+
+    assert batch_output_dirs(config) == ["out/te-1", "out/day-two", "out/event-3", "out/te-1-4"]
+
+
+def test_event_configs_keep_the_cache_backend_and_serve_options():
+    cache = MemoryCacheStore()
+    config = config_from_dict_or_defaults({"serve": True, "port": 8123}, cache)
+
+    event_config = config_for_event(config, EventConfig(name="Day Two"), "out/day-two")
+
+    assert event_config.cache_backend is cache
+    assert event_config.serve
+    assert event_config.port == 8123
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_analyze_batch_splits_the_transcriptions_by_event(tmp_path, jobs):
+    year = datetime.now().year
+    users = ["alice", "bob", "carol", "dave"]
+    lines = []
+    transcriptions = {}
+    for day, user in enumerate(users, start=1):
+        lines.append(f"Mar 0{day} 12:00:00 tor bot[1234]: [INFO] - process_done - post t3_{user} - user {user}\n")
+        transcription = create_transcription(f"c_{user}", user, "sub", datetime(year, 3, day, 11, 59), "Hello")
+        transcriptions[f"t3_{user}"] = transcription.to_dict()
+
+    (tmp_path / "input.log").write_text("".join(lines))
+    (tmp_path / "out" / ".cache").mkdir(parents=True)
+    (tmp_path / "out" / ".cache" / "transcriptions.json").write_text(json.dumps(transcriptions))
+
+    config = config_from_dict_or_defaults({
+        "input-file": str(tmp_path / "input.log"),
+        "output-dir": str(tmp_path / "out"),
+        "force-cache": True,
+        "jobs": jobs,
+        "output-mode": "dashboard",
+        "event": {},
+        "batch": [
+            {"abrv": "first", "start": f"{year}-03-01 00:00", "end": f"{year}-03-02 23:00"},
+            {"abrv": "second", "start": f"{year}-03-03 00:00", "end": f"{year}-03-04 23:00"},
+        ],
+    })
+    analyze_batch(config)
+
+    for event, event_users in [("first", ["alice", "bob"]), ("second", ["carol", "dave"])]:
+        event_dir = tmp_path / "out" / event
+        assert (event_dir / "dashboard.html").exists()
+        user_gamma = json.loads((event_dir / ".cache" / "user_gamma.json").read_text())
+        assert sorted(user_gamma) == event_users
@@ -0,0 +1,54 @@
+from benchmarks.generator import GeneratorOptions, generate_dataset
+from benchmarks.suite import BENCHMARKS, SCALES, compare_results, run_benchmarks
+from tor_log_analyzer.transcription import transcription_from_dict
+
+
+def test_generated_datasets_are_deterministic():
+    options = GeneratorOptions(lines=500, seed=3)
+
+    first = generate_dataset(options)
+    second = generate_dataset(options)
+
+    assert first.lines == second.lines
+    assert first.transcriptions == second.transcriptions
+
+
+def test_generated_transcriptions_are_parsed():
+    dataset = generate_dataset(GeneratorOptions(lines=500, done_ratio=0.5, user_skew=2.0))
+
+    done_lines = [line for line in dataset.lines
+                  if "process_done" in line and "Moderator override" not in line]
+    assert len(done_lines) == len(dataset.transcriptions)
+    assert 150 < len(done_lines) < 350
+
+    transcriptions = [transcription_from_dict(tr) for tr in dataset.transcriptions.values()]
+    assert all(tr.t_format is not None and tr.t_type is not None for tr in transcriptions)
+    # With a strong skew, the top user has by far the most transcriptions
+    users = [tr.username for tr in transcriptions]
+    assert users.count("volunteer_0") > len(users) / 3
+
+
+def test_benchmarks_run_and_compare(monkeypatch):
+    monkeypatch.setitem(SCALES, "tiny", 300)
+    names = ["process_lines", "aggregate", "cache_load"]
+
+    results = run_benchmarks(["tiny"], names, repeat=1, echo=lambda message: None)
+    assert list(results["results"]["tiny"]) == names
+
+    baseline = {"results": {"tiny": {
+        "process_lines": {"min": results["results"]["tiny"]["process_lines"]["min"] * 2},
+        "aggregate": {"min": results["results"]["tiny"]["aggregate"]["min"] / 10},
+    }}}
+    comparisons = dict((c.name, c) for c in compare_results(results, baseline))
+
+    assert set(comparisons) == {"process_lines", "aggregate"}
+    assert not comparisons["process_lines"].is_regression
+    assert comparisons["aggregate"].is_regression
+
+
+def test_all_charts_have_a_benchmark():
+    from tor_log_analyzer.main import chart_stages
+    from tests.helpers import create_config
+
+    config = create_config()
+    assert all(f"chart.{stage.name}" in BENCHMARKS for stage in chart_stages(config))
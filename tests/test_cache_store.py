@@ -0,0 +1,132 @@
+from os import makedirs
+import json
+import os
+
+import pytest
+
+from tor_log_analyzer.cache_store import CacheStore, atomic_write, evict_caches
+from tor_log_analyzer.data_processors import process_lines, process_transcription_data
+from tests.helpers import create_config
+
+
+def create_store(path, event=None) -> CacheStore:
+    makedirs(path, exist_ok=True)
+    return CacheStore(str(path), event)
+
+
+def test_failed_writes_keep_the_old_file(tmp_path):
+    file = tmp_path / "data.json"
+    file.write_text("old")
+
+    with pytest.raises(ValueError):
+        with atomic_write(str(file)) as f:
+            f.write("partial")
+            raise ValueError()
+
+    assert file.read_text() == "old"
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_written_files_are_read_back(tmp_path):
+    store = create_store(tmp_path)
+    store.write_json("data.json", {"a": 1})
+
+    assert create_store(tmp_path).read_json("data.json") == {"a": 1}
+    assert create_store(tmp_path).read_json("missing.json") is None
+
+
+def test_files_not_matching_their_checksum_are_moved_aside(tmp_path):
+    store = create_store(tmp_path)
+    store.write_text("done.log", "line 1\nline 2")
+    (tmp_path / "done.log").write_text("line 1")
+
+    assert create_store(tmp_path).read_text("done.log") is None
+    assert not (tmp_path / "done.log").exists()
+    assert len(os.listdir(tmp_path / "corrupt")) == 1
+
+
+def test_stores_on_the_same_folder_see_each_others_writes(tmp_path):
+    first = create_store(tmp_path)
+    second = create_store(tmp_path)
+    first.write_json("transcriptions.json", {"t3_a": {}})
+    second.write_json("transcriptions.json", {"t3_a": {}, "t3_b": {}})
+    second.write_json("other.json", {})
+
+    assert first.read_json("transcriptions.json") == {"t3_a": {}, "t3_b": {}}
+    first.write_json("third.json", {})
+    assert create_store(tmp_path).read_json("other.json") == {}
+    assert not (tmp_path / "corrupt").exists()
+
+
+def test_truncated_files_without_checksum_are_moved_aside(tmp_path):
+    (tmp_path / "transcriptions.json").write_text('{"t3_a": {"id": ')
+
+    assert create_store(tmp_path).read_json("transcriptions.json") is None
+    assert os.listdir(tmp_path / "corrupt")[0].startswith("transcriptions.json.")
+
+
+def test_missing_transcription_cache_is_empty(tmp_path):
+    config = create_config(tmp_path, {"force-cache": True})
+
+    assert len(process_transcription_data(config, [])) == 0
+    assert json.loads((tmp_path / ".cache" / "transcriptions.json").read_text()) == {}
+
+
+def test_fetched_transcriptions_keep_the_other_cached_ones(tmp_path):
+    config = create_config(tmp_path, {"force-cache": True})
+    (tmp_path / ".cache" / "transcriptions.json").write_text(json.dumps({"t3_other": {"id": "c_other"}}))
+
+    process_transcription_data(config, [])
+
+    assert "t3_other" in json.loads((tmp_path / ".cache" / "transcriptions.json").read_text())
+
+
+def write_cache(path, event: str, last_used: str, size: int):
+    makedirs(path)
+    (path / "data.txt").write_text("x" * size)
+    (path / "manifest.json").write_text(json.dumps(
+        {"version": 1, "event": {"name": event}, "last-used": last_used, "files": {}}))
+
+
+def test_least_recently_used_event_caches_are_evicted(tmp_path):
+    write_cache(tmp_path / ".cache", "batch", "2026-03-04T00:00:00", 1000)
+    write_cache(tmp_path / "a" / ".cache", "a", "2026-03-01T00:00:00", 1000)
+    write_cache(tmp_path / "b" / ".cache", "b", "2026-03-02T00:00:00", 1000)
+    write_cache(tmp_path / "c" / ".cache", "c", "2026-03-03T00:00:00", 1000)
+
+    evicted = evict_caches(str(tmp_path), 2500, keep=[str(tmp_path / "a" / ".cache")])
+
+    assert [usage.event["name"] for usage in evicted] == ["b", "c"]
+    assert (tmp_path / "a" / ".cache").exists()
+    assert not (tmp_path / "b" / ".cache").exists()
+    assert (tmp_path / ".cache").exists()
+
+
+DONE_LINES = [
+    "Mar 01 12:00:00 tor bot[1234]: [INFO] - process_done - post t3_a - user alice",
+    "Mar 01 12:05:00 tor bot[1234]: [INFO] - process_done - post t3_b - user bob",
+    "Mar 01 12:06:00 tor bot[1234]: [INFO] - check_inbox - Checking inbox for new messages",
+]
+
+
+def artifact_config(tmp_path, artifacts: str):
+    return create_config(tmp_path, {"artifacts": artifacts})
+
+
+def test_full_artifacts_are_streamed_like_the_json_dump(tmp_path):
+    config = artifact_config(tmp_path, "full")
+    dones = process_lines(config, DONE_LINES)
+
+    cache_dir = tmp_path / ".cache"
+    assert (cache_dir / "done.log").read_text() == "\n".join(DONE_LINES[:2])
+    assert (cache_dir / "done.json").read_text() == \
+        json.dumps([done.to_dict() for done in dones], indent=2) + "\n"
+
+
+def test_summary_artifacts_leave_out_the_dones(tmp_path):
+    config = artifact_config(tmp_path, "summary")
+    dones = process_lines(config, DONE_LINES)
+
+    assert len(dones) == 2
+    assert not (tmp_path / ".cache" / "done.json").exists()
+    assert not (tmp_path / ".cache" / "done.log").exists()
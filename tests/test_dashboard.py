@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+import json
+
+from tor_log_analyzer.aggregation import aggregate
+from tor_log_analyzer.dashboard import dashboard_data, write_dashboard
+from tor_log_analyzer.data.rollup_data import rollup_from_table
+from tor_log_analyzer.data.transcription_table import transcription_table_from_transcriptions
+from tests.helpers import create_config, create_transcription
+
+
+TRANSCRIPTIONS = [
+    create_transcription("a", "alice", "sub1", datetime(2021, 3, 1, 10, 5), "one two"),
+    create_transcription("b", "bob", "</script>", datetime(2021, 3, 1, 10, 55), "three"),
+    create_transcription("c", "alice", "sub2", datetime(2021, 3, 1, 11, 30), "four five six"),
+]
+
+
+def create_dashboard_config(tmp_path, top_count: int = 1):
+    return create_config(tmp_path, {
+        "top-count": top_count,
+        "output-mode": "dashboard",
+        "event": {"name": "Test", "start": "2021-03-01 10:00"},
+    })
+
+
+def build(config):
+    aggregates = aggregate(TRANSCRIPTIONS)
+    rollups = {"hour": rollup_from_table(transcription_table_from_transcriptions(TRANSCRIPTIONS))}
+    return aggregates, rollups
+
+
+def test_dashboard_data_contains_the_chart_data(tmp_path):
+    config = create_dashboard_config(tmp_path)
+    aggregates, rollups = build(config)
+
+    data = dashboard_data(config, aggregates, TRANSCRIPTIONS, rollups)
+
+    assert data["title"] == "Test in Numbers"
+    assert ["Transcriptions", 3] in data["general"]
+    assert data["users"] == {"entries": [["u/alice", 2]], "rest": ["Other Volunteers", 1]}
+    assert data["lengths"] == {"entries": [["u/alice", len("four five six")]], "rest": None}
+    assert data["throughput"]["counts"] == [2, 1]
+    # The history starts at the event start and steps up with every transcription
+    assert data["history"]["times"][0] == (datetime(2021, 3, 1, 10) - datetime(1970, 1, 1)) // timedelta(milliseconds=1)
+    assert data["history"]["counts"][-1] == 3
+
+
+def test_write_dashboard_embeds_the_data(tmp_path):
+    config = create_dashboard_config(tmp_path, top_count=3)
+    aggregates, rollups = build(config)
+
+    write_dashboard(config, aggregates, TRANSCRIPTIONS, rollups)
+
+    data = json.loads((tmp_path / "dashboard.json").read_text(encoding="utf8"))
+    html = (tmp_path / "dashboard.html").read_text(encoding="utf8")
+    assert "/*DASHBOARD_DATA*/" not in html
+    assert html.count("</script>") == 1
+    assert "r/<\\/script>" in html
+    assert data["subreddits"]["entries"][1] == ["r/</script>", 1]
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+import random
+
+import numpy as np
+
+from tor_log_analyzer.downsampling import lttb, point_budget
+from tor_log_analyzer.stat_generators import history_series
+from tests.helpers import create_config, create_transcription
+
+
+def create_history(count: int):
+    random.seed(11)
+    start = datetime(2021, 3, 1, 12)
+    times = sorted(start + timedelta(seconds=random.random() * 86400) for _ in range(count))
+    transcriptions = [create_transcription(str(i), "user", "sub", time, "text")
+                      for i, time in enumerate(times)]
+    config = create_config(options={"event": {"start": "2021-03-01 12:00", "end": "2021-03-02 12:00"}})
+    return history_series(config, transcriptions)
+
+
+def test_point_budget():
+    assert point_budget(6.4, 300, 0.5) == 1920
+    assert point_budget(0.01, 1) == 3
+
+
+def test_lttb_keeps_short_series():
+    x = np.arange(10)
+    assert lttb(x, x, 20).tolist() == list(range(10))
+
+
+def test_lttb_preserves_start_and_end():
+    dates, data = create_history(20000)
+    indexes = lttb(dates.astype(np.int64), data, 500)
+
+    assert len(indexes) == 500
+    assert np.all(np.diff(indexes) > 0)
+    assert dates[indexes[0]] == dates[0] and data[indexes[0]] == 0
+    assert dates[indexes[-1]] == dates[-1] and data[indexes[-1]] == 20000
+
+
+def test_lttb_preserves_visible_shape():
+    dates, data = create_history(20000)
+    x = dates.astype(np.int64).astype(np.float64)
+    indexes = lttb(x, data, 500)
+
+    # The downsampled line may only deviate slightly from the full history
+    interpolated = np.interp(x, x[indexes], data[indexes])
+    assert np.max(np.abs(interpolated - data)) < 0.01 * data[-1]
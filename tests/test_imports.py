@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["matplotlib", "praw", "dateutil", "yaml"]
+
+
+def loaded_heavy_modules(code: str) -> list:
+    """
+    Runs the code in a fresh interpreter and returns the heavy modules it loaded.
+    """
+    script = code + f"""
+import sys
+print("loaded:" + ",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))
+"""
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    loaded = result.stdout.strip().splitlines()[-1][len("loaded:"):]
+    return [m for m in loaded.split(",") if m]
+
+
+def test_importing_the_cli_is_lightweight():
+    assert loaded_heavy_modules("import log_analyzer") == []
+
+
+def test_version_is_printed_without_heavy_imports():
+    code = """
+import log_analyzer
+try:
+    log_analyzer.log_analyzer(["--version"])
+except SystemExit:
+    pass
+"""
+    assert loaded_heavy_modules(code) == []
+
+
+def test_processing_and_dashboard_do_not_load_charts_or_reddit():
+    code = """
+import tor_log_analyzer.data_processors
+import tor_log_analyzer.main
+import tor_log_analyzer.dashboard
+"""
+    assert loaded_heavy_modules(code) == []
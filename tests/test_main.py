@@ -0,0 +1,38 @@
+import matplotlib
+
+from tor_log_analyzer.chart_cache import chart_hash
+from tor_log_analyzer.data.user_gamma_data import UserGammaData
+from tor_log_analyzer.main import configure_plot_style, create_pipeline
+from tests.helpers import create_config
+
+
+def test_chart_hash_depends_on_config():
+    config = create_config()
+    other_colors = create_config(options={"colors": {"primary": "#000000"}})
+    more_jobs = create_config(options={"jobs": 4})
+    data = UserGammaData({"alice": 3, None: 1})
+
+    assert chart_hash("a.png", (config, data)) != chart_hash("a.png", (other_colors, data))
+    assert chart_hash("a.png", (config, data)) == chart_hash("a.png", (more_jobs, data))
+
+
+def test_plot_style_uses_render_profile():
+    for profile, dpi, autolayout in [("draft", 100.0, False), ("final", 300.0, True)]:
+        config = create_config(options={"render-profile": profile})
+        with matplotlib.rc_context():
+            configure_plot_style(config)
+            assert matplotlib.rcParams["figure.dpi"] == dpi
+            assert matplotlib.rcParams["figure.autolayout"] == autolayout
+
+
+def test_only_the_history_needs_no_aggregation():
+    config = create_config()
+
+    assert create_pipeline(config).select(only=["history"]) == ["parse", "fetch", "history"]
+
+
+def test_skipping_the_aggregation_skips_its_charts():
+    config = create_config(options={"output-mode": "both"})
+
+    assert create_pipeline(config).select(skip=["aggregate"]) == [
+        "parse", "fetch", "rollup", "history", "throughput"]
@@ -0,0 +1,94 @@
+import os
+import threading
+
+import pytest
+
+from tor_log_analyzer.pipeline import Pipeline, Stage
+from tests.helpers import create_config
+
+
+def write_chart(config, filename: str, content: str):
+    with open(f"{config.image_dir}/{filename}", "w") as f:
+        f.write(content)
+
+
+def chart_files(path) -> list:
+    return sorted(f for f in os.listdir(path) if f.endswith(".txt"))
+
+
+def chart_stage(name: str, generator=write_chart) -> Stage:
+    return Stage(name, f"Generating {name}", generator, inputs=["data"], outputs=[f"{name}.txt"],
+                 args=lambda config, data: (config, f"{name}.txt", data[name]), chart=True)
+
+
+def test_charts_render_in_worker_processes(tmp_path):
+    config = create_config(tmp_path, {"jobs": 2})
+    pipeline = Pipeline([Stage("data", "Loading data", lambda config: {str(i): str(i) for i in range(4)})] +
+                        [chart_stage(str(i)) for i in range(4)])
+
+    pipeline.run(config)
+
+    assert chart_files(tmp_path) == ["0.txt", "1.txt", "2.txt", "3.txt"]
+    assert (tmp_path / "3.txt").read_text() == "3"
+
+
+def test_unchanged_charts_are_skipped(tmp_path):
+    config = create_config(tmp_path)
+    rendered = []
+
+    def generator(config, filename, content):
+        rendered.append(filename)
+        write_chart(config, filename, content)
+
+    def run(data):
+        Pipeline([Stage("data", "Loading data", lambda config: data),
+                  chart_stage("a", generator), chart_stage("b", generator)]).run(config)
+
+    run({"a": "a", "b": "b"})
+    assert rendered == ["a.txt", "b.txt"]
+
+    # Only the chart with new data is rendered again
+    run({"a": "a", "b": "c"})
+    assert rendered == ["a.txt", "b.txt", "b.txt"]
+
+    # Deleted charts are rendered again
+    os.remove(tmp_path / "a.txt")
+    run({"a": "a", "b": "c"})
+    assert rendered == ["a.txt", "b.txt", "b.txt", "a.txt"]
+
+
+def test_independent_stages_run_concurrently(tmp_path):
+    config = create_config(tmp_path, {"jobs": 2})
+    # Both stages only finish if they run at the same time
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait(config, value):
+        barrier.wait()
+        return value + 1
+
+    pipeline = Pipeline([
+        Stage("source", "Loading", lambda config: 1),
+        Stage("left", "Left", wait, inputs=["source"]),
+        Stage("right", "Right", wait, inputs=["source"]),
+        Stage("sum", "Summing", lambda config, left, right: left + right, inputs=["left", "right"]),
+    ])
+
+    assert pipeline.run(config)["sum"] == 4
+
+
+def test_available_results_are_not_computed_again(tmp_path):
+    config = create_config(tmp_path)
+    pipeline = Pipeline([
+        Stage("source", "Loading", lambda config: 1 / 0),
+        Stage("double", "Doubling", lambda config, value: 2 * value, inputs=["source"]),
+    ])
+
+    assert pipeline.select(only=["double"], available=["source"]) == ["source", "double"]
+    assert pipeline.run(config, results={"source": 2})["double"] == 4
+
+
+def test_unknown_stages_are_rejected():
+    pipeline = Pipeline([Stage("source", "Loading", lambda config: 1)])
+
+    with pytest.raises(RuntimeError):
+        pipeline.select(only=["history"])
@@ -0,0 +1,108 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from prawcore.exceptions import NotFound, ServerError
+
+from tor_log_analyzer.cache_store import MemoryCacheStore
+from tor_log_analyzer.config import config_from_dict_or_defaults
+from tor_log_analyzer.prefetch import Prefetcher, RateLimiter, prefetch_rate
+
+LINES = [
+    "Mar 01 12:00:00 tor bot[1234]: [INFO] - process_done - post t3_a - user alice\n",
+    "Mar 01 12:05:00 tor bot[1234]: [INFO] - process_done - post t3_b - user bob\n",
+    "Mar 01 12:06:00 tor bot[1234]: [INFO] - process_done - post t3_c - user alice\n",
+]
+
+
+class FakeClock():
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeRedditAPI():
+    def __init__(self, clock: FakeClock):
+        self._clock = clock
+        self.requests = []
+        # The errors to raise for the next requests of a post
+        self.errors = {}
+
+    def get_transcription(self, post_id: str, username: str):
+        self.requests.append((self._clock(), post_id))
+        errors = self.errors.get(post_id, [])
+        if len(errors) > 0:
+            raise errors.pop(0)
+        if post_id == "t3_c":
+            return None
+        return SimpleNamespace(
+            id=f"c_{post_id[-1]}", permalink=f"/r/sub/comments/{post_id}", subreddit=SimpleNamespace(display_name="sub"),
+            author=SimpleNamespace(name=username), created_utc=datetime(2021, 3, 1).timestamp(),
+            body="*Image Transcription*\n\n---\n\nHello\n\n---\n\nFooter")
+
+
+def create_prefetcher(tmp_path, cache: MemoryCacheStore, share: float = 0.5):
+    config = config_from_dict_or_defaults({
+        "input-file": str(tmp_path / "input.log"),
+        "prefetch-share": share,
+    }, cache)
+    clock = FakeClock()
+    reddit_api = FakeRedditAPI(clock)
+    limiter = RateLimiter(prefetch_rate(config), clock=clock, sleep=clock.sleep)
+    return Prefetcher(config, reddit_api, limiter), reddit_api, clock
+
+
+def write_log(tmp_path, lines, mode="w"):
+    with open(tmp_path / "input.log", mode, encoding="utf8") as f:
+        f.writelines(lines)
+
+
+def test_prefetch_fills_the_cache(tmp_path):
+    cache = MemoryCacheStore()
+    cache.write_json("transcriptions.json", {"t3_old": {"id": "c_old"}})
+    write_log(tmp_path, LINES[:1])
+    prefetcher, reddit_api, _ = create_prefetcher(tmp_path, cache)
+
+    assert prefetcher.update() == 1
+    write_log(tmp_path, LINES[1:], "a")
+    assert prefetcher.update() == 1
+    # Neither the cached nor the missing transcriptions are requested again
+    write_log(tmp_path, LINES, "a")
+    assert prefetcher.update() == 0
+
+    assert [post_id for _, post_id in reddit_api.requests] == ["t3_a", "t3_b", "t3_c"]
+    cached = cache.read_json("transcriptions.json")
+    assert sorted(cached) == ["t3_a", "t3_b", "t3_old"]
+    assert cached["t3_b"]["username"] == "bob"
+
+
+def test_prefetch_is_throttled_to_the_share_of_the_api_budget(tmp_path):
+    write_log(tmp_path, LINES)
+    prefetcher, reddit_api, clock = create_prefetcher(tmp_path, MemoryCacheStore(), share=0.25)
+
+    prefetcher.update()
+
+    # A quarter of 60 requests per minute, with two requests per transcription
+    times = [time for time, _ in reddit_api.requests]
+    assert times == [0, 8, 16]
+    assert clock.sleeps == [8, 8]
+
+
+def test_failed_fetches_are_retried_on_the_next_update(tmp_path):
+    write_log(tmp_path, LINES)
+    prefetcher, reddit_api, _ = create_prefetcher(tmp_path, MemoryCacheStore())
+    response = SimpleNamespace(status_code=503)
+    reddit_api.errors = {"t3_a": [ServerError(response)], "t3_b": [NotFound(response)]}
+
+    assert prefetcher.update() == 0
+    assert prefetcher.update() == 1
+
+    # Removed posts aren't requested again
+    assert [post_id for _, post_id in reddit_api.requests] == ["t3_a", "t3_b", "t3_c", "t3_a"]
+    assert sorted(prefetcher.cache) == ["t3_a"]
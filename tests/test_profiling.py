@@ -0,0 +1,39 @@
+from tor_log_analyzer.profiling import measure, profile_summary, start_profiling, stop_profiling
+
+
+def test_measure_does_nothing_without_profiler():
+    with measure("stage") as profile:
+        profile.count("items", 3)
+
+
+def test_measures_are_summed_up_by_name():
+    profiler = start_profiling()
+    try:
+        for _ in range(3):
+            with measure("outer") as outer:
+                outer.count("items", 2)
+                with measure("outer.inner"):
+                    data = list(range(100000))
+                del data
+    finally:
+        stop_profiling()
+
+    stages = dict((stage.name, stage) for stage in profiler.stages())
+    assert stages["outer"].calls == 3
+    assert stages["outer"].counts == {"items": 6}
+    assert stages["outer.inner"].wall_time <= stages["outer"].wall_time
+    # The peak of the inner allocation is part of the outer peak
+    assert stages["outer.inner"].memory_peak > 100000 * 8
+    assert stages["outer"].memory_peak >= stages["outer.inner"].memory_peak
+    assert len(profile_summary(profiler)) == 3
+
+
+def test_profile_report_is_json_compatible():
+    profiler = start_profiling()
+    with measure("stage"):
+        pass
+    stop_profiling()
+
+    report = profiler.to_dict()
+    assert [stage["name"] for stage in report["stages"]] == ["stage"]
+    assert report["stages"][0]["calls"] == 1
@@ -0,0 +1,79 @@
+import random
+
+from tor_log_analyzer.ranking import SpaceSaving, top_k
+
+
+def test_top_k_matches_full_sort():
+    random.seed(5)
+    entries = [(f"user{i}", random.randint(0, 20)) for i in range(200)]
+
+    ranking = top_k(iter(entries), 10)
+
+    expected = sorted(entries, key=lambda e: e[1], reverse=True)
+    assert ranking.top == expected[:10]
+    assert ranking.rest_total == sum(e[1] for e in expected[10:])
+    assert ranking.rest_count == 190
+    assert ranking.has_rest
+
+
+def test_top_k_without_rest():
+    ranking = top_k([("a", 1), ("b", 3)], 10)
+
+    assert ranking.top == [("b", 3), ("a", 1)]
+    assert ranking.rest_total == 0
+    assert not ranking.has_rest
+
+
+def test_space_saving_finds_heavy_hitters():
+    random.seed(9)
+    stream = ["heavy1"] * 3000 + ["heavy2"] * 2000 + ["heavy3"] * 1000
+    stream += [f"user{random.randint(0, 5000)}" for _ in range(4000)]
+    random.shuffle(stream)
+
+    summary = SpaceSaving(100)
+    for key in stream:
+        summary.add(key)
+
+    assert len(summary) == 100
+    assert summary.total == len(stream)
+
+    ranking = summary.top_k(3)
+    assert [key for key, _ in ranking.top] == ["heavy1", "heavy2", "heavy3"]
+    for key, true_count in [("heavy1", 3000), ("heavy2", 2000), ("heavy3", 1000)]:
+        assert summary[key] - summary.error(key) <= true_count <= summary[key]
+    assert ranking.rest_total == len(stream) - sum(count for _, count in ranking.top)
+
+
+def test_merged_space_saving_summaries_keep_the_bounds():
+    random.seed(4)
+    stream = ["heavy1"] * 1500 + ["heavy2"] * 800
+    stream += [f"user{random.randint(0, 5000)}" for _ in range(3000)]
+    random.shuffle(stream)
+
+    first, second = SpaceSaving(50), SpaceSaving(50)
+    for key in stream[:2000]:
+        first.add(key)
+    for key in stream[2000:]:
+        second.add(key)
+    merged = first.merge(second)
+
+    assert len(merged) == 50
+    assert merged.total == len(stream)
+    assert [key for key, _ in merged.top_k(2).top] == ["heavy1", "heavy2"]
+    for key, true_count in [("heavy1", 1500), ("heavy2", 800)]:
+        assert merged[key] - merged.error(key) <= true_count <= merged[key]
+
+
+def test_merged_space_saving_summaries_count_keys_tracked_on_one_side():
+    first, second = SpaceSaving(2), SpaceSaving(1)
+    for key in ["a"] * 5:
+        first.add(key)
+    for key in ["a"] * 3 + ["b"] * 4:
+        second.add(key)
+
+    merged = first.merge(second)
+
+    # The second summary only tracks "b", which may hide up to 7 "a"s
+    assert merged.total == 12
+    assert merged["a"] - merged.error("a") <= 8 <= merged["a"]
+    assert merged["b"] - merged.error("b") <= 4 <= merged["b"]
@@ -0,0 +1,61 @@
+import json
+
+from click.testing import CliRunner
+
+import log_analyzer
+from tor_log_analyzer.config import config_from_dict_or_defaults
+from tor_log_analyzer.reddit.reddit_api import RedditAPI
+from tests.reddit_stub import RedditStub
+
+
+def create_config(*client_ids: str):
+    return config_from_dict_or_defaults({
+        "auth": [{"client-id": client_id, "client-secret": "secret"} for client_id in client_ids],
+    })
+
+
+def test_auth_accepts_a_list():
+    config = create_config("one", "two")
+
+    assert [auth.client_id for auth in config.auths] == ["one", "two"]
+    assert config.auth.client_id == "one"
+    assert config.to_dict()["auth"][1] == {"client-id": "two", "client-secret": "secret"}
+
+
+def test_partial_command_line_app_is_rejected_for_an_auth_list(tmp_path):
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({"auth": [{"client-id": "one", "client-secret": "secret"}]}))
+
+    result = CliRunner().invoke(log_analyzer.log_analyzer, [
+        "--config-file", str(config_file), "--auth.client-id", "two"])
+
+    assert result.exit_code == 2
+    assert "--auth.client-secret" in result.output
+
+
+def test_posts_are_spread_across_the_clients():
+    with RedditStub() as stub:
+        for index in range(6):
+            stub.add_transcription(f"tor{index}", f"t{index}", "alice", "Hello")
+        api = RedditAPI(create_config("one", "two", "three"), praw_options=stub.praw_options())
+
+        for index in range(6):
+            assert api.get_transcription(f"t3_tor{index}", "alice") is not None
+
+    assert stub.requests_by_client() == {"one": 4, "two": 4, "three": 4}
+    assert [client.posts for client in api.clients] == [2, 2, 2]
+
+
+def test_clients_without_requests_left_are_avoided():
+    # Waiting for the rate limit of the first client would take a minute
+    with RedditStub(remaining=10, reset=60) as stub:
+        stub.use("one", 8)
+        for index in range(3):
+            stub.add_transcription(f"tor{index}", f"t{index}", "alice", "Hello")
+        api = RedditAPI(create_config("one", "two"), praw_options=stub.praw_options())
+
+        for index in range(3):
+            api.get_transcription(f"t3_tor{index}", "alice")
+
+    assert stub.requests_by_client() == {"one": 10, "two": 4}
+    assert api.telemetry.rate_limit_waits == 0
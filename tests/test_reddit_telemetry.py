@@ -0,0 +1,65 @@
+import json
+
+from tor_log_analyzer.cache_store import MemoryCacheStore
+from tor_log_analyzer.config import config_from_dict_or_defaults
+from tor_log_analyzer.data_processors import write_fetch_telemetry
+from tor_log_analyzer.reddit import reddit_api
+from tor_log_analyzer.reddit.reddit_api import RedditAPI
+from tor_log_analyzer.reddit.telemetry import LatencyHistogram
+from tests.reddit_stub import RedditStub
+
+
+def create_config(cache=None):
+    return config_from_dict_or_defaults({"auth": {"client-id": "one", "client-secret": "secret"}}, cache)
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    for seconds in [0.01, 0.2, 0.2, 0.3, 20]:
+        histogram.add(seconds)
+
+    assert histogram.count == 5
+    assert histogram.max == 20
+    assert histogram.percentile(0.5) == 0.25
+    assert histogram.percentile(1) is None
+    assert histogram.to_dict()["buckets"]["<=0.25"] == 2
+    assert histogram.to_dict()["buckets"][">10.0"] == 1
+
+
+def test_fetch_records_requests_per_phase(monkeypatch):
+    monkeypatch.setattr(reddit_api, "EXPANSION_DELAY", 0)
+    cache = MemoryCacheStore()
+
+    with RedditStub() as stub:
+        stub.add_transcription("tora", "ta", "alice", "Hello")
+        stub.add_transcription("torb", "tb", "bob", "Hi", hidden=True)
+        api = RedditAPI(create_config(cache), praw_options=stub.praw_options())
+
+        assert api.get_transcription("t3_tora", "alice").author == "alice"
+        assert api.get_transcription("t3_torb", "bob").author == "bob"
+        assert api.get_transcription("t3_tora", "carol") is None
+
+    telemetry = api.telemetry
+    requests = dict((name, phase.requests) for name, phase in telemetry.phases.items())
+    assert requests == {"auth": 1, "tor_submission": 3, "target_submission": 3, "replace_more": 1}
+    assert telemetry.requests == 8 == len(stub.requests) + 1
+    assert telemetry.bytes > 0
+    assert telemetry.phases["tor_submission"].latency.count == 3
+    assert telemetry.expansions == [0, 1, 0]
+    assert telemetry.not_found == 1
+
+    write_fetch_telemetry(create_config(cache), telemetry)
+    report = json.loads(cache.read_text("fetch_telemetry.json"))
+    assert report["phases"]["replace_more"]["requests"] == 1
+    assert report["expansions"] == {"total": 1, "delay": 0, "posts": {"0": 2, "1": 1}}
+
+
+def test_fetch_records_rate_limit_waits():
+    # Reddit asks the client to wait after its only request
+    with RedditStub(remaining=1, reset=1) as stub:
+        stub.add_transcription("tora", "ta", "alice", "Hello")
+        api = RedditAPI(create_config(), praw_options=stub.praw_options())
+        api.get_transcription("t3_tora", "alice")
+
+    assert api.telemetry.rate_limit_waits == 1
+    assert 0.5 < api.telemetry.rate_limit_wait_time < 2
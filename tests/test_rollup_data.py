@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import numpy as np
+
+from tor_log_analyzer import data_processors
+from tor_log_analyzer.data.rollup_data import rollup_from_dict, rollup_from_table
+from tor_log_analyzer.data.transcription_store import TranscriptionStore
+from tor_log_analyzer.data_processors import process_rollup_data
+from tor_log_analyzer.data.transcription_table import transcription_table_from_transcriptions
+from tests.helpers import create_config, create_transcription
+
+
+TRANSCRIPTIONS = [
+    create_transcription("a", "alice", "sub1", datetime(2021, 3, 1, 10, 5), "12"),
+    create_transcription("b", "alice", "sub1", datetime(2021, 3, 1, 10, 55), "1234"),
+    create_transcription("c", "bob", "sub2", datetime(2021, 3, 1, 10, 56), "1"),
+    create_transcription("d", "bob", "sub2", datetime(2021, 3, 1, 13, 0), "123"),
+]
+
+
+def test_hourly_rollup():
+    table = transcription_table_from_transcriptions(TRANSCRIPTIONS)
+    rollup = rollup_from_table(table, "hour")
+
+    assert rollup.starts.tolist() == [datetime(2021, 3, 1, 10), datetime(2021, 3, 1, 13)]
+    assert rollup.counts.tolist() == [3, 1]
+    assert rollup.characters.tolist() == [7, 3]
+    assert rollup.active_users.tolist() == [2, 1]
+
+
+def test_dense_rollup_fills_empty_buckets():
+    table = transcription_table_from_transcriptions(TRANSCRIPTIONS)
+    rollup = rollup_from_table(table, "hour").dense()
+
+    assert len(rollup) == 4
+    assert rollup.counts.tolist() == [3, 0, 0, 1]
+    assert rollup.active_users.tolist() == [2, 0, 0, 1]
+
+
+def test_rollup_round_trip():
+    table = transcription_table_from_transcriptions(TRANSCRIPTIONS)
+    rollup = rollup_from_table(table, "minute")
+    loaded = rollup_from_dict(rollup.to_dict())
+
+    assert np.array_equal(loaded.starts, rollup.starts)
+    assert loaded.counts.tolist() == rollup.counts.tolist()
+    assert loaded.to_dict() == rollup.to_dict()
+
+
+def test_process_rollup_data_only_rebuilds_the_touched_buckets(tmp_path, monkeypatch):
+    config = create_config(tmp_path)
+    process_rollup_data(config, TranscriptionStore(TRANSCRIPTIONS[:3]))
+
+    tabled = []
+    original_table = data_processors.transcription_table_from_transcriptions
+
+    def tracked_table(transcriptions):
+        tabled.append([tr.id for tr in transcriptions])
+        return original_table(transcriptions)
+
+    monkeypatch.setattr(data_processors, "transcription_table_from_transcriptions", tracked_table)
+    transcriptions = TRANSCRIPTIONS + [create_transcription("e", "carol", "sub1", datetime(2021, 3, 1, 10, 58), "1")]
+    rollups = process_rollup_data(config, TranscriptionStore(transcriptions))
+
+    # Only the buckets of the new transcriptions are binned again, per minute and per hour
+    assert tabled == [["e", "d"], ["a", "b", "c", "e", "d"]]
+    table = original_table(transcriptions)
+    for resolution, rollup in rollups.items():
+        assert rollup.to_dict() == rollup_from_table(table, resolution).to_dict()
@@ -0,0 +1,93 @@
+from datetime import datetime
+
+from tor_log_analyzer.cache_store import MemoryCacheStore
+from tor_log_analyzer.config import config_from_dict_or_defaults
+from tor_log_analyzer.data.rollup_data import rollup_from_table
+from tor_log_analyzer.data.transcription_table import transcription_table_from_transcriptions
+from tor_log_analyzer.server import StatsService
+from tests.helpers import create_transcription
+
+LINES = [
+    "Mar 01 12:00:00 tor bot[1234]: [INFO] - process_done - post t3_a - user alice\n",
+    "Mar 01 12:05:00 tor bot[1234]: [INFO] - process_done - post t3_b - user bob\n",
+    "Mar 01 13:06:00 tor bot[1234]: [INFO] - process_done - post t3_c - user alice\n",
+]
+
+
+def create_service(tmp_path) -> StatsService:
+    year = datetime.now().year
+    transcriptions = [
+        create_transcription("c_a", "alice", "sub_a", datetime(year, 3, 1, 11, 59), "Hello"),
+        create_transcription("c_b", "bob", "sub_a", datetime(year, 3, 1, 12, 4), "Hello there"),
+        create_transcription("c_c", "alice", "sub_b", datetime(year, 3, 1, 13, 5), "Hi"),
+    ]
+    cache = MemoryCacheStore()
+    cache.write_json("transcriptions.json", dict(
+        (f"t3_{tr.id[-1]}", tr.to_dict()) for tr in transcriptions))
+
+    config = config_from_dict_or_defaults({
+        "input-file": str(tmp_path / "input.log"),
+        "force-cache": True,
+        "event": {"name": "Test", "abrv": "T"},
+    }, cache)
+    return StatsService(config)
+
+
+def write_log(tmp_path, lines, mode="w"):
+    with open(tmp_path / "input.log", mode, encoding="utf8") as f:
+        f.writelines(lines)
+
+
+def test_appended_lines_update_the_stats_incrementally(tmp_path):
+    write_log(tmp_path, LINES[:2])
+    service = create_service(tmp_path)
+    assert service.update()
+    assert service.version == 1
+    assert service.aggregates.user_gamma.to_dict() == {"alice": 1, "bob": 1}
+
+    # A line that is still being written is not read yet
+    write_log(tmp_path, [LINES[2].rstrip("\n")], "a")
+    assert not service.update()
+    write_log(tmp_path, ["\n"], "a")
+    assert service.update()
+
+    assert service.version == 2
+    assert [tr.id for tr in service.transcriptions] == ["c_a", "c_b", "c_c"]
+    assert service.aggregates.user_gamma.to_dict() == {"alice": 2, "bob": 1}
+    # The rollups match a rebuild from all transcriptions
+    table = transcription_table_from_transcriptions(list(service.transcriptions))
+    for resolution, rollup in service.rollups.items():
+        expected = rollup_from_table(table, resolution)
+        assert rollup.to_dict() == expected.to_dict()
+
+
+def test_truncated_log_resets_the_stats(tmp_path):
+    write_log(tmp_path, LINES)
+    service = create_service(tmp_path)
+    service.update()
+    assert len(service.transcriptions) == 3
+
+    write_log(tmp_path, LINES[1:2])
+    assert service.update()
+
+    assert [tr.id for tr in service.transcriptions] == ["c_b"]
+    assert service.aggregates.user_gamma.to_dict() == {"bob": 1}
+
+
+def test_responses_are_cached_per_version(tmp_path):
+    write_log(tmp_path, LINES[:1])
+    service = create_service(tmp_path)
+    service.update()
+
+    first = service.response("/status.json")
+    assert service.response("/status.json") is first
+    assert b'"transcriptions":1' in first.body
+
+    write_log(tmp_path, LINES[1:], "a")
+    service.update()
+    second = service.response("/status.json")
+
+    assert second is not first
+    assert second.etag != first.etag
+    assert b'"transcriptions":3' in second.body
+    assert service.response("/nope").status == 404
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+import io
+
+from tor_log_analyzer import stat_generators
+from tor_log_analyzer.data.sub_gamma_data import SubGammaData
+from tor_log_analyzer.data.user_gamma_data import UserGammaData
+from tor_log_analyzer.stat_generators import create_sub_stats_figure, create_user_gamma_stats_figure
+from tests.helpers import create_config
+
+
+CONFIG = create_config(options={
+    "top-count": 3,
+    "event": {"abrv": "TE", "organization": "ToR", "start": "2021-03-01"},
+})
+
+
+def render(create_figure, data) -> bytes:
+    buffer = io.BytesIO()
+    create_figure(CONFIG, data).savefig(buffer, format="png", dpi=50)
+    return buffer.getvalue()
+
+
+def test_watermark_layout_is_measured_once():
+    stat_generators._watermark_layouts.clear()
+    users = UserGammaData({"alice": 3, "bob": 2, "carol": 1, "dave": 1})
+
+    first = render(create_user_gamma_stats_figure, users)
+    assert len(stat_generators._watermark_layouts) == 1
+    second = render(create_user_gamma_stats_figure, users)
+
+    assert first == second
+    assert len(stat_generators._watermark_layouts) == 1
+
+
+def test_figures_render_concurrently_in_threads():
+    users = UserGammaData({"alice": 3, "bob": 2, "carol": 1, "dave": 1})
+    subs = SubGammaData({"sub1": 5, "sub2": 1})
+    jobs = [(create_user_gamma_stats_figure, users), (create_sub_stats_figure, subs)] * 4
+
+    expected = [render(create_figure, data) for create_figure, data in jobs]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        actual = list(executor.map(lambda job: render(*job), jobs))
+
+    assert actual == expected
+
+
+def test_draft_profile_saves_charts_with_fast_compression(tmp_path):
+    config = create_config(tmp_path, {
+        "render-profile": "draft",
+        "event": {"abrv": "TE", "organization": "ToR", "start": "2021-03-01"},
+    })
+    users = UserGammaData({"alice": 3, "bob": 2, "carol": 1, "dave": 1})
+
+    assert config.render_profile.savefig_kwargs() == {"pil_kwargs": {"compress_level": 1}}
+    stat_generators.save_figure(config, create_user_gamma_stats_figure(config, users), "user_gamma.png")
+
+    assert (tmp_path / "user_gamma.png").read_bytes().startswith(b"\x89PNG")
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+import random
+
+from tor_log_analyzer.data.transcription_store import TranscriptionStore
+from tests.helpers import create_transcription
+
+
+def random_transcriptions(count: int):
+    random.seed(13)
+    start = datetime(2021, 3, 1)
+    return [
+        create_transcription(str(i), random.choice(["alice", "bob", "carol"]),
+                             random.choice(["sub1", "sub2"]),
+                             start + timedelta(minutes=random.randint(0, 1440)), "text")
+        for i in range(count)
+    ]
+
+
+def test_store_is_sorted_by_time():
+    transcriptions = random_transcriptions(300)
+    store = TranscriptionStore(transcriptions)
+
+    assert len(store) == 300
+    assert [tr.time for tr in store] == sorted(tr.time for tr in transcriptions)
+    assert store[-1].time == max(tr.time for tr in transcriptions)
+
+
+def test_window_excludes_bounds():
+    transcriptions = random_transcriptions(300)
+    store = TranscriptionStore(transcriptions)
+    start, end = datetime(2021, 3, 1, 3), datetime(2021, 3, 1, 9)
+
+    window = store.window(start, end)
+
+    expected = sorted((tr for tr in transcriptions if start < tr.time < end), key=lambda tr: tr.time)
+    assert [tr.time for tr in window] == [tr.time for tr in expected]
+    assert len(store.window(start=start)) == len([tr for tr in transcriptions if tr.time > start])
+    assert len(store.window(end, start)) == 0
+
+
+def test_user_and_subreddit_queries():
+    transcriptions = random_transcriptions(300)
+    store = TranscriptionStore(transcriptions)
+    start, end = datetime(2021, 3, 1, 3), datetime(2021, 3, 1, 4)
+
+    by_user = store.by_user("alice", start, end)
+    by_sub = store.by_subreddit("sub2")
+
+    assert set(tr.id for tr in by_user) == set(
+        tr.id for tr in transcriptions if tr.username == "alice" and start < tr.time < end)
+    assert set(tr.id for tr in by_sub) == set(tr.id for tr in transcriptions if tr.subreddit == "sub2")
+    assert store.by_user("nobody") == []
+    assert sorted(store.users()) == ["alice", "bob", "carol"]
+
+
+def test_add_keeps_order():
+    store = TranscriptionStore()
+    late = create_transcription("late", "alice", "sub1", datetime(2021, 3, 2), "text")
+    early = create_transcription("early", "alice", "sub1", datetime(2021, 3, 1), "text")
+
+    store.add(late)
+    store.add(early)
+
+    assert [tr.id for tr in store] == ["early", "late"]
+    assert [tr.id for tr in store.by_user("alice")] == ["early", "late"]
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+import random
+
+from tor_log_analyzer.aggregation import aggregate, aggregate_table
+from tor_log_analyzer.data.transcription_table import transcription_table_from_transcriptions
+from tests.helpers import create_transcription
+
+
+def random_transcriptions(count: int):
+    random.seed(3)
+    start = datetime(2021, 3, 1, 12)
+    return [
+        create_transcription(
+            f"t{i}", random.choice(["alice", "bob", "carol"]), random.choice(["sub1", "sub2"]),
+            start + timedelta(minutes=random.randint(0, 600)),
+            " ".join("word" for _ in range(random.randint(1, 50))),
+            header=random.choice(["*Image Transcription: Twitter*", "*Video Transcription:*"]))
+        for i in range(count)
+    ]
+
+
+def test_group_operations():
+    transcriptions = [
+        create_transcription("a", "alice", "sub1", datetime(2021, 3, 1), "12345"),
+        create_transcription("b", "bob", "sub1", datetime(2021, 3, 2), "1"),
+        create_transcription("c", "alice", "sub2", datetime(2021, 3, 3), "123"),
+        create_transcription("d", "alice", "sub2", datetime(2021, 3, 4), "1234567"),
+    ]
+    table = transcription_table_from_transcriptions(transcriptions)
+
+    assert table.group_count("username") == {"alice": 3, "bob": 1}
+    assert table.group_sum("subreddit", "characters") == {"sub1": 6, "sub2": 10}
+    assert table.group_max("username", "characters") == {"alice": 7, "bob": 1}
+    assert table.group_median("username", "characters") == {"alice": 5, "bob": 1}
+    assert len(table.window(datetime(2021, 3, 1), datetime(2021, 3, 4))) == 2
+
+
+def test_table_aggregation_matches_single_pass():
+    transcriptions = random_transcriptions(500)
+    table = transcription_table_from_transcriptions(transcriptions)
+
+    expected = aggregate(transcriptions)
+    actual = aggregate_table(table, transcriptions)
+
+    assert actual.user_gamma.to_dict() == expected.user_gamma.to_dict()
+    assert actual.user_chars.to_dict() == expected.user_chars.to_dict()
+    assert actual.sub_gamma.to_dict() == expected.sub_gamma.to_dict()
+    assert actual.post_types.to_dict() == expected.post_types.to_dict()
+    assert actual.post_formats.to_dict() == expected.post_formats.to_dict()
+    assert actual.words == expected.words
+    assert actual.characters == expected.characters
@@ -0,0 +1,63 @@
+import random
+import statistics
+
+from tor_log_analyzer.data.user_char_data import UserCharData, UserCharEntry
+
+
+def test_entry_statistics_match_statistics_module():
+    random.seed(42)
+    values = [random.randint(1, 5000) for _ in range(501)]
+    entry = UserCharEntry()
+
+    for count, value in enumerate(values, start=1):
+        entry += value
+        assert entry.median == statistics.median_high(values[:count])
+
+    assert entry.count == len(values)
+    assert entry.total == sum(values)
+    assert entry.maximum == max(values)
+    assert entry.mean == statistics.mean(values)
+    assert entry.char_count_list == sorted(values)
+
+
+def test_entry_mean_keeps_integers():
+    entry = UserCharEntry([2, 4])
+
+    assert entry.mean == 3
+    assert isinstance(entry.mean, int)
+
+
+def test_entry_add_does_not_modify_operands():
+    entry = UserCharEntry([1, 2])
+    combined = entry + [3, 4] + UserCharEntry([5])
+
+    assert entry.char_count_list == [1, 2]
+    assert combined.char_count_list == [1, 2, 3, 4, 5]
+
+
+def test_user_char_data_adds_in_place():
+    data = UserCharData()
+    data["alice"] += 10
+    entry = data["alice"]
+    data["alice"] += 30
+
+    assert data["alice"] is entry
+    assert data.to_dict() == {"alice": {"total": 40, "maximum": 30, "median": 30, "mean": 20}}
+
+
+def test_approximate_entry_median_is_within_accuracy():
+    random.seed(7)
+    values = [random.randint(1, 100000) for _ in range(10000)]
+    entry = UserCharEntry(approximate=True)
+    other = UserCharEntry(approximate=True)
+
+    for value in values[:5000]:
+        entry += value
+    for value in values[5000:]:
+        other += value
+    entry += other
+
+    exact_median = statistics.median_high(values)
+    assert entry.count == len(values)
+    assert entry.maximum == max(values)
+    assert abs(entry.median - exact_median) <= exact_median * 0.01 + 1
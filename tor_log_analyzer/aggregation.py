@@ -0,0 +1,287 @@
+"""
+Single-pass aggregation of the transcription statistics.
+
+Every statistic is collected by an aggregator. All registered aggregators are
+fed in the same loop over the transcriptions, so adding a new statistic does
+not add another full scan of the data.
+"""
+from typing import Callable, Dict, Iterable, List, Optional
+
+from tor_log_analyzer.transcription import Transcription
+from tor_log_analyzer.ranking import SpaceSaving
+from tor_log_analyzer.data.user_gamma_data import UserGammaData
+from tor_log_analyzer.data.user_char_data import UserCharData, UserCharEntry, user_char_entry_from_sorted, user_char_data_from_state_dict
+from tor_log_analyzer.data.sub_gamma_data import SubGammaData
+from tor_log_analyzer.data.post_type_data import PostTypeData
+from tor_log_analyzer.data.post_format_data import PostFormatData
+from tor_log_analyzer.data.transcription_table import TranscriptionTable
+
+
+class Aggregator():
+    """
+    Collects a single statistic from a stream of transcriptions.
+    """
+
+    def add(self, transcription: Transcription):
+        raise NotImplementedError()
+
+    def result(self):
+        raise NotImplementedError()
+
+
+class CountAggregator(Aggregator):
+    """
+    Counts the transcriptions for every key, e.g. per user or per subreddit.
+    """
+
+    def __init__(self, key: Callable[[Transcription], str], data_type: Callable):
+        self._key = key
+        self._data = data_type()
+
+    def add(self, transcription: Transcription):
+        key = self._key(transcription)
+        self._data[key] += 1
+
+    def result(self):
+        return self._data
+
+
+class UserCharAggregator(Aggregator):
+    """
+    Collects the transcription lengths of every user.
+    With `approximate`, the medians are estimated with a quantile sketch.
+    """
+
+    def __init__(self, approximate: bool = False):
+        self._data = UserCharData(approximate=approximate)
+
+    def add(self, transcription: Transcription):
+        self._data[transcription.username] += transcription.characters
+
+    def result(self) -> UserCharData:
+        return self._data
+
+
+class SumAggregator(Aggregator):
+    """
+    Sums up a value over all transcriptions.
+    """
+
+    def __init__(self, value: Callable[[Transcription], int]):
+        self._value = value
+        self._total = 0
+
+    def add(self, transcription: Transcription):
+        self._total += self._value(transcription)
+
+    def result(self) -> int:
+        return self._total
+
+
+class HeavyHitterAggregator(Aggregator):
+    """
+    Tracks the most frequent keys in bounded memory, for leaderboards
+    over very long time frames. Not registered by default,
+    the heavy-hitters option adds it for the users and subreddits.
+    """
+
+    def __init__(self, key: Callable[[Transcription], str], capacity: int = 1000):
+        self._key = key
+        self._summary = SpaceSaving(capacity)
+
+    def add(self, transcription: Transcription):
+        self._summary.add(self._key(transcription))
+
+    def result(self) -> SpaceSaving:
+        return self._summary
+
+
+# The built-in aggregators, which can also be computed from a transcription table
+# and be stored in the aggregate state
+BUILTIN_AGGREGATORS = ["user_gamma", "user_chars", "sub_gamma",
+                     "post_types", "post_formats", "words", "characters"]
+
+# The factories of all registered aggregators, by name
+_AGGREGATORS: Dict[str, Callable[[], Aggregator]] = {}
+
+
+def register_aggregator(name: str, factory: Callable[[], Aggregator]):
+    """
+    Registers a new aggregator that is run in the aggregation pass.
+    The factory is called once per pass to create a fresh aggregator.
+    """
+    _AGGREGATORS[name] = factory
+
+
+def registered_aggregators() -> List[str]:
+    """
+    The names of all registered aggregators.
+    """
+    return list(_AGGREGATORS)
+
+
+register_aggregator("user_gamma", lambda: CountAggregator(
+    lambda tr: tr.username, UserGammaData))
+register_aggregator("user_chars", UserCharAggregator)
+register_aggregator("sub_gamma", lambda: CountAggregator(
+    lambda tr: tr.subreddit, SubGammaData))
+register_aggregator("post_types", lambda: CountAggregator(
+    lambda tr: tr.t_type, PostTypeData))
+register_aggregator("post_formats", lambda: CountAggregator(
+    lambda tr: tr.t_format, PostFormatData))
+register_aggregator("words", lambda: SumAggregator(lambda tr: tr.words))
+register_aggregator("characters", lambda: SumAggregator(
+    lambda tr: tr.characters))
+
+
+def _none_keys_to_empty(data: Dict) -> Dict:
+    # Unknown types and formats are stored as empty string, JSON keys can't be null
+    return dict([(key if key is not None else "", value) for key, value in data.items()])
+
+
+def _empty_keys_to_none(data: Dict) -> Dict:
+    return dict([(key if key != "" else None, value) for key, value in data.items()])
+
+
+class Aggregates():
+    def __init__(self, data: Dict):
+        self._data = data
+
+    def __getitem__(self, name: str):
+        return self._data[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._data
+
+    @property
+    def user_gamma(self) -> UserGammaData:
+        return self._data["user_gamma"]
+
+    @property
+    def user_chars(self) -> UserCharData:
+        return self._data["user_chars"]
+
+    @property
+    def sub_gamma(self) -> SubGammaData:
+        return self._data["sub_gamma"]
+
+    @property
+    def post_types(self) -> PostTypeData:
+        return self._data["post_types"]
+
+    @property
+    def post_formats(self) -> PostFormatData:
+        return self._data["post_formats"]
+
+    @property
+    def words(self) -> int:
+        return self._data["words"]
+
+    @property
+    def characters(self) -> int:
+        return self._data["characters"]
+
+    def names(self) -> List[str]:
+        return list(self._data)
+
+    def merge(self, other: "Aggregates") -> "Aggregates":
+        """
+        Adds the statistics of the other aggregates to these aggregates,
+        e.g. to combine the aggregates of separate shards of transcriptions.
+        """
+        for name in other.names():
+            value = other[name]
+            if name not in self._data:
+                self._data[name] = value
+            elif isinstance(value, int):
+                self._data[name] += value
+            elif isinstance(value, dict):
+                merged = self._data[name]
+                for key in value:
+                    merged[key] = merged.get(key, 0) + value[key]
+            elif hasattr(value, "merge"):
+                self._data[name].merge(value)
+            else:
+                raise TypeError(f"The aggregate '{name}' can't be merged.")
+        return self
+
+    def state_dict(self) -> Dict:
+        """
+        The state of the built-in aggregates, from which they can be restored.
+        """
+        return {
+            "user_gamma": self.user_gamma.to_dict(),
+            "user_chars": self.user_chars.state_dict(),
+            "sub_gamma": self.sub_gamma.to_dict(),
+            "post_types": _none_keys_to_empty(self.post_types.to_dict()),
+            "post_formats": _none_keys_to_empty(self.post_formats.to_dict()),
+            "words": self.words,
+            "characters": self.characters,
+        }
+
+
+def aggregates_from_state_dict(state: Dict) -> Aggregates:
+    return Aggregates({
+        "user_gamma": UserGammaData(state["user_gamma"]),
+        "user_chars": user_char_data_from_state_dict(state["user_chars"]),
+        "sub_gamma": SubGammaData(state["sub_gamma"]),
+        "post_types": PostTypeData(_empty_keys_to_none(state["post_types"])),
+        "post_formats": PostFormatData(_empty_keys_to_none(state["post_formats"])),
+        "words": state["words"],
+        "characters": state["characters"],
+    })
+
+
+def aggregate(transcriptions: Iterable[Transcription], names: Optional[List[str]] = None,
+              factories: Optional[Dict[str, Callable[[], Aggregator]]] = None) -> Aggregates:
+    """
+    Runs the given aggregators (all registered ones by default) in a single pass
+    over the transcriptions. The factories add aggregators to this pass,
+    or replace the registered aggregators with the same name.
+    """
+    if names is None:
+        names = registered_aggregators() + [name for name in factories or {} if name not in _AGGREGATORS]
+    factories = {**_AGGREGATORS, **(factories or {})}
+
+    aggregators = [(name, factories[name]()) for name in names]
+    add_functions = [aggregator.add for _, aggregator in aggregators]
+
+    for transcription in transcriptions:
+        for add in add_functions:
+            add(transcription)
+
+    return Aggregates(dict([(name, aggregator.result()) for name, aggregator in aggregators]))
+
+
+def aggregate_table(table: TranscriptionTable, transcriptions: Optional[Iterable[Transcription]] = None,
+                    approximate_user_chars: bool = False,
+                    factories: Optional[Dict[str, Callable[[], Aggregator]]] = None) -> Aggregates:
+    """
+    Computes the built-in statistics with vectorized operations on the table.
+    If the transcriptions are given, all other registered aggregators and the
+    added factories are run in a single pass over them.
+    """
+    user_chars = UserCharData(approximate=approximate_user_chars)
+    for username, char_counts in table.group_sorted("username", "characters").items():
+        if approximate_user_chars:
+            user_chars[username] = UserCharEntry(char_counts.tolist(), approximate=True)
+        else:
+            user_chars[username] = user_char_entry_from_sorted(char_counts.tolist())
+
+    data = {
+        "user_gamma": UserGammaData(table.group_count("username")),
+        "user_chars": user_chars,
+        "sub_gamma": SubGammaData(table.group_count("subreddit")),
+        "post_types": PostTypeData(table.group_count("t_type")),
+        "post_formats": PostFormatData(table.group_count("t_format")),
+        "words": int(table.words.sum()),
+        "characters": int(table.characters.sum()),
+    }
+
+    if transcriptions is not None:
+        other_names = [name for name in registered_aggregators() + list(factories or {})
+                       if name not in BUILTIN_AGGREGATORS]
+        if len(other_names) > 0:
+            data.update(aggregate(transcriptions, list(dict.fromkeys(other_names)), factories)._data)
+
+    return Aggregates(data)
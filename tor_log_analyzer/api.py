@@ -0,0 +1,118 @@
+"""
+Analysis of the logs as a library, without writing any files.
+
+    from tor_log_analyzer.api import analyze
+
+    result = analyze("input/input.log", {"force-cache": True}, charts=["history"])
+    result.aggregates.user_gamma
+    result.charts["history"]  # The PNG image as bytes
+
+By default, the cache is kept in memory. Pass the same cache backend
+to keep the transcriptions and aggregates warm across calls,
+or a `CacheStore` to keep them in a folder.
+"""
+from typing import Dict, Iterable, List, Optional, Union
+from os import PathLike, fspath
+
+from tor_log_analyzer.aggregation import Aggregates
+from tor_log_analyzer.cache_store import CacheBackend, MemoryCacheStore
+from tor_log_analyzer.config import Config, config_from_dict_or_defaults
+from tor_log_analyzer.data.done_data import DoneData
+from tor_log_analyzer.data.rollup_data import RollupData
+from tor_log_analyzer.data.transcription_store import TranscriptionStore
+from tor_log_analyzer.data_processors import process_lines
+from tor_log_analyzer.pipeline import Pipeline
+
+
+class AnalysisResult():
+    """
+    The processed data of an analysis and the rendered charts.
+    """
+
+    def __init__(self, config: Config, dones: List[DoneData], transcriptions: TranscriptionStore,
+                 aggregates: Aggregates, rollups: Dict[str, RollupData], charts: Dict[str, bytes]):
+        self._config = config
+        self._dones = dones
+        self._transcriptions = transcriptions
+        self._aggregates = aggregates
+        self._rollups = rollups
+        self._charts = charts
+
+    @property
+    def config(self) -> Config:
+        return self._config
+
+    @property
+    def dones(self) -> List[DoneData]:
+        "The \"done\"s of the log within the time frame of the event."
+        return self._dones
+
+    @property
+    def transcriptions(self) -> TranscriptionStore:
+        return self._transcriptions
+
+    @property
+    def aggregates(self) -> Aggregates:
+        return self._aggregates
+
+    @property
+    def rollups(self) -> Dict[str, RollupData]:
+        "The transcriptions binned into time buckets, by resolution."
+        return self._rollups
+
+    @property
+    def charts(self) -> Dict[str, bytes]:
+        "The rendered images, by chart name."
+        return self._charts
+
+
+def analyze(lines_or_path: Union[str, PathLike, Iterable[str]], options: Optional[Dict] = None,
+            cache: Optional[CacheBackend] = None, charts: Optional[List[str]] = None,
+            image_format: str = "png") -> AnalysisResult:
+    """
+    Analyzes the lines of a log, or the log file at the given path.
+
+    The options are the same as in the config file, e.g. `{"event": {...}}`.
+    Intermediate artifacts are not written unless the "artifacts" option asks for them.
+    The given charts (e.g. "history", "user_gamma") are rendered as PNG or SVG images.
+    """
+    from tor_log_analyzer.main import chart_stages, data_stages, plot_style
+
+    values = {"artifacts": "none", **(options or {})}
+    from_file = isinstance(lines_or_path, (str, PathLike))
+    if from_file:
+        values["input-file"] = fspath(lines_or_path)
+    config = config_from_dict_or_defaults(values, cache if cache is not None else MemoryCacheStore())
+
+    stages = data_stages(config)
+    charts_by_name = {}
+    if charts:
+        from tor_log_analyzer.stat_generators import IMAGE_FORMATS, figure_bytes
+
+        charts_by_name = dict((stage.name, stage) for stage in chart_stages(config))
+        unknown = [name for name in charts if name not in charts_by_name]
+        if len(unknown) > 0:
+            raise RuntimeError(
+                f"Unknown charts: {', '.join(unknown)}. Use some of: {', '.join(charts_by_name)}.")
+        if image_format not in IMAGE_FORMATS:
+            raise RuntimeError(
+                f"Unknown image format '{image_format}', use one of: {', '.join(IMAGE_FORMATS)}.")
+
+    results = {}
+    if not from_file:
+        results["parse"] = process_lines(config, [line.rstrip("\r\n") for line in lines_or_path])
+    results = Pipeline(stages).run(config, only=["aggregate", "rollup"], results=results)
+
+    rendered = {}
+    if charts:
+        import matplotlib
+
+        # Don't change the style of the plots of the calling program
+        with matplotlib.rc_context(plot_style(config)):
+            for name in charts:
+                stage = charts_by_name[name]
+                fig = stage.figure(*stage.arguments(config, results))
+                rendered[name] = figure_bytes(config, fig, image_format)
+
+    return AnalysisResult(config, results["parse"], results["fetch"], results["aggregate"],
+                          results["rollup"], rendered)
@@ -1,4 +1,4 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Union
 
 
 class AuthConfig:
@@ -35,3 +35,13 @@ def auth_from_dict(config: Dict) -> AuthConfig:
         client_id=config["client-id"],
         client_secret=config["client-secret"]
     )
+
+
+def auth_pool_from_dict(config: Union[Dict, List[Dict]]) -> List[AuthConfig]:
+    """
+    Creates the auth configurations of one or a list of Reddit apps.
+    """
+    configs = config if isinstance(config, list) else [config]
+    if len(configs) == 0:
+        raise RuntimeError("The auth list is empty, add at least one client id and secret.")
+    return [auth_from_dict(auth) for auth in configs]
@@ -0,0 +1,374 @@
+"""
+Crash-safe storage of the cache files.
+
+Every file is written to a temporary file first and then renamed over the old one,
+so an interrupted run never leaves a truncated file behind. A manifest records
+the checksum of every file, files that don't match it are moved aside
+instead of being used. The cache can also be kept in memory instead.
+"""
+from typing import IO, Any, Dict, Iterable, List, Optional
+from contextlib import contextmanager
+from datetime import datetime
+from os import path
+import glob
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import click
+
+from tor_log_analyzer.config import Config
+
+# The version of the cache layout, increase on incompatible changes
+CACHE_SCHEMA_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+
+# Corrupt files are moved to this folder in the cache
+CORRUPT_DIR = "corrupt"
+
+
+@contextmanager
+def atomic_write(file: str, encoding: Optional[str] = None):
+    """
+    Opens a temporary file next to the given one for writing,
+    which replaces the given file once the block completes.
+    """
+    directory, name = path.split(path.abspath(file))
+    fd, temp_file = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, file)
+    except BaseException:
+        if path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+
+def file_checksum(file: str) -> str:
+    digest = hashlib.sha256()
+    with open(file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CacheBackend():
+    """
+    Where the cache files are kept. The analysis only accesses the cache through it,
+    so that callers can keep the cache somewhere else than on disk.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+
+    def __getstate__(self) -> Dict:
+        # Locks can't be sent to worker processes
+        state = dict(self.__dict__)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def open(self, name: str, encoding: Optional[str] = None):
+        """
+        Opens the cache file for streaming writes, it replaces the old file once the block completes.
+        """
+        raise NotImplementedError()
+
+    def read_text(self, name: str, encoding: Optional[str] = None) -> Optional[str]:
+        """
+        The content of the cache file, or None if it is missing or corrupt.
+        """
+        raise NotImplementedError()
+
+    def quarantine(self, name: str, reason: str):
+        """
+        Removes a corrupt cache file.
+        """
+        raise NotImplementedError()
+
+    def write_text(self, name: str, text: str, encoding: Optional[str] = None):
+        with self.open(name, encoding=encoding) as f:
+            f.write(text)
+
+    def write_json(self, name: str, data: Any, **kwargs):
+        "Writes the data like `json.dump` with the given arguments."
+        with self.open(name, encoding="utf8") as f:
+            json.dump(data, f, **kwargs)
+
+    def read_json(self, name: str) -> Optional[Any]:
+        """
+        The parsed cache file, or None if it is missing or corrupt.
+        """
+        text = self.read_text(name, encoding="utf8")
+        if text is None:
+            return None
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            self.quarantine(name, "it isn't valid JSON")
+            return None
+
+
+class CacheStore(CacheBackend):
+    """
+    The files in a cache folder, with a manifest of their checksums.
+
+    The manifest also records the event the cache was last used for and when,
+    to evict the least recently used caches.
+    """
+
+    def __init__(self, cache_dir: str, event: Optional[Dict] = None):
+        super().__init__()
+        self._cache_dir = cache_dir
+        self._event = event
+        self._files: Dict[str, Dict] = {}
+        self._reload_manifest()
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir
+
+    @property
+    def event(self) -> Optional[Dict]:
+        "The event the cache is used for."
+        return self._event
+
+    @property
+    def manifest_file(self) -> str:
+        return f"{self._cache_dir}/{MANIFEST_FILE}"
+
+    def file(self, name: str) -> str:
+        return f"{self._cache_dir}/{name}"
+
+    def _load_manifest(self) -> Optional[Dict]:
+        try:
+            with open(self.manifest_file, encoding="utf8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError):
+            self.quarantine(MANIFEST_FILE, "the manifest can't be read")
+            return None
+
+    def _reload_manifest(self):
+        """
+        Reads the checksums from the manifest on disk,
+        other processes using the same cache may have written files since.
+        """
+        manifest = self._load_manifest()
+        # The files of another schema version are verified by parsing them only
+        if manifest is not None and manifest.get("version") == CACHE_SCHEMA_VERSION:
+            self._files = manifest.get("files", {})
+
+    def save_manifest(self):
+        with self._lock:
+            self._reload_manifest()
+            self._write_manifest()
+
+    def _write_manifest(self):
+        with self._lock:
+            manifest = {
+                "version": CACHE_SCHEMA_VERSION,
+                "event": self._event,
+                "last-used": datetime.now().isoformat(timespec="seconds"),
+                "files": self._files,
+            }
+            with atomic_write(self.manifest_file, encoding="utf8") as f:
+                json.dump(manifest, f, indent=2)
+                f.write("\n")
+
+    @contextmanager
+    def open(self, name: str, encoding: Optional[str] = None):
+        """
+        Opens the cache file for streaming writes. It atomically replaces
+        the old file and its checksum is recorded once the block completes.
+        """
+        file = self.file(name)
+        with atomic_write(file, encoding=encoding) as f:
+            yield f
+        with self._lock:
+            self._reload_manifest()
+            self._files[name] = {
+                "sha256": file_checksum(file),
+                "size": path.getsize(file),
+            }
+            self._write_manifest()
+
+    def read_text(self, name: str, encoding: Optional[str] = None) -> Optional[str]:
+        file = self.file(name)
+        if not path.isfile(file):
+            return None
+
+        with self._lock:
+            self._reload_manifest()
+            entry = self._files.get(name)
+        if entry is not None and file_checksum(file) != entry["sha256"]:
+            self.quarantine(name, "its checksum doesn't match the manifest")
+            return None
+
+        with open(file, encoding=encoding) as f:
+            return f.read()
+
+    def quarantine(self, name: str, reason: str):
+        """
+        Moves a corrupt cache file aside, to be inspected later.
+        """
+        corrupt_dir = f"{self._cache_dir}/{CORRUPT_DIR}"
+        os.makedirs(corrupt_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        target = f"{corrupt_dir}/{name}.{timestamp}"
+        os.replace(self.file(name), target)
+        click.echo(f"  Warning: Ignoring the cache file {name}, {reason}. It was moved to {target}.",
+                   err=True)
+        with self._lock:
+            self._files.pop(name, None)
+
+
+class MemoryCacheStore(CacheBackend):
+    """
+    Keeps the cache files in memory, e.g. to reuse them across analyses in the same process.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._files: Dict[str, str] = {}
+
+    def names(self) -> List[str]:
+        return list(self._files)
+
+    @contextmanager
+    def open(self, name: str, encoding: Optional[str] = None):
+        buffer = io.StringIO()
+        yield buffer
+        with self._lock:
+            self._files[name] = buffer.getvalue()
+
+    def read_text(self, name: str, encoding: Optional[str] = None) -> Optional[str]:
+        return self._files.get(name)
+
+    def quarantine(self, name: str, reason: str):
+        click.echo(f"  Warning: Ignoring the cache file {name}, {reason}.", err=True)
+        with self._lock:
+            self._files.pop(name, None)
+
+
+def dump_json_array(items: Iterable[Any], f: IO, indent: int = 2):
+    """
+    Writes the items as a JSON array one by one, like `json.dump(list(items), f, indent=indent)`
+    but without holding all of them in memory.
+    """
+    empty = True
+    for item in items:
+        # Strings escape their line breaks, so all of them are structural
+        f.write("[\n" if empty else ",\n")
+        f.write(" " * indent + json.dumps(item, indent=indent).replace("\n", "\n" + " " * indent))
+        empty = False
+    f.write("[]" if empty else "\n]")
+
+
+_stores: Dict[str, CacheStore] = {}
+_stores_lock = threading.Lock()
+
+
+def cache_store(config: Config) -> CacheBackend:
+    """
+    The cache of the configuration, shared by all stages writing to it.
+    Without a configured cache backend, it is stored in the cache folder.
+    """
+    if config.cache_backend is not None:
+        return config.cache_backend
+
+    key = path.abspath(config.cache_dir)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None or store.event != config.event.to_dict():
+            store = CacheStore(config.cache_dir, config.event.to_dict())
+            _stores[key] = store
+        return store
+
+
+class CacheUsage():
+    """
+    The size of a cache folder and when it was last used.
+    """
+
+    def __init__(self, cache_dir: str, event: Optional[Dict], last_used: str, size: int):
+        self._cache_dir = cache_dir
+        self._event = event
+        self._last_used = last_used
+        self._size = size
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir
+
+    @property
+    def event(self) -> Optional[Dict]:
+        return self._event
+
+    @property
+    def last_used(self) -> str:
+        return self._last_used
+
+    @property
+    def size(self) -> int:
+        "The size of all files in the cache, in bytes."
+        return self._size
+
+
+def _folder_size(folder: str) -> int:
+    return sum(path.getsize(path.join(root, name))
+               for root, _, names in os.walk(folder) for name in names)
+
+
+def cache_usages(output_dir: str) -> List[CacheUsage]:
+    """
+    The caches of an output folder and of the event folders of a batch in it.
+    """
+    usages = []
+    for manifest_file in [f"{output_dir}/.cache/{MANIFEST_FILE}",
+                          *glob.glob(f"{output_dir}/*/.cache/{MANIFEST_FILE}")]:
+        try:
+            with open(manifest_file, encoding="utf8") as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        cache_dir = path.dirname(manifest_file)
+        usages.append(CacheUsage(cache_dir, manifest.get("event"),
+                                 manifest.get("last-used", ""), _folder_size(cache_dir)))
+    return usages
+
+
+def evict_caches(output_dir: str, max_size: int, keep: Iterable[str] = ()) -> List[CacheUsage]:
+    """
+    Deletes the least recently used event caches until all caches together
+    fit into the given size in bytes. The kept cache folders are never deleted.
+    Returns the evicted caches.
+    """
+    keep = set(path.abspath(cache_dir) for cache_dir in keep)
+    usages = sorted(cache_usages(output_dir), key=lambda usage: usage.last_used)
+    total = sum(usage.size for usage in usages)
+
+    evicted = []
+    for usage in usages:
+        if total <= max_size:
+            break
+        if path.abspath(usage.cache_dir) in keep:
+            continue
+        shutil.rmtree(usage.cache_dir, ignore_errors=True)
+        with _stores_lock:
+            _stores.pop(path.abspath(usage.cache_dir), None)
+        total -= usage.size
+        evicted.append(usage)
+    return evicted
@@ -0,0 +1,83 @@
+"""
+Content-addressed cache of the rendered charts.
+"""
+from typing import Any, Dict, Tuple
+from os import path
+import hashlib
+import json
+
+from tor_log_analyzer import __version__
+from tor_log_analyzer.config import Config
+from tor_log_analyzer.transcription import Transcription
+from tor_log_analyzer.cache_store import cache_store
+
+
+def config_fingerprint(config: Config) -> Dict:
+    """
+    The parts of the configuration that affect how the charts look.
+    """
+    return {
+        "top-count": config.top_count,
+        "render-profile": config.render_profile.name,
+        "colors": config.colors.to_dict(),
+        "event": config.event.to_dict(),
+    }
+
+
+def _fingerprint(value: Any) -> Any:
+    if isinstance(value, Config):
+        return config_fingerprint(value)
+    if isinstance(value, Transcription):
+        return [value.id, value.timestamp]
+    if hasattr(value, "state_dict"):
+        return _fingerprint(value.state_dict())
+    if hasattr(value, "to_dict"):
+        return _fingerprint(value.to_dict())
+    if isinstance(value, dict):
+        # Sort the keys independent of their type, they can contain None
+        return [[str(key), _fingerprint(value[key])] for key in sorted(value, key=str)]
+    if hasattr(value, "__iter__") and not isinstance(value, str):
+        return [_fingerprint(item) for item in value]
+    return value
+
+
+def chart_hash(filename: str, args: Tuple) -> str:
+    """
+    A hash of everything the chart depends on: its input data,
+    the relevant configuration and the version of the tool.
+    """
+    content = json.dumps([__version__, filename, _fingerprint(args)], default=str)
+    return hashlib.sha1(content.encode("utf8")).hexdigest()
+
+
+class ChartCache():
+    """
+    The hashes of the charts in the image folder, stored in a manifest.
+    """
+
+    def __init__(self, config: Config):
+        self._config = config
+        self._hashes: Dict[str, str] = {}
+
+        if not config.no_cache:
+            self._hashes = cache_store(config).read_json(self.manifest_file) or {}
+
+    @property
+    def manifest_file(self) -> str:
+        "The name of the manifest in the cache folder."
+        return "charts.json"
+
+    def is_current(self, filename: str, chart_hash: str) -> bool:
+        """
+        Whether the chart already exists and was rendered from the same inputs.
+        """
+        if self._config.no_cache:
+            return False
+        return self._hashes.get(filename) == chart_hash and \
+            path.isfile(f"{self._config.image_dir}/{filename}")
+
+    def update(self, filename: str, chart_hash: str):
+        self._hashes[filename] = chart_hash
+
+    def save(self):
+        cache_store(self._config).write_text(self.manifest_file, json.dumps(self._hashes, indent=2) + "\n")
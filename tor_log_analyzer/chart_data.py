@@ -0,0 +1,69 @@
+"""
+The data behind the charts, independent of how they are drawn.
+"""
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from tor_log_analyzer.transcription import Transcription
+from tor_log_analyzer.config import Config
+from tor_log_analyzer.aggregation import Aggregates
+from tor_log_analyzer.ranking import Ranking
+
+
+def compress_ranking(ranking: Ranking, rest_label: Optional[str] = None) -> List[Tuple[str, int]]:
+    """
+    The ranking entries in ascending order, for horizontal bar charts.
+    If a label is given, the rest is aggregated to a single first entry.
+    """
+    compressed_data: List[Tuple[str, int]] = list(reversed(ranking.top))
+
+    if rest_label is not None and ranking.has_rest:
+        # Aggregate the rest of the entries that didn't make it in the top to a single entry
+        compressed_data = [(rest_label, ranking.rest_total)] + compressed_data
+
+    return compressed_data
+
+
+def history_series(config: Config, transcriptions: List[Transcription]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The total number of transcriptions over time, as step series.
+    """
+    times = np.array([tr.time for tr in transcriptions], dtype="datetime64[us]")
+    # Add a "step" for each transcription
+    dates = np.repeat(times, 2)
+    data = np.arange(2 * len(transcriptions)) // 2 + np.tile([0, 1], len(transcriptions))
+
+    if config.event.start is not None:
+        dates = np.concatenate(
+            [np.array([config.event.start], dtype="datetime64[us]"), dates])
+        data = np.concatenate([[0], data])
+
+    if config.event.end is not None:
+        dates = np.concatenate(
+            [dates, np.array([config.event.end], dtype="datetime64[us]")])
+        data = np.concatenate([data, [len(transcriptions)]])
+
+    return dates, data
+
+
+def general_stats(aggregates: Aggregates, transcription_data: List[Transcription]) -> Dict:
+    """
+    The key figures of the event, by their label.
+    """
+    stats = {
+        "Participants": len(aggregates.user_gamma),
+        "Subreddits": len(aggregates.sub_gamma),
+        "Post types": len(aggregates.post_types),
+        "Transcriptions": len(transcription_data),
+        "Words written": aggregates.words,
+        "Characters typed": aggregates.characters,
+    }
+
+    if len(transcription_data) >= 2:
+        # Get the total duration transcribed
+        duration = transcription_data[-1].time - transcription_data[0].time
+        # Strip off the seconds
+        duration_str = ':'.join(str(duration).split(':')[:2]) + " h"
+        stats["Duration"] = duration_str
+
+    return stats
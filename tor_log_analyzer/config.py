@@ -1,22 +1,73 @@
-from typing import Dict
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
 from tor_log_analyzer.util import clean_dict
-from tor_log_analyzer.auth_config import AuthConfig, DEFAULT_AUTH, auth_from_dict
+from tor_log_analyzer.auth_config import AuthConfig, DEFAULT_AUTH, auth_pool_from_dict
 from tor_log_analyzer.color_config import ColorConfig, DEFAULT_COLORS, colors_from_dict_or_defaults
 from tor_log_analyzer.event_config import EventConfig, DEFAULT_EVENT, event_from_dict_or_defaults
+from tor_log_analyzer.render_config import RenderProfile, FINAL_PROFILE, render_profile_from_name
+
+if TYPE_CHECKING:
+    from tor_log_analyzer.cache_store import CacheBackend
+
+# The supported outputs: PNG charts, a static HTML dashboard or both
+OUTPUT_MODES = ["images", "dashboard", "both"]
+
+# The intermediate files written to the cache folder: none, the per-user and
+# per-subreddit summaries, or additionally every "done" of the log
+ARTIFACT_LEVELS = ["none", "summary", "full"]
 
 
 class Config:
     def __init__(self, input_file: str, output_dir: str, top_count: int,
-                 no_cache: bool, force_cache: bool,
-                 auth: AuthConfig, colors: ColorConfig, event: EventConfig):
+                 no_cache: bool, force_cache: bool, jobs: int,
+                 render_profile: RenderProfile, auth: Union[AuthConfig, List[AuthConfig]],
+                 colors: ColorConfig, event: EventConfig,
+                 batch: Optional[List[EventConfig]] = None, output_mode: str = "images",
+                 only: Optional[List[str]] = None, skip: Optional[List[str]] = None,
+                 profile: bool = False, cache_max_size: Optional[int] = None,
+                 artifacts: str = "summary", cache_backend: Optional["CacheBackend"] = None,
+                 serve: bool = False, port: int = 8000, prefetch: bool = False,
+                 prefetch_share: float = 0.5, approximate_user_chars: bool = False,
+                 heavy_hitters: Optional[int] = None):
+        if output_mode not in OUTPUT_MODES:
+            raise RuntimeError(
+                f"Unknown output mode '{output_mode}', use one of: {', '.join(OUTPUT_MODES)}.")
+        if artifacts not in ARTIFACT_LEVELS:
+            raise RuntimeError(
+                f"Unknown artifact level '{artifacts}', use one of: {', '.join(ARTIFACT_LEVELS)}.")
+        if cache_max_size is not None and cache_max_size <= 0:
+            raise RuntimeError(
+                f"The cache max size must be a positive number of MB, not {cache_max_size}.")
+        if heavy_hitters is not None and heavy_hitters <= 0:
+            raise RuntimeError(
+                f"The number of heavy hitters to track must be positive, not {heavy_hitters}.")
+        if not 0 < prefetch_share <= 1:
+            raise RuntimeError(
+                f"The prefetch share must be between 0 and 1, not {prefetch_share}.")
+
         self._input_file = input_file
         self._output_dir = output_dir
         self._top_count = top_count
         self._no_cache = no_cache
         self._force_cache = force_cache
-        self._auth = auth
+        self._jobs = jobs
+        self._render_profile = render_profile
+        self._output_mode = output_mode
+        self._only = only
+        self._skip = skip if skip is not None else []
+        self._profile = profile
+        self._cache_max_size = cache_max_size
+        self._artifacts = artifacts
+        self._cache_backend = cache_backend
+        self._serve = serve
+        self._port = port
+        self._prefetch = prefetch
+        self._prefetch_share = prefetch_share
+        self._approximate_user_chars = approximate_user_chars
+        self._heavy_hitters = heavy_hitters
+        self._auths = auth if isinstance(auth, list) else [auth]
         self._colors = colors
         self._event = event
+        self._batch = batch if batch is not None else []
 
     @property
     def input_file(self) -> str:
@@ -46,9 +97,106 @@ class Config:
     def force_cache(self) -> bool:
         return self._force_cache
 
+    @property
+    def jobs(self) -> int:
+        "The number of processes to use for parallel work."
+        return self._jobs
+
+    @property
+    def render_profile(self) -> RenderProfile:
+        "The quality profile to render the charts with."
+        return self._render_profile
+
+    @property
+    def output_mode(self) -> str:
+        "Whether to generate the PNG charts, the HTML dashboard or both."
+        return self._output_mode
+
+    @property
+    def renders_images(self) -> bool:
+        return self._output_mode in ["images", "both"]
+
+    @property
+    def renders_dashboard(self) -> bool:
+        return self._output_mode in ["dashboard", "both"]
+
+    @property
+    def only(self) -> Optional[List[str]]:
+        "The stages to run, together with the stages they depend on. None runs all stages."
+        return self._only
+
+    @property
+    def skip(self) -> List[str]:
+        "The stages not to run, together with the stages depending on them."
+        return self._skip
+
+    @property
+    def profile(self) -> bool:
+        "Whether to record the time and memory of every stage in profile.json."
+        return self._profile
+
+    @property
+    def cache_max_size(self) -> Optional[int]:
+        "The size in MB the caches in the output folder may take up. None doesn't limit it."
+        return self._cache_max_size
+
+    @property
+    def artifacts(self) -> str:
+        "Which intermediate files to write to the cache folder."
+        return self._artifacts
+
+    @property
+    def writes_summary_artifacts(self) -> bool:
+        return self._artifacts in ["summary", "full"]
+
+    @property
+    def writes_full_artifacts(self) -> bool:
+        return self._artifacts == "full"
+
+    @property
+    def cache_backend(self) -> Optional["CacheBackend"]:
+        "Where to keep the cache, None uses the cache folder."
+        return self._cache_backend
+
+    @property
+    def serve(self) -> bool:
+        "Whether to keep running and serve the stats over HTTP, following the log."
+        return self._serve
+
+    @property
+    def port(self) -> int:
+        "The local port to serve the stats on."
+        return self._port
+
+    @property
+    def prefetch(self) -> bool:
+        "Whether to keep running and fetch the transcriptions of new \"done\"s into the cache."
+        return self._prefetch
+
+    @property
+    def prefetch_share(self) -> float:
+        "The share of the Reddit API budget that prefetching may use."
+        return self._prefetch_share
+
+    @property
+    def approximate_user_chars(self) -> bool:
+        "Whether to estimate the median transcription lengths with a sketch, for very large logs."
+        return self._approximate_user_chars
+
+    @property
+    def heavy_hitters(self) -> Optional[int]:
+        "How many of the most active users and subreddits to track in bounded memory. None doesn't track them."
+        return self._heavy_hitters
+
     @property
     def auth(self) -> AuthConfig:
-        return self._auth
+        "The credentials of the first Reddit app."
+        return self._auths[0]
+
+    @property
+    def auths(self) -> List[AuthConfig]:
+        "The credentials of all Reddit apps to spread the requests across."
+        return self._auths
 
     @property
     def colors(self) -> ColorConfig:
@@ -58,6 +206,11 @@ class Config:
     def event(self) -> EventConfig:
         return self._event
 
+    @property
+    def batch(self) -> List[EventConfig]:
+        "The events to analyze together in one batch run."
+        return self._batch
+
     def to_dict(self) -> Dict:
         return {
             "input-file": self.input_file,
@@ -65,9 +218,24 @@ class Config:
             "top-count": self.top_count,
             "no-cache": self.no_cache,
             "force-cache": self.force_cache,
+            "jobs": self.jobs,
+            "render-profile": self.render_profile.name,
+            "output-mode": self.output_mode,
+            "only": self.only,
+            "skip": self.skip,
+            "profile": self.profile,
+            "cache-max-size": self.cache_max_size,
+            "artifacts": self.artifacts,
+            "serve": self.serve,
+            "port": self.port,
+            "prefetch": self.prefetch,
+            "prefetch-share": self.prefetch_share,
+            "approximate-user-chars": self.approximate_user_chars,
+            "heavy-hitters": self.heavy_hitters,
             "colors": self.colors.to_dict(),
-            "auth": self.auth.to_dict(),
+            "auth": self.auth.to_dict() if len(self.auths) == 1 else [auth.to_dict() for auth in self.auths],
             "event": self.event.to_dict(),
+            "batch": [event.to_dict() for event in self.batch],
         }
 
 
@@ -77,13 +245,15 @@ DEFAULT_CONFIG = Config(
     top_count=10,
     no_cache=False,
     force_cache=False,
+    jobs=1,
+    render_profile=FINAL_PROFILE,
     auth=DEFAULT_AUTH,
     colors=DEFAULT_COLORS,
     event=DEFAULT_EVENT,
 )
 
 
-def config_from_dict(config: Dict) -> Config:
+def config_from_dict(config: Dict, cache_backend: Optional["CacheBackend"] = None) -> Config:
     """
     Creates a configuration based on the values in a dictionary.
     """
@@ -93,17 +263,66 @@ def config_from_dict(config: Dict) -> Config:
         top_count=config["top-count"],
         no_cache=config["no-cache"],
         force_cache=config["force-cache"],
-        auth=auth_from_dict(config["auth"]),
+        jobs=config["jobs"],
+        render_profile=render_profile_from_name(config["render-profile"]),
+        auth=auth_pool_from_dict(config["auth"]),
         colors=colors_from_dict_or_defaults(config["colors"]),
         event=event_from_dict_or_defaults(config["event"]),
+        batch=[event_from_dict_or_defaults(event) for event in config["batch"]],
+        output_mode=config["output-mode"],
+        only=config["only"],
+        skip=config["skip"],
+        profile=config["profile"],
+        cache_max_size=config["cache-max-size"],
+        artifacts=config["artifacts"],
+        cache_backend=cache_backend,
+        serve=config["serve"],
+        port=config["port"],
+        prefetch=config["prefetch"],
+        prefetch_share=config["prefetch-share"],
+        approximate_user_chars=config["approximate-user-chars"],
+        heavy_hitters=config["heavy-hitters"],
     )
 
 
-def config_from_dict_or_defaults(config: Dict) -> Config:
+def config_from_dict_or_defaults(config: Dict, cache_backend: Optional["CacheBackend"] = None) -> Config:
     """
     Creates a configuration based on the values in a dictionary,
     or uses the defaults if some are missing.
     """
     default_dict = DEFAULT_CONFIG.to_dict()
     cleaned_config = clean_dict(config)
-    return config_from_dict({**default_dict, **cleaned_config})
+    return config_from_dict({**default_dict, **cleaned_config}, cache_backend)
+
+
+def config_for_event(config: Config, event: EventConfig, output_dir: str,
+                     jobs: Optional[int] = None) -> Config:
+    """
+    Creates a copy of the configuration for another event and output folder.
+    The copy keeps its cache in the new output folder.
+    """
+    return Config(
+        input_file=config.input_file,
+        output_dir=output_dir,
+        top_count=config.top_count,
+        no_cache=config.no_cache,
+        force_cache=config.force_cache,
+        jobs=jobs if jobs is not None else config.jobs,
+        render_profile=config.render_profile,
+        auth=config.auths,
+        colors=config.colors,
+        event=event,
+        output_mode=config.output_mode,
+        only=config.only,
+        skip=config.skip,
+        profile=config.profile,
+        cache_max_size=config.cache_max_size,
+        artifacts=config.artifacts,
+        cache_backend=config.cache_backend,
+        serve=config.serve,
+        port=config.port,
+        prefetch=config.prefetch,
+        prefetch_share=config.prefetch_share,
+        approximate_user_chars=config.approximate_user_chars,
+        heavy_hitters=config.heavy_hitters,
+    )
@@ -0,0 +1,123 @@
+"""
+A static HTML dashboard that draws the charts in the browser.
+"""
+from typing import Dict, Hashable, Iterable, List, Tuple
+from os import path
+import json
+import numpy as np
+
+from tor_log_analyzer.transcription import Transcription
+from tor_log_analyzer.config import Config
+from tor_log_analyzer.aggregation import Aggregates
+from tor_log_analyzer.data.rollup_data import RollupData
+from tor_log_analyzer.ranking import top_k
+from tor_log_analyzer.downsampling import lttb
+from tor_log_analyzer.chart_data import general_stats, history_series
+
+# The maximum number of points of the history line, the browser can zoom in
+DASHBOARD_HISTORY_POINTS = 2000
+
+TEMPLATE_FILE = path.join(path.dirname(__file__), "dashboard_template.html")
+# The placeholder in the template that is replaced with the dashboard data
+DATA_PLACEHOLDER = "/*DASHBOARD_DATA*/null"
+
+
+def _epoch_millis(times: np.ndarray) -> List[int]:
+    return times.astype("datetime64[ms]").astype(np.int64).tolist()
+
+
+def ranking_dict(entries: Iterable[Tuple[Hashable, int]], k: int, rest_label: str = None) -> Dict:
+    """
+    The top k entries, sorted descending, with the aggregated rest.
+    """
+    ranking = top_k(entries, k)
+    rest = None
+    if rest_label is not None and ranking.has_rest:
+        rest = [rest_label, ranking.rest_total]
+
+    return {
+        "entries": [[label, value] for label, value in ranking.top],
+        "rest": rest,
+    }
+
+
+def dashboard_data(config: Config, aggregates: Aggregates, transcription_data: List[Transcription],
+                   rollups: Dict[str, RollupData]) -> Dict:
+    """
+    The data behind all charts of the dashboard.
+    """
+    top_count = config.top_count
+
+    dates, counts = history_series(config, transcription_data)
+    indexes = lttb(dates.astype(np.int64), counts, DASHBOARD_HISTORY_POINTS)
+
+    hourly = rollups["hour"].dense()
+
+    user_gamma = aggregates.user_gamma
+    user_chars = aggregates.user_chars
+    sub_gamma = aggregates.sub_gamma
+    post_types = aggregates.post_types
+    post_formats = aggregates.post_formats
+
+    count_length = [[user_chars[username].median, user_gamma[username]]
+                    for username in user_chars if username in user_gamma]
+
+    return {
+        "title": f"{config.event.name} in Numbers" if config.event.name is not None else "General Stats",
+        "event": config.event.to_dict(),
+        "colors": config.colors.to_dict(),
+        "top-count": top_count,
+        "general": [[label, value] for label, value in general_stats(aggregates, transcription_data).items()],
+        "history": {
+            "times": _epoch_millis(dates[indexes]),
+            "counts": counts[indexes].tolist(),
+        },
+        "throughput": {
+            "resolution": hourly.resolution,
+            "starts": _epoch_millis(hourly.starts),
+            "counts": hourly.counts.tolist(),
+        },
+        "users": ranking_dict(
+            ((f"u/{username}", user_gamma[username]) for username in user_gamma),
+            top_count, "Other Volunteers"),
+        "subreddits": ranking_dict(
+            ((f"r/{sub}", sub_gamma[sub]) for sub in sub_gamma),
+            top_count, "Other Subreddits"),
+        "types": ranking_dict(
+            ((f"{t_type}", post_types[t_type]) for t_type in post_types),
+            top_count, "Other Types"),
+        "formats": ranking_dict(
+            ((f"{t_format}", post_formats[t_format]) for t_format in post_formats),
+            top_count, "Other Formats"),
+        "lengths": ranking_dict(
+            ((f"u/{username}", user_chars[username].maximum) for username in user_chars),
+            top_count),
+        "count-length": count_length,
+    }
+
+
+def render_dashboard_html(data: Dict) -> str:
+    """
+    The self-contained dashboard page with the data embedded.
+    """
+    with open(TEMPLATE_FILE, encoding="utf8") as f:
+        template = f.read()
+
+    # Don't let the data close the script tag
+    embedded = json.dumps(data, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+    return template.replace(DATA_PLACEHOLDER, embedded)
+
+
+def write_dashboard(config: Config, aggregates: Aggregates, transcription_data: List[Transcription],
+                    rollups: Dict[str, RollupData]):
+    """
+    Writes dashboard.json and the static dashboard.html to the output folder.
+    """
+    data = dashboard_data(config, aggregates, transcription_data, rollups)
+
+    with open(f"{config.output_dir}/dashboard.json", "w", encoding="utf8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        f.write("\n")
+
+    with open(f"{config.output_dir}/dashboard.html", "w", encoding="utf8") as f:
+        f.write(render_dashboard_html(data))
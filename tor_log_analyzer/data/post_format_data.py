@@ -0,0 +1,29 @@
+from typing import Dict, Optional
+
+
+class PostFormatData():
+    def __init__(self, data: Optional[Dict] = None):
+        self._data = data if data is not None else {}
+    
+    def __iter__(self):
+        return self._data.__iter__()
+
+    def __getitem__(self, post_format: str) -> int:
+        return self._data[post_format] if post_format in self._data else 0
+
+    def __setitem__(self, post_format: str, count: str):
+        self._data[post_format] = count
+    
+    def __len__(self):
+        return len(self._data)
+
+    def merge(self, other: "PostFormatData") -> "PostFormatData":
+        """
+        Adds the counts of the other data to this data.
+        """
+        for key in other:
+            self[key] += other[key]
+        return self
+
+    def to_dict(self) -> Dict:
+        return self._data
@@ -17,5 +17,13 @@ class PostTypeData():
     def __len__(self):
         return len(self._data)
 
+    def merge(self, other: "PostTypeData") -> "PostTypeData":
+        """
+        Adds the counts of the other data to this data.
+        """
+        for key in other:
+            self[key] += other[key]
+        return self
+
     def to_dict(self) -> Dict:
         return self._data
@@ -0,0 +1,87 @@
+from typing import Dict, Optional
+import math
+
+
+class QuantileSketch():
+    """
+    An approximate quantile sketch with a fixed relative accuracy.
+
+    The values are counted in logarithmically sized buckets, so the memory
+    only grows with the range of the values, not with their number.
+    Every quantile is within the relative accuracy of an actual value.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, buckets: Optional[Dict[int, int]] = None,
+                 zero_count: int = 0):
+        self._relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: Dict[int, int] = buckets if buckets is not None else {}
+        # Values that are zero or smaller can't be put in a logarithmic bucket
+        self._zero_count = zero_count
+        self._count = zero_count + sum(self._buckets.values())
+
+    @property
+    def relative_accuracy(self) -> float:
+        return self._relative_accuracy
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def add(self, value: float):
+        if value <= 0:
+            self._zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+        self._count += 1
+
+    def merge(self, other: "QuantileSketch"):
+        """
+        Adds all values of the other sketch to this sketch.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same accuracy can be merged.")
+
+        for index, count in other._buckets.items():
+            self._buckets[index] = self._buckets.get(index, 0) + count
+        self._zero_count += other._zero_count
+        self._count += other.count
+
+    def value_at_rank(self, rank: int) -> float:
+        """
+        The approximate value at the given (zero-based) rank of the sorted values.
+        """
+        if rank < 0 or rank >= self._count:
+            raise IndexError("Rank out of range.")
+
+        if rank < self._zero_count:
+            return 0
+
+        seen = self._zero_count
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen > rank:
+                return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        """
+        The approximate q-quantile of the values, with q between 0 and 1.
+        """
+        return self.value_at_rank(int(q * (self._count - 1)))
+
+    def to_dict(self) -> Dict:
+        return {
+            "relative-accuracy": self.relative_accuracy,
+            "zero-count": self._zero_count,
+            "buckets": dict([(str(index), count) for index, count in self._buckets.items()]),
+        }
+
+
+def quantile_sketch_from_dict(sketch: Dict) -> QuantileSketch:
+    return QuantileSketch(
+        relative_accuracy=sketch["relative-accuracy"],
+        buckets=dict([(int(index), count) for index, count in sketch["buckets"].items()]),
+        zero_count=sketch["zero-count"],
+    )
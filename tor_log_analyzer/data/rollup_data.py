@@ -0,0 +1,135 @@
+from typing import Dict
+import numpy as np
+
+from tor_log_analyzer.data.transcription_table import TranscriptionTable
+
+# The NumPy datetime units of the supported rollup resolutions
+RESOLUTIONS = {
+    "minute": "m",
+    "hour": "h",
+}
+
+
+class RollupData():
+    """
+    The transcriptions binned into time buckets.
+
+    Only buckets with at least one transcription are stored.
+    """
+
+    def __init__(self, resolution: str, starts: np.ndarray, counts: np.ndarray,
+                 characters: np.ndarray, active_users: np.ndarray):
+        self._resolution = resolution
+        self._starts = starts
+        self._counts = counts
+        self._characters = characters
+        self._active_users = active_users
+
+    def __len__(self):
+        return len(self._starts)
+
+    @property
+    def resolution(self) -> str:
+        return self._resolution
+
+    @property
+    def unit(self) -> str:
+        "The NumPy datetime unit of the buckets."
+        return RESOLUTIONS[self._resolution]
+
+    @property
+    def starts(self) -> np.ndarray:
+        "The start time of every bucket."
+        return self._starts
+
+    @property
+    def counts(self) -> np.ndarray:
+        "The number of transcriptions in every bucket."
+        return self._counts
+
+    @property
+    def characters(self) -> np.ndarray:
+        "The number of characters typed in every bucket."
+        return self._characters
+
+    @property
+    def active_users(self) -> np.ndarray:
+        "The number of different transcribers in every bucket."
+        return self._active_users
+
+    def dense(self) -> "RollupData":
+        """
+        The rollup with the empty buckets between the first and the last bucket filled in.
+        """
+        if len(self) == 0:
+            return self
+
+        starts = np.arange(self._starts[0], self._starts[-1] + 1,
+                           dtype=f"datetime64[{self.unit}]")
+        indexes = (self._starts - self._starts[0]).astype(np.int64)
+
+        def fill(values: np.ndarray) -> np.ndarray:
+            filled = np.zeros(len(starts), dtype=values.dtype)
+            filled[indexes] = values
+            return filled
+
+        return RollupData(self._resolution, starts, fill(self._counts),
+                          fill(self._characters), fill(self._active_users))
+
+    def replaced(self, patch: "RollupData") -> "RollupData":
+        """
+        The rollup with all buckets in the time range of the patch replaced by the patch.
+        """
+        if len(patch) == 0:
+            return self
+
+        keep_before = self._starts < patch.starts[0]
+        keep_after = self._starts > patch.starts[-1]
+
+        def join(values: np.ndarray, patch_values: np.ndarray) -> np.ndarray:
+            return np.concatenate([values[keep_before], patch_values, values[keep_after]])
+
+        return RollupData(self._resolution, join(self._starts, patch.starts),
+                          join(self._counts, patch.counts), join(self._characters, patch.characters),
+                          join(self._active_users, patch.active_users))
+
+    def to_dict(self) -> Dict:
+        return {
+            "resolution": self.resolution,
+            "starts": [str(start) for start in self._starts],
+            "counts": self._counts.tolist(),
+            "characters": self._characters.tolist(),
+            "active-users": self._active_users.tolist(),
+        }
+
+
+def rollup_from_table(table: TranscriptionTable, resolution: str = "hour") -> RollupData:
+    """
+    Bins the transcriptions of the table into buckets of the given resolution.
+    """
+    buckets = table.times.astype(f"datetime64[{RESOLUTIONS[resolution]}]")
+    starts, bucket_indexes = np.unique(buckets, return_inverse=True)
+    bucket_indexes = bucket_indexes.reshape(-1)
+
+    counts = np.bincount(bucket_indexes, minlength=len(starts))
+    characters = np.zeros(len(starts), dtype=np.int64)
+    np.add.at(characters, bucket_indexes, table.characters)
+
+    # Count every user only once per bucket
+    user_codes = table.codes("username").astype(np.int64)
+    pairs = np.unique(bucket_indexes.astype(np.int64) * (len(table.categories("username")) + 1) + user_codes)
+    active_users = np.bincount(pairs // (len(table.categories("username")) + 1),
+                               minlength=len(starts))
+
+    return RollupData(resolution, starts, counts, characters, active_users)
+
+
+def rollup_from_dict(rollup: Dict) -> RollupData:
+    unit = RESOLUTIONS[rollup["resolution"]]
+    return RollupData(
+        resolution=rollup["resolution"],
+        starts=np.array(rollup["starts"], dtype=f"datetime64[{unit}]"),
+        counts=np.array(rollup["counts"], dtype=np.int64),
+        characters=np.array(rollup["characters"], dtype=np.int64),
+        active_users=np.array(rollup["active-users"], dtype=np.int64),
+    )
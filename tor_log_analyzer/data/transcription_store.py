@@ -0,0 +1,120 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+import bisect
+
+from tor_log_analyzer.transcription import Transcription
+
+
+def _window_bounds(times: List[datetime], start: Optional[datetime], end: Optional[datetime]) -> Tuple[int, int]:
+    """
+    The index range of the times strictly between start and end.
+    """
+    low = bisect.bisect_right(times, start) if start is not None else 0
+    high = bisect.bisect_left(times, end) if end is not None else len(times)
+    return low, max(low, high)
+
+
+class _TimeIndex():
+    """
+    The transcriptions of every key, sorted by time.
+    """
+
+    def __init__(self):
+        self._times: Dict[str, List[datetime]] = {}
+        self._transcriptions: Dict[str, List[Transcription]] = {}
+
+    def keys(self) -> List[str]:
+        return list(self._times)
+
+    def add(self, key: str, transcription: Transcription):
+        if key not in self._times:
+            self._times[key] = []
+            self._transcriptions[key] = []
+
+        times = self._times[key]
+        # Transcriptions are mostly added in order, so this is usually an append
+        position = bisect.bisect_right(times, transcription.time)
+        times.insert(position, transcription.time)
+        self._transcriptions[key].insert(position, transcription)
+
+    def window(self, key: str, start: Optional[datetime], end: Optional[datetime]) -> List[Transcription]:
+        if key not in self._times:
+            return []
+        low, high = _window_bounds(self._times[key], start, end)
+        return self._transcriptions[key][low:high]
+
+
+class TranscriptionStore():
+    """
+    The transcriptions sorted by time, with indexes by user and subreddit.
+
+    Time windows are found with binary search, so all queries run in
+    logarithmic time plus the size of their result.
+    """
+
+    def __init__(self, transcriptions: Iterable[Transcription] = ()):
+        self._transcriptions: List[Transcription] = []
+        self._times: List[datetime] = []
+        self._by_user = _TimeIndex()
+        self._by_subreddit = _TimeIndex()
+
+        for transcription in sorted(transcriptions, key=lambda tr: tr.time):
+            self.add(transcription)
+
+    def __len__(self):
+        return len(self._transcriptions)
+
+    def __iter__(self):
+        return self._transcriptions.__iter__()
+
+    def __getitem__(self, index):
+        return self._transcriptions[index]
+
+    @property
+    def times(self) -> List[datetime]:
+        "The sorted times of all transcriptions."
+        return self._times
+
+    def users(self) -> List[str]:
+        return self._by_user.keys()
+
+    def subreddits(self) -> List[str]:
+        return self._by_subreddit.keys()
+
+    def add(self, transcription: Transcription):
+        """
+        Adds a transcription, keeping the store sorted by time.
+        """
+        position = bisect.bisect_right(self._times, transcription.time)
+        self._times.insert(position, transcription.time)
+        self._transcriptions.insert(position, transcription)
+        self._by_user.add(transcription.username, transcription)
+        self._by_subreddit.add(transcription.subreddit, transcription)
+
+    def window(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> "TranscriptionStore":
+        """
+        A new store with the transcriptions strictly between start and end.
+        """
+        low, high = _window_bounds(self._times, start, end)
+        return TranscriptionStore(self._transcriptions[low:high])
+
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Transcription]:
+        """
+        The transcriptions strictly between start and end.
+        """
+        low, high = _window_bounds(self._times, start, end)
+        return self._transcriptions[low:high]
+
+    def by_user(self, username: str, start: Optional[datetime] = None,
+                end: Optional[datetime] = None) -> List[Transcription]:
+        """
+        The transcriptions of the user strictly between start and end.
+        """
+        return self._by_user.window(username, start, end)
+
+    def by_subreddit(self, subreddit: str, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None) -> List[Transcription]:
+        """
+        The transcriptions on the subreddit strictly between start and end.
+        """
+        return self._by_subreddit.window(subreddit, start, end)
@@ -0,0 +1,165 @@
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+from datetime import datetime
+import numpy as np
+
+from tor_log_analyzer.transcription import Transcription
+
+
+def encode_categories(values: Iterable[Hashable]) -> Tuple[np.ndarray, List]:
+    """
+    Encodes the values as integer codes.
+    Returns the codes and the category for every code.
+    """
+    index = {}
+    codes = np.fromiter((index.setdefault(value, len(index))
+                         for value in values), dtype=np.int32)
+    return codes, list(index)
+
+
+class TranscriptionTable():
+    """
+    A columnar view of transcriptions.
+
+    The users, subreddits, types and formats are stored as categorical codes,
+    which allows vectorized group-by operations on them.
+    """
+    CATEGORICAL_COLUMNS = ["username", "subreddit", "t_type", "t_format"]
+
+    def __init__(self, times: np.ndarray, characters: np.ndarray, words: np.ndarray,
+                 codes: Dict[str, np.ndarray], categories: Dict[str, List]):
+        self._times = times
+        self._characters = characters
+        self._words = words
+        self._codes = codes
+        self._categories = categories
+
+    def __len__(self):
+        return len(self._times)
+
+    @property
+    def times(self) -> np.ndarray:
+        "The times of the transcriptions as datetime64 array."
+        return self._times
+
+    @property
+    def characters(self) -> np.ndarray:
+        return self._characters
+
+    @property
+    def words(self) -> np.ndarray:
+        return self._words
+
+    def codes(self, column: str) -> np.ndarray:
+        "The categorical codes of the given column."
+        return self._codes[column]
+
+    def categories(self, column: str) -> List:
+        "The category of every code of the given column."
+        return self._categories[column]
+
+    def _values(self, values) -> np.ndarray:
+        if isinstance(values, str):
+            return getattr(self, values)
+        return np.asarray(values)
+
+    def _to_dict(self, column: str, result: np.ndarray, counts: np.ndarray) -> Dict:
+        categories = self.categories(column)
+        return dict([(categories[code], result[code].item())
+                     for code in np.flatnonzero(counts)])
+
+    def group_count(self, column: str) -> Dict:
+        """
+        Counts the transcriptions per category of the column.
+        """
+        counts = np.bincount(self.codes(column), minlength=len(self.categories(column)))
+        return self._to_dict(column, counts, counts)
+
+    def group_sum(self, column: str, values) -> Dict:
+        """
+        Sums up the values (a column name or an array) per category of the column.
+        """
+        codes = self.codes(column)
+        values = self._values(values)
+        size = len(self.categories(column))
+        sums = np.zeros(size, dtype=values.dtype)
+        np.add.at(sums, codes, values)
+        return self._to_dict(column, sums, np.bincount(codes, minlength=size))
+
+    def group_max(self, column: str, values) -> Dict:
+        """
+        The maximum of the values (a column name or an array) per category of the column.
+        """
+        codes = self.codes(column)
+        values = self._values(values)
+        size = len(self.categories(column))
+        maxima = np.full(size, np.iinfo(values.dtype).min, dtype=values.dtype)
+        np.maximum.at(maxima, codes, values)
+        return self._to_dict(column, maxima, np.bincount(codes, minlength=size))
+
+    def group_sorted(self, column: str, values) -> Dict[Hashable, np.ndarray]:
+        """
+        The sorted values (a column name or an array) per category of the column.
+        """
+        codes = self.codes(column)
+        values = self._values(values)
+        order = np.lexsort((values, codes))
+        counts = np.bincount(codes, minlength=len(self.categories(column)))
+        groups = np.split(values[order], np.cumsum(counts)[:-1])
+        categories = self.categories(column)
+        return dict([(categories[code], groups[code]) for code in np.flatnonzero(counts)])
+
+    def group_median(self, column: str, values) -> Dict:
+        """
+        The high median of the values (a column name or an array) per category of the column.
+        """
+        codes = self.codes(column)
+        values = self._values(values)
+        order = np.lexsort((values, codes))
+        counts = np.bincount(codes, minlength=len(self.categories(column)))
+        starts = np.cumsum(counts) - counts
+        medians = np.zeros(len(counts), dtype=values.dtype)
+        present = counts > 0
+        medians[present] = values[order][starts[present] + counts[present] // 2]
+        return self._to_dict(column, medians, counts)
+
+    def select(self, mask: np.ndarray) -> "TranscriptionTable":
+        """
+        A new table with only the rows of the boolean mask.
+        The categories are shared with this table.
+        """
+        return TranscriptionTable(
+            times=self._times[mask],
+            characters=self._characters[mask],
+            words=self._words[mask],
+            codes=dict([(column, codes[mask]) for column, codes in self._codes.items()]),
+            categories=self._categories,
+        )
+
+    def window(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> "TranscriptionTable":
+        """
+        A new table with only the transcriptions strictly between start and end.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self._times > np.datetime64(start, "us")
+        if end is not None:
+            mask &= self._times < np.datetime64(end, "us")
+        return self.select(mask)
+
+
+def transcription_table_from_transcriptions(transcriptions: List[Transcription]) -> TranscriptionTable:
+    codes = {}
+    categories = {}
+    for column in TranscriptionTable.CATEGORICAL_COLUMNS:
+        codes[column], categories[column] = encode_categories(
+            getattr(tr, column) for tr in transcriptions)
+
+    return TranscriptionTable(
+        times=np.array([tr.time for tr in transcriptions], dtype="datetime64[us]"),
+        characters=np.fromiter((tr.characters for tr in transcriptions),
+                               dtype=np.int64, count=len(transcriptions)),
+        words=np.fromiter((tr.words for tr in transcriptions),
+                          dtype=np.int64, count=len(transcriptions)),
+        codes=codes,
+        categories=categories,
+    )
@@ -1,47 +1,149 @@
 from typing import Dict, Optional, List
+import heapq
 import statistics
 
+from tor_log_analyzer.data.quantile_sketch import QuantileSketch, quantile_sketch_from_dict
+
 
 class UserCharEntry():
-    def __init__(self, char_count_list: List[int] = None):
-        self._char_count_list = char_count_list if char_count_list is not None else []
+    """
+    The transcription lengths of a single user.
+
+    The statistics are updated in place for every added length.
+    The exact median is kept with two heaps. For very large volumes,
+    an approximate entry uses a quantile sketch instead.
+    """
+
+    def __init__(self, char_count_list: List[int] = None, approximate: bool = False):
+        self._count = 0
+        self._total = 0
+        self._maximum = None
+        self._approximate = approximate
+        # The lower half of the values as max-heap (negated values)
+        self._lower: List[int] = []
+        # The upper half of the values as min-heap, with the median on top
+        self._upper: List[int] = []
+        self._sketch = QuantileSketch() if approximate else None
+
+        for char_count in char_count_list if char_count_list is not None else []:
+            self.add(char_count)
+
+    @property
+    def approximate(self) -> bool:
+        return self._approximate
 
     @property
     def char_count_list(self) -> List[int]:
-        return self._char_count_list
+        """
+        The sorted transcription lengths. Not available for approximate entries.
+        """
+        if self.approximate:
+            raise ValueError("Approximate entries don't keep the individual lengths.")
+        return sorted(-value for value in self._lower) + sorted(self._upper)
+
+    @property
+    def count(self) -> int:
+        return self._count
 
     @property
     def total(self) -> int:
-        return sum(self.char_count_list)
+        return self._total
 
     @property
     def maximum(self) -> int:
-        return max(self.char_count_list)
+        if self._count == 0:
+            raise ValueError("maximum of an empty entry")
+        return self._maximum
 
     @property
     def median(self) -> int:
-        return statistics.median_high(self.char_count_list)
+        """
+        The high median of the transcription lengths.
+        """
+        if self._count == 0:
+            raise statistics.StatisticsError("no median for empty data")
+        if self.approximate:
+            return round(self._sketch.value_at_rank(self._count // 2))
+        return self._upper[0]
 
     @property
     def mean(self) -> float:
-        return statistics.mean(self.char_count_list)
+        if self._count == 0:
+            raise statistics.StatisticsError("mean requires at least one data point")
+        # Keep integer means as integers, like statistics.mean
+        if self._total % self._count == 0:
+            return self._total // self._count
+        return self._total / self._count
 
-    def __add__(self, other):
+    def add(self, char_count: int):
+        """
+        Adds a single transcription length to the entry.
+        """
+        self._count += 1
+        self._total += char_count
+        if self._maximum is None or char_count > self._maximum:
+            self._maximum = char_count
+
+        if self.approximate:
+            self._sketch.add(char_count)
+            return
+
+        if self._upper and char_count < self._upper[0]:
+            heapq.heappush(self._lower, -char_count)
+        else:
+            heapq.heappush(self._upper, char_count)
+
+        # Rebalance, the upper half may contain at most one more value
+        if len(self._lower) > len(self._upper):
+            heapq.heappush(self._upper, -heapq.heappop(self._lower))
+        elif len(self._upper) > len(self._lower) + 1:
+            heapq.heappush(self._lower, -heapq.heappop(self._upper))
+
+    def copy(self) -> "UserCharEntry":
+        entry = UserCharEntry(approximate=self.approximate)
+        entry += self
+        return entry
+
+    def __iadd__(self, other):
         if isinstance(other, UserCharEntry):
-            return UserCharEntry(
-                self.char_count_list + other.char_count_list
-            )
+            if self.approximate and other.approximate:
+                self._count += other._count
+                self._total += other._total
+                if other._maximum is not None and (self._maximum is None or other._maximum > self._maximum):
+                    self._maximum = other._maximum
+                self._sketch.merge(other._sketch)
+            else:
+                for char_count in other.char_count_list:
+                    self.add(char_count)
         elif isinstance(other, list):
-            return UserCharEntry(
-                self.char_count_list + other
-            )
+            for char_count in other:
+                self.add(char_count)
         elif isinstance(other, int):
-            return UserCharEntry(
-                self.char_count_list + [other]
-            )
+            self.add(other)
         else:
             raise TypeError(
                 "Argument must be a UserCharEntry, a List of integers or an integer.")
+        return self
+
+    def __add__(self, other):
+        entry = self.copy()
+        entry += other
+        return entry
+
+    def state_dict(self) -> Dict:
+        """
+        The full state of the entry, from which it can be restored.
+        """
+        if self.approximate:
+            return {
+                "count": self._count,
+                "total": self._total,
+                "maximum": self._maximum,
+                "sketch": self._sketch.to_dict(),
+            }
+        return {
+            "lengths": self.char_count_list,
+        }
 
     def to_dict(self) -> Dict:
         return {
@@ -52,19 +154,78 @@ class UserCharEntry():
         }
 
 
+def user_char_entry_from_sorted(char_counts: List[int]) -> UserCharEntry:
+    """
+    Creates an exact entry from already sorted transcription lengths, in linear time.
+    """
+    entry = UserCharEntry()
+    if len(char_counts) == 0:
+        return entry
+
+    middle = len(char_counts) // 2
+    # A sorted list already is a valid heap
+    entry._lower = [-char_count for char_count in reversed(char_counts[:middle])]
+    entry._upper = list(char_counts[middle:])
+    entry._count = len(char_counts)
+    entry._total = sum(char_counts)
+    entry._maximum = char_counts[-1]
+    return entry
+
+
+def user_char_entry_from_state_dict(state: Dict) -> UserCharEntry:
+    if "lengths" in state:
+        return user_char_entry_from_sorted(state["lengths"])
+
+    entry = UserCharEntry(approximate=True)
+    entry._count = state["count"]
+    entry._total = state["total"]
+    entry._maximum = state["maximum"]
+    entry._sketch = quantile_sketch_from_dict(state["sketch"])
+    return entry
+
+
 class UserCharData():
-    def __init__(self, data: Optional[Dict] = None):
+    def __init__(self, data: Optional[Dict] = None, approximate: bool = False):
         self._data = data if data is not None else {}
+        self._approximate = approximate
 
     def __iter__(self):
         return self._data.__iter__()
 
-    def __getitem__(self, username: str) -> int:
-        return self._data[username] if username in self._data else UserCharEntry()
+    def __getitem__(self, username: str) -> UserCharEntry:
+        return self._data[username] if username in self._data else UserCharEntry(approximate=self._approximate)
 
     def __setitem__(self, username: str, char_entry: UserCharEntry):
         self._data[username] = char_entry
 
+    def __len__(self):
+        return len(self._data)
+
+    def merge(self, other: "UserCharData") -> "UserCharData":
+        """
+        Adds the transcription lengths of the other data to this data.
+        """
+        for username in other:
+            if username in self._data:
+                self._data[username] += other[username]
+            else:
+                self._data[username] = other[username].copy()
+        return self
+
+    def state_dict(self) -> Dict:
+        """
+        The full state of the data, from which it can be restored.
+        """
+        return dict([(key, self._data[key].state_dict())
+                     for key in self._data])
+
     def to_dict(self) -> Dict:
         return dict([(key, self._data[key].to_dict())
                      for key in self._data])
+
+
+def user_char_data_from_state_dict(state: Dict) -> UserCharData:
+    entries = dict([(username, user_char_entry_from_state_dict(entry_state))
+                    for username, entry_state in state.items()])
+    approximate = any(entry.approximate for entry in entries.values())
+    return UserCharData(entries, approximate=approximate)
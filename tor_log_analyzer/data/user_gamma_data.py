@@ -17,5 +17,13 @@ class UserGammaData():
     def __len__(self):
         return len(self._data)
 
+    def merge(self, other: "UserGammaData") -> "UserGammaData":
+        """
+        Adds the counts of the other data to this data.
+        """
+        for key in other:
+            self[key] += other[key]
+        return self
+
     def to_dict(self) -> Dict:
         return self._data
@@ -1,20 +1,47 @@
-from typing import List
-from datetime import timedelta
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+import bisect
+import hashlib
 import json
-from dateutil import parser
 import click
+import numpy as np
 
 from tor_log_analyzer.data.sub_gamma_data import SubGammaData
 from tor_log_analyzer.data.user_char_data import UserCharData
 from tor_log_analyzer.data.user_gamma_data import UserGammaData
 from tor_log_analyzer.data.post_type_data import PostTypeData
+from tor_log_analyzer.data.post_format_data import PostFormatData
 from tor_log_analyzer.data.done_data import DoneData
+from tor_log_analyzer.data.rollup_data import RollupData, RESOLUTIONS, rollup_from_dict, rollup_from_table
 from tor_log_analyzer.config import Config
+from tor_log_analyzer.aggregation import Aggregates, Aggregator, BUILTIN_AGGREGATORS, HeavyHitterAggregator, UserCharAggregator, aggregate, aggregate_table, aggregates_from_state_dict, registered_aggregators
+from tor_log_analyzer.data.transcription_table import transcription_table_from_transcriptions
+from tor_log_analyzer.data.transcription_store import TranscriptionStore
 from tor_log_analyzer.transcription import Transcription, transcription_from_comment, transcription_from_dict
-from tor_log_analyzer.reddit.reddit_api import RedditAPI
+from tor_log_analyzer.profiling import measure
+from tor_log_analyzer.cache_store import cache_store, dump_json_array
+
+if TYPE_CHECKING:
+    from tor_log_analyzer.ranking import SpaceSaving
+    from tor_log_analyzer.reddit.telemetry import FetchTelemetry
+
+# From this many transcriptions on, the statistics are computed on a columnar table
+TABLE_AGGREGATION_THRESHOLD = 50000
+
+# The version of the cached aggregate state, increase on incompatible changes
+AGGREGATE_STATE_VERSION = 2
+
+# The version of the cached rollups, increase on incompatible changes
+ROLLUP_STATE_VERSION = 1
+
+# Save the fetched transcriptions after this many requests to Reddit,
+# so that an interrupted run doesn't need to fetch them again
+TRANSCRIPTION_CHECKPOINT_INTERVAL = 50
 
 
 def done_line_to_dict(line: str) -> DoneData:
+    from dateutil import parser
+
     tokens = line.split(" ")
 
     # Extract the timestamp
@@ -28,19 +55,21 @@ def done_line_to_dict(line: str) -> DoneData:
     return DoneData(time, post_id, username)
 
 
-def process_lines(config: Config, lines: List[str]) -> List[DoneData]:
-    # Only consider "done"-ed posts
-    done_lines = [
-        l for l in lines if "process_done" in l and "Moderator override" not in l]
+def process_lines(config: Config, lines: List[str], write_artifacts: bool = True) -> List[DoneData]:
+    with measure("parse.scan_lines") as profile:
+        # Only consider "done"-ed posts
+        done_lines = [
+            l for l in lines if "process_done" in l and "Moderator override" not in l]
+        profile.count("lines", len(lines))
+        profile.count("done-lines", len(done_lines))
 
-    with open(f"{config.cache_dir}/done.log", "w") as f:
-        f.write("\n".join(done_lines))
+    with measure("parse.parse_dones") as profile:
+        dones = [done_line_to_dict(line) for line in done_lines]
+        profile.count("dones", len(dones))
 
-    dones = [done_line_to_dict(line) for line in done_lines]
-
-    with open(f"{config.cache_dir}/done.json", "w") as f:
-        dumps = json.dumps([done.to_dict() for done in dones], indent=2)
-        f.write(dumps + "\n")
+    if write_artifacts and config.writes_full_artifacts:
+        with measure("parse.write_artifacts"):
+            write_done_artifacts(config, done_lines, dones)
 
     # Filter dones outside the time frame
     if config.event.start:
@@ -54,118 +83,426 @@ def process_lines(config: Config, lines: List[str]) -> List[DoneData]:
     return dones
 
 
-def process_transcription_data(config: Config, dones: List[DoneData]) -> List[Transcription]:
-    transcriptions = {}
+def write_transcription_cache(config: Config, transcriptions: Dict[str, Dict]):
+    with measure("fetch.write_cache") as profile:
+        cache_store(config).write_json("transcriptions.json", transcriptions,
+                                       ensure_ascii=False, indent=2)
+        profile.count("written", len(transcriptions))
+
+
+def merge_transcription_cache(config: Config, transcriptions: Dict[str, Dict]):
+    """
+    Adds the transcriptions to the cache, keeping the ones already in it.
+    """
+    with measure("fetch.merge_cache"):
+        cached = cache_store(config).read_json("transcriptions.json") or {}
+    write_transcription_cache(config, {**cached, **transcriptions})
+
+
+def write_done_artifacts(config: Config, done_lines: List[str], dones: List[DoneData]):
+    """
+    Writes the "done" lines of the log and the parsed "done"s to the cache folder.
+    """
+    cache = cache_store(config)
+    with cache.open("done.log") as f:
+        for i, line in enumerate(done_lines):
+            f.write(line if i == 0 else "\n" + line)
+
+    with cache.open("done.json") as f:
+        dump_json_array((done.to_dict() for done in dones), f, indent=2)
+        f.write("\n")
+
+
+def load_transcription_cache(config: Config) -> Dict[str, Dict]:
+    """
+    The cached transcriptions by post id, unless the cache is disabled.
+    """
     cache = {}
     if config.force_cache or not config.no_cache:
-        with open(f"{config.cache_dir}/transcriptions.json", encoding='utf8') as f:
-            try:
-                cache = json.load(f)
-            except json.JSONDecodeError:
-                cache = {}
-
-    reddit_api = RedditAPI(config)
-    with click.progressbar(dones, label="  Fetching transcriptions: ") as pbar:
+        with measure("fetch.load_cache") as profile:
+            cache = cache_store(config).read_json("transcriptions.json") or {}
+            profile.count("cached", len(cache))
+        if config.force_cache and len(cache) == 0:
+            click.echo("  No cached transcriptions found.")
+    return cache
+
+
+def fetch_transcriptions(config: Config, dones: List[DoneData], cache: Dict[str, Dict]) -> Dict[str, Transcription]:
+    """
+    The transcriptions of the "done"s by post id, from the cache or from Reddit.
+    """
+    transcriptions = {}
+    # Only connect to Reddit if a transcription is missing in the cache
+    reddit_api = None
+    fetched = 0
+    with measure("fetch.transcriptions") as fetch_profile, \
+            click.progressbar(dones, label="  Fetching transcriptions: ") as pbar:
         for done in pbar:
             # Try to get from cache
             if done.post_id in cache:
                 transcriptions[done.post_id] = transcription_from_dict(
                     cache[done.post_id])
+                fetch_profile.count("from-cache")
             # Get transcription from Reddit
             elif not config.force_cache:
-                transcription_comment = reddit_api.get_transcription(
-                    done.post_id, done.username)
+                if reddit_api is None:
+                    from tor_log_analyzer.reddit.reddit_api import RedditAPI
+                    reddit_api = RedditAPI(config)
+                with measure("fetch.reddit"):
+                    transcription_comment = reddit_api.get_transcription(
+                        done.post_id, done.username)
+                fetch_profile.count("not-found" if transcription_comment is None else "from-reddit")
                 if transcription_comment is None:
                     continue
                 transcriptions[done.post_id] = transcription_from_comment(
                     transcription_comment)
-
-            with open(f"{config.cache_dir}/transcriptions.json", "w", encoding='utf8') as f:
-                json.dump(dict([(key, transcriptions[key].to_dict())
-                                for key in transcriptions]), f, ensure_ascii=False, indent=2)
-
-    # Sort by time
-    transcription_list = [transcriptions[key] for key in transcriptions]
-    transcription_list.sort(key=lambda tr: tr.time)
-
-    # Filter transcriptions outside the time frame
-    if config.event.start:
-        transcription_list = [
-            tr for tr in transcription_list if tr.time > config.event.start]
-    if config.event.end:
-        transcription_list = [
-            tr for tr in transcription_list if tr.time < config.event.end]
-
-    return transcription_list
-
-
-def process_user_gamma_data(config: Config, transcriptions: List[Transcription]) -> UserGammaData:
-    user_gamma_data = UserGammaData()
-
-    for transcription in transcriptions:
-        user_gamma_data[transcription.username] += 1
-
-    with open(f"{config.cache_dir}/user_gamma.json", "w") as f:
-        dumps = json.dumps(user_gamma_data.to_dict(), indent=2)
-        f.write(dumps + "\n")
+                fetched += 1
+                if fetched % TRANSCRIPTION_CHECKPOINT_INTERVAL == 0:
+                    # Keep the previously cached transcriptions that weren't reached yet
+                    write_transcription_cache(config, {**cache, **dict(
+                        [(key, transcriptions[key].to_dict()) for key in transcriptions])})
+
+    if reddit_api is not None:
+        write_fetch_telemetry(config, reddit_api.telemetry)
+    return transcriptions
+
+
+def write_fetch_telemetry(config: Config, telemetry: "FetchTelemetry"):
+    """
+    Prints the summary of the requests to Reddit and writes the report to fetch_telemetry.json.
+    """
+    click.echo("  Requests to Reddit:")
+    for line in telemetry.summary():
+        click.echo(f"    {line}")
+    cache_store(config).write_json("fetch_telemetry.json", telemetry.to_dict(), indent=2)
+
+
+def process_transcription_data(config: Config, dones: List[DoneData]) -> TranscriptionStore:
+    transcriptions = fetch_transcriptions(config, dones, load_transcription_cache(config))
+    # Keep the transcriptions of other runs using the cache, e.g. of a prefetch
+    merge_transcription_cache(config, dict([(key, transcriptions[key].to_dict())
+                                            for key in transcriptions]))
+
+    with measure("fetch.index") as profile:
+        # Sort by time and filter transcriptions outside the time frame
+        store = TranscriptionStore(transcriptions.values())
+        window = store.window(config.event.start, config.event.end)
+        profile.count("transcriptions", len(window))
+    return window
+
+
+def transcriptions_fingerprint(transcriptions: List[Transcription]) -> str:
+    """
+    A hash identifying the given set of transcriptions, independent of their order.
+    """
+    ids = "\n".join(sorted(tr.id for tr in transcriptions))
+    return hashlib.sha1(ids.encode("utf8")).hexdigest()
+
+
+def transcriptions_watermark(transcriptions: List[Transcription]) -> Dict:
+    """
+    Identifies the sorted transcriptions included in a cached result.
+    """
+    return {
+        "timestamp": transcriptions[-1].timestamp,
+        "count": len(transcriptions),
+        "fingerprint": transcriptions_fingerprint(transcriptions),
+    }
+
+
+def included_by_watermark(watermark: Dict, transcriptions: List[Transcription]) -> Optional[int]:
+    """
+    The number of sorted transcriptions up to the watermark,
+    or None if any of them changed since the watermark was taken.
+    """
+    from dateutil import parser
+
+    timestamp = parser.parse(watermark["timestamp"])
+    times = transcriptions.times if isinstance(transcriptions, TranscriptionStore) else [
+        tr.time for tr in transcriptions]
+    included = bisect.bisect_right(times, timestamp)
+    # A removed and an added transcription keep the count, but not the fingerprint
+    if included != watermark["count"] or \
+            transcriptions_fingerprint(transcriptions[:included]) != watermark.get("fingerprint"):
+        return None
+    return included
+
+
+def rollup_patches(transcriptions: List[Transcription],
+                   new_transcriptions: List[Transcription]) -> Dict[str, RollupData]:
+    """
+    The rollup buckets touched by the new transcriptions, with all of their transcriptions.
+    The other transcriptions are sorted by time and don't include the new ones.
+    """
+    times = transcriptions.times if isinstance(transcriptions, TranscriptionStore) else [
+        tr.time for tr in transcriptions]
+    patches = {}
+    for resolution, unit in RESOLUTIONS.items():
+        buckets = np.array([tr.time for tr in new_transcriptions], dtype=f"datetime64[{unit}]")
+        first = buckets.min().astype("datetime64[us]").astype(datetime)
+        end = (buckets.max() + 1).astype("datetime64[us]").astype(datetime)
+        in_buckets = transcriptions[bisect.bisect_left(times, first):bisect.bisect_left(times, end)]
+        table = transcription_table_from_transcriptions(list(in_buckets) + list(new_transcriptions))
+        patches[resolution] = rollup_from_table(table, resolution)
+    return patches
+
+
+def load_rollups(config: Config, transcriptions: List[Transcription]) -> Tuple[Optional[Dict[str, RollupData]], int]:
+    """
+    Loads the cached rollups of a previous run.
+    Returns the rollups and the number of transcriptions they include,
+    or None if they can't be used for the given transcriptions.
+    """
+    cache = cache_store(config).read_json("rollups.json")
+    if cache is None or cache.get("version") != ROLLUP_STATE_VERSION or cache.get("watermark") is None:
+        return None, 0
+
+    included = included_by_watermark(cache["watermark"], transcriptions)
+    if included is None:
+        return None, 0
+
+    return dict([(resolution, rollup_from_dict(rollup))
+                 for resolution, rollup in cache["rollups"].items()]), included
+
+
+def process_rollup_data(config: Config, transcriptions: List[Transcription]) -> Dict[str, RollupData]:
+    """
+    Bins the transcriptions into time buckets of every resolution.
+
+    The rollups are cached with a watermark like the aggregates, so that a re-run
+    only rebuilds the buckets touched by the transcriptions after the watermark.
+    """
+    rollups, included = None, 0
+    if not config.no_cache:
+        with measure("rollup.load_state") as profile:
+            rollups, included = load_rollups(config, transcriptions)
+            profile.count("included", included)
+
+    new_transcriptions = transcriptions[included:]
+    if rollups is None:
+        with measure("rollup.build") as profile:
+            table = transcription_table_from_transcriptions(transcriptions)
+            rollups = dict([(resolution, rollup_from_table(table, resolution))
+                            for resolution in RESOLUTIONS])
+            profile.count("transcriptions", len(transcriptions))
+    elif len(new_transcriptions) > 0:
+        with measure("rollup.patch") as profile:
+            patches = rollup_patches(transcriptions[:included], new_transcriptions)
+            rollups = dict([(resolution, rollup.replaced(patches[resolution]))
+                            for resolution, rollup in rollups.items()])
+            profile.count("transcriptions", len(new_transcriptions))
+
+    cache_store(config).write_json("rollups.json", {
+        "version": ROLLUP_STATE_VERSION,
+        "watermark": transcriptions_watermark(transcriptions) if len(transcriptions) > 0 else None,
+        "rollups": dict([(resolution, rollup.to_dict()) for resolution, rollup in rollups.items()]),
+    })
+
+    return rollups
+
+
+def write_json_artifact(config: Config, name: str, data: Dict):
+    with cache_store(config).open(name) as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def write_list_artifact(config: Config, name: str, lines: List[str]):
+    with cache_store(config).open(name) as f:
+        for line in lines:
+            f.write(line + "\n")
+        if len(lines) == 0:
+            f.write("\n")
+
+
+def write_user_gamma_data(config: Config, user_gamma_data: UserGammaData):
+    write_json_artifact(config, "user_gamma.json", user_gamma_data.to_dict())
 
     user_list = [(username, user_gamma_data[username])
                  for username in user_gamma_data]
     # Sort alphabetically
     user_list.sort(key=lambda e: e[0].lower())
-    user_list_str = "\n".join(
-        [f"- u\/{user}: {gamma}" for user, gamma in user_list])
-
-    with open(f"{config.cache_dir}/user_list.txt", "w") as f:
-        f.write(user_list_str + "\n")
-
-    return user_gamma_data
-
-
-def process_user_char_data(config: Config, transcriptions: List[Transcription]) -> UserCharData:
-    user_char_data = UserCharData()
-
-    for transcription in transcriptions:
-        user_char_data[transcription.username] += transcription.characters
-
-    with open(f"{config.cache_dir}/user_chars.json", "w") as f:
-        dumps = json.dumps(user_char_data.to_dict(), indent=2)
-        f.write(dumps + "\n")
-
-    return user_char_data
+    write_list_artifact(config, "user_list.txt",
+                        [f"- u\/{user}: {gamma}" for user, gamma in user_list])
 
 
-def process_sub_gamma_data(config: Config, transcriptions: List[Transcription]) -> SubGammaData:
-    sub_gamma_data = SubGammaData()
+def write_user_char_data(config: Config, user_char_data: UserCharData):
+    write_json_artifact(config, "user_chars.json", user_char_data.to_dict())
 
-    for tr in transcriptions:
-        sub_gamma_data[tr.subreddit] += 1
 
-    with open(f"{config.cache_dir}/sub_gamma.json", "w") as f:
-        dumps = json.dumps(sub_gamma_data.to_dict(), indent=2)
-        f.write(dumps + "\n")
+def write_sub_gamma_data(config: Config, sub_gamma_data: SubGammaData):
+    write_json_artifact(config, "sub_gamma.json", sub_gamma_data.to_dict())
 
     sub_list = [(subreddit, sub_gamma_data[subreddit])
                 for subreddit in sub_gamma_data]
     # Sort alphabetically
     sub_list.sort(key=lambda e: e[0].lower())
-    sub_list_str = "\n".join(
-        [f"- r\/{sub}: {gamma}" for sub, gamma in sub_list])
+    write_list_artifact(config, "sub_list.txt",
+                        [f"- r\/{sub}: {gamma}" for sub, gamma in sub_list])
+
+
+def write_post_type_data(config: Config, type_data: PostTypeData):
+    write_json_artifact(config, "post_types.json", type_data.to_dict())
+
+
+def write_post_format_data(config: Config, format_data: PostFormatData):
+    write_json_artifact(config, "post_formats.json", format_data.to_dict())
+
+
+def load_aggregate_state(config: Config, transcriptions: List[Transcription]) -> Tuple[Optional[Aggregates], int]:
+    """
+    Loads the cached aggregates of a previous run.
+    Returns the aggregates and the number of transcriptions they include,
+    or None if they can't be used for the given transcriptions.
+    """
+    state = cache_store(config).read_json("aggregates.json")
+    if state is None:
+        return None, 0
+
+    if state.get("version") != AGGREGATE_STATE_VERSION or state.get("event") != config.event.to_dict():
+        return None, 0
+    # Exact and approximate lengths can't be combined
+    if state.get("approximate-user-chars", False) != config.approximate_user_chars:
+        return None, 0
+
+    # The aggregates include all transcriptions up to the watermark
+    included = included_by_watermark(state["watermark"], transcriptions)
+    if included is None:
+        # Transcriptions before the watermark changed, the state is outdated
+        return None, 0
+
+    return aggregates_from_state_dict(state["aggregates"]), included
+
+
+def save_aggregate_state(config: Config, transcriptions: List[Transcription], aggregates: Aggregates):
+    if len(transcriptions) == 0:
+        return
+
+    state = {
+        "version": AGGREGATE_STATE_VERSION,
+        "event": config.event.to_dict(),
+        "approximate-user-chars": config.approximate_user_chars,
+        "watermark": transcriptions_watermark(transcriptions),
+        "aggregates": aggregates.state_dict(),
+    }
+
+    cache_store(config).write_json("aggregates.json", state)
+
+
+def write_heavy_hitters(config: Config, name: str, summary: "SpaceSaving"):
+    """
+    Writes the tracked keys, most frequent first, with their estimated counts.
+    """
+    ranking = summary.top_k(len(summary))
+    write_json_artifact(config, name, {
+        "total": summary.total,
+        "entries": [{"name": key, "count": count, "error": summary.error(key)}
+                    for key, count in ranking.top],
+    })
+
+
+def aggregator_factories(config: Config) -> Dict[str, Callable[[], Aggregator]]:
+    """
+    The aggregators that the configuration changes from the registered ones.
+    """
+    factories = {}
+    if config.approximate_user_chars:
+        factories["user_chars"] = lambda: UserCharAggregator(approximate=True)
+    if config.heavy_hitters is not None:
+        factories["top_users"] = lambda: HeavyHitterAggregator(lambda tr: tr.username, config.heavy_hitters)
+        factories["top_subreddits"] = lambda: HeavyHitterAggregator(lambda tr: tr.subreddit, config.heavy_hitters)
+    return factories
+
+
+def process_aggregates(config: Config, transcriptions: List[Transcription]) -> Aggregates:
+    """
+    Computes all registered statistics in a single pass over the transcriptions.
+    Large amounts of transcriptions are aggregated on a columnar table instead.
+
+    The built-in aggregates are cached, so that a re-run only needs to add
+    the transcriptions after the watermark of the previous run.
+    """
+    factories = aggregator_factories(config)
+    incremental = not config.no_cache and all(
+        name in BUILTIN_AGGREGATORS for name in registered_aggregators() + list(factories))
+
+    aggregates, included = None, 0
+    if incremental:
+        with measure("aggregate.load_state") as profile:
+            aggregates, included = load_aggregate_state(config, transcriptions)
+            profile.count("included", included)
+
+    new_transcriptions = transcriptions[included:]
+    if len(new_transcriptions) >= TABLE_AGGREGATION_THRESHOLD:
+        with measure("aggregate.table") as profile:
+            table = transcription_table_from_transcriptions(new_transcriptions)
+            new_aggregates = aggregate_table(table, new_transcriptions,
+                                             approximate_user_chars=config.approximate_user_chars,
+                                             factories=factories)
+            profile.count("transcriptions", len(new_transcriptions))
+    else:
+        with measure("aggregate.single_pass") as profile:
+            new_aggregates = aggregate(new_transcriptions, factories=factories)
+            profile.count("transcriptions", len(new_transcriptions))
+
+    if aggregates is not None:
+        with measure("aggregate.merge"):
+            aggregates = aggregates.merge(new_aggregates)
+    else:
+        aggregates = new_aggregates
+
+    if incremental:
+        with measure("aggregate.save_state"):
+            save_aggregate_state(config, transcriptions, aggregates)
+
+    if config.writes_summary_artifacts:
+        with measure("aggregate.write.user_gamma") as profile:
+            write_user_gamma_data(config, aggregates.user_gamma)
+            profile.count("users", len(aggregates.user_gamma))
+        with measure("aggregate.write.user_chars") as profile:
+            write_user_char_data(config, aggregates.user_chars)
+            profile.count("users", len(aggregates.user_chars))
+        with measure("aggregate.write.sub_gamma") as profile:
+            write_sub_gamma_data(config, aggregates.sub_gamma)
+            profile.count("subreddits", len(aggregates.sub_gamma))
+        with measure("aggregate.write.post_types") as profile:
+            write_post_type_data(config, aggregates.post_types)
+            profile.count("types", len(aggregates.post_types))
+        with measure("aggregate.write.post_formats") as profile:
+            write_post_format_data(config, aggregates.post_formats)
+            profile.count("formats", len(aggregates.post_formats))
+        for name in ["top_users", "top_subreddits"]:
+            if name in aggregates:
+                with measure(f"aggregate.write.{name}") as profile:
+                    write_heavy_hitters(config, f"{name}.json", aggregates[name])
+                    profile.count("tracked", len(aggregates[name]))
+
+    return aggregates
 
-    with open(f"{config.cache_dir}/sub_list.txt", "w") as f:
-        f.write(sub_list_str + "\n")
 
-    return sub_gamma_data
+def process_user_gamma_data(config: Config, transcriptions: List[Transcription]) -> UserGammaData:
+    user_gamma_data = aggregate(transcriptions, ["user_gamma"]).user_gamma
+    if config.writes_summary_artifacts:
+        write_user_gamma_data(config, user_gamma_data)
+    return user_gamma_data
 
 
-def process_post_type_data(config: Config, transcriptions: List[Transcription]) -> PostTypeData:
-    type_data = PostTypeData()
+def process_user_char_data(config: Config, transcriptions: List[Transcription]) -> UserCharData:
+    user_char_data = aggregate(transcriptions, ["user_chars"], aggregator_factories(config)).user_chars
+    if config.writes_summary_artifacts:
+        write_user_char_data(config, user_char_data)
+    return user_char_data
+
 
-    for tr in transcriptions:
-        type_data[tr.t_type] += 1
+def process_sub_gamma_data(config: Config, transcriptions: List[Transcription]) -> SubGammaData:
+    sub_gamma_data = aggregate(transcriptions, ["sub_gamma"]).sub_gamma
+    if config.writes_summary_artifacts:
+        write_sub_gamma_data(config, sub_gamma_data)
+    return sub_gamma_data
 
-    with open(f"{config.cache_dir}/post_types.json", "w") as f:
-        dumps = json.dumps(type_data.to_dict(), indent=2)
-        f.write(dumps + "\n")
 
+def process_post_type_data(config: Config, transcriptions: List[Transcription]) -> PostTypeData:
+    type_data = aggregate(transcriptions, ["post_types"]).post_types
+    if config.writes_summary_artifacts:
+        write_post_type_data(config, type_data)
     return type_data
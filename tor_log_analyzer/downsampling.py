@@ -0,0 +1,55 @@
+"""
+Downsampling of line chart series.
+"""
+import numpy as np
+
+# The number of points to keep per horizontal pixel of the plot area
+POINTS_PER_PIXEL = 2
+
+
+def point_budget(figure_width: float, dpi: float, axes_width: float = 1.0) -> int:
+    """
+    The number of points that can be visibly distinguished in a line plot.
+    The figure width is in inches, the axes width relative to the figure.
+    """
+    return max(int(figure_width * dpi * axes_width * POINTS_PER_PIXEL), 3)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Downsamples the series with the Largest-Triangle-Three-Buckets algorithm.
+
+    Returns the indexes of the points to keep, in ascending order.
+    The first and the last point are always kept.
+    """
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return np.arange(length)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # The first and the last point get their own bucket
+    edges = np.linspace(1, length - 1, threshold - 1).astype(np.int64)
+
+    indexes = np.zeros(threshold, dtype=np.int64)
+    indexes[-1] = length - 1
+    selected = 0
+
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+
+        # The average of the next bucket is the third point of the triangle
+        next_start = end
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else length
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Pick the point that forms the largest triangle with the previous point and the average
+        prev_x, prev_y = x[selected], y[selected]
+        areas = np.abs((prev_x - avg_x) * (y[start:end] - prev_y)
+                       - (prev_x - x[start:end]) * (avg_y - prev_y))
+        selected = start + int(np.argmax(areas))
+        indexes[bucket + 1] = selected
+
+    return indexes
@@ -1,6 +1,5 @@
 from typing import Dict, Optional
 from datetime import datetime
-from dateutil import parser
 
 from tor_log_analyzer.util import clean_dict
 
@@ -57,9 +56,11 @@ def event_from_dict(config: Dict) -> EventConfig:
     """
     Creates an event configuration based on the values in a dictionary.
     """
+    from dateutil import parser
+
     # Convert times
-    start = parser.parse(config["start"]) if "start" in config else None
-    end = parser.parse(config["end"]) if "end" in config else None
+    start = parser.parse(config["start"]) if config.get("start") is not None else None
+    end = parser.parse(config["end"]) if config.get("end") is not None else None
 
     return EventConfig(
         name=config["name"],
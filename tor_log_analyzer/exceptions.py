@@ -1,7 +1,10 @@
-from praw.models import Submission
-from praw.models import Comment
+from typing import TYPE_CHECKING
 from tor_log_analyzer.data.done_data import DoneData
 
+if TYPE_CHECKING:
+    from praw.models import Submission
+    from praw.models import Comment
+
 
 class SubmissionNotFoundException(RuntimeError):
     "The submission could not be found for the given 'done'."
@@ -14,7 +17,7 @@ class SubmissionNotFoundException(RuntimeError):
 class TranscriptionNotFoundException(RuntimeError):
     "The transcription could not be found for the given submission."
 
-    def __init__(self, submission: Submission):
+    def __init__(self, submission: "Submission"):
         super().__init__()
         self.submission = submission
 
@@ -22,6 +25,6 @@ class TranscriptionNotFoundException(RuntimeError):
 class TranscriptionFormatException(RuntimeError):
     "The transcription has broken formatting."
 
-    def __init__(self, comment: Comment):
+    def __init__(self, comment: "Comment"):
         super().__init__()
         self.comment = comment
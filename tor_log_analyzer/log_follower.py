@@ -0,0 +1,38 @@
+from typing import List
+from os import path
+
+
+class LogFollower():
+    """
+    Reads the lines appended to a log since the last read.
+    """
+
+    def __init__(self, input_file: str):
+        self._input_file = input_file
+        self._offset = 0
+
+    @property
+    def offset(self) -> int:
+        "The number of bytes of the log that have been read."
+        return self._offset
+
+    def truncated(self) -> bool:
+        """
+        Whether the log got shorter since the last read, e.g. because it was rotated.
+        The next read then starts at the beginning again.
+        """
+        if path.getsize(self._input_file) < self._offset:
+            self._offset = 0
+            return True
+        return False
+
+    def read_new_lines(self) -> List[str]:
+        "The complete lines appended to the log since the last read."
+        with open(self._input_file, "rb") as f:
+            f.seek(self._offset)
+            content = f.read()
+
+        # A line that is still being written is read with the next call
+        end = content.rfind(b"\n") + 1
+        self._offset += end
+        return content[:end].decode("utf8", errors="replace").splitlines()
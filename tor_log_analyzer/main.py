@@ -1,47 +1,61 @@
+from typing import Dict, List
+from concurrent.futures import ProcessPoolExecutor
 from os import makedirs
-import matplotlib.pyplot as plt
+import json
+import re
 import time
 import click
 
-from tor_log_analyzer.config import Config
-from tor_log_analyzer.data_processors import process_lines, process_sub_gamma_data, process_transcription_data, process_user_char_data, process_user_gamma_data, process_post_type_data
-from tor_log_analyzer.stat_generators import generate_format_stats, generate_history, generate_sub_stats, generate_type_stats, generate_user_count_length_stats, generate_user_gamma_stats, generate_user_max_length_stats, generate_general_stats
+from tor_log_analyzer import __version__
+from tor_log_analyzer.config import Config, config_for_event
+from tor_log_analyzer.pipeline import Pipeline, Stage
+from tor_log_analyzer.cache_store import evict_caches
+from tor_log_analyzer.profiling import Profiler, measure, profile_summary, start_profiling, stop_profiling
+from tor_log_analyzer.data.done_data import DoneData
+from tor_log_analyzer.event_config import EventConfig
+from tor_log_analyzer.data.transcription_store import TranscriptionStore
+from tor_log_analyzer.data_processors import process_lines, process_transcription_data, process_aggregates, process_rollup_data
 
 
-def configure_plot_style(config: Config):
+def plot_style(config: Config) -> Dict:
     """
-    Configures the base style for all plots.
+    The matplotlib settings of the base style for all plots.
     """
-    # General
-    plt.rcParams['figure.autolayout'] = True
-    plt.rcParams['date.autoformatter.hour'] = "%H:%M"
-
     colors = config.colors
 
-    # Colors
-    plt.rcParams['figure.facecolor'] = colors.background
-    plt.rcParams['axes.facecolor'] = colors.background
-    plt.rcParams['axes.labelcolor'] = colors.text
-    plt.rcParams['axes.edgecolor'] = colors.line
-    plt.rcParams['text.color'] = colors.text
-    plt.rcParams['xtick.color'] = colors.line
-    plt.rcParams['xtick.labelcolor'] = colors.text
-    plt.rcParams['ytick.color'] = colors.line
-    plt.rcParams['ytick.labelcolor'] = colors.text
-    plt.rcParams['grid.color'] = colors.line
-    plt.rcParams['grid.alpha'] = 0.8
-    plt.rcParams["figure.dpi"] = 300.0
+    return {
+        # General
+        "figure.autolayout": config.render_profile.autolayout,
+        "date.autoformatter.hour": "%H:%M",
+        # Colors
+        "figure.facecolor": colors.background,
+        "axes.facecolor": colors.background,
+        "axes.labelcolor": colors.text,
+        "axes.edgecolor": colors.line,
+        "text.color": colors.text,
+        "xtick.color": colors.line,
+        "xtick.labelcolor": colors.text,
+        "ytick.color": colors.line,
+        "ytick.labelcolor": colors.text,
+        "grid.color": colors.line,
+        "grid.alpha": 0.8,
+        "figure.dpi": config.render_profile.dpi,
+    }
 
 
-def analyze_logs(config: Config):
+def configure_plot_style(config: Config):
     """
-    Analyze the logs with the given configuration.
+    Configures the base style for all plots.
     """
+    import matplotlib
 
-    start = time.time()
-    click.echo("Configuring data.")
+    matplotlib.rcParams.update(plot_style(config))
 
-    # Create all needed directories
+
+def create_directories(config: Config):
+    """
+    Creates all needed directories.
+    """
     try:
         makedirs(config.output_dir)
         makedirs(config.cache_dir)
@@ -49,46 +63,272 @@ def analyze_logs(config: Config):
     except OSError as _:
         pass
 
-    configure_plot_style(config)
+
+def read_dones(config: Config) -> List[DoneData]:
+    """
+    Reads the logs and extracts all "done"-ed posts.
+    """
+    with measure("parse.read_log") as profile:
+        with open(config.input_file) as f:
+            lines = f.read().splitlines()
+        profile.count("lines", len(lines))
+    return process_lines(config, lines)
+
+
+def chart_stages(config: Config) -> List[Stage]:
+    """
+    The stages rendering the PNG charts.
+    """
+    from tor_log_analyzer.stat_generators import generate_format_stats, generate_history, generate_sub_stats, generate_type_stats, generate_user_count_length_stats, generate_user_gamma_stats, generate_user_max_length_stats, generate_general_stats, generate_throughput_stats
+    from tor_log_analyzer.stat_generators import create_format_stats_figure, create_history_figure, create_sub_stats_figure, create_type_stats_figure, create_user_count_length_stats_figure, create_user_gamma_stats_figure, create_user_max_length_stats_figure, create_general_stats_figure, create_throughput_stats_figure
+
+    return [
+        Stage("general_stats", "Generating general stats", generate_general_stats,
+              inputs=["aggregate", "fetch"], outputs=["general_stats.png"], chart=True,
+              figure=create_general_stats_figure),
+        Stage("history", "Generating history chart", generate_history,
+              inputs=["fetch"], outputs=["history.png"], chart=True,
+              figure=create_history_figure),
+        Stage("throughput", "Generating throughput chart", generate_throughput_stats,
+              inputs=["rollup"], outputs=["throughput.png"], chart=True,
+              figure=create_throughput_stats_figure,
+              args=lambda config, rollups: (config, rollups["hour"])),
+        Stage("user_gamma", "Generating user transcription count chart", generate_user_gamma_stats,
+              inputs=["aggregate"], outputs=["user_gamma.png"], chart=True,
+              figure=create_user_gamma_stats_figure,
+              args=lambda config, aggregates: (config, aggregates.user_gamma)),
+        Stage("sub_gamma", "Generating subreddit transcription count chart", generate_sub_stats,
+              inputs=["aggregate"], outputs=["sub_gamma.png"], chart=True,
+              figure=create_sub_stats_figure,
+              args=lambda config, aggregates: (config, aggregates.sub_gamma)),
+        Stage("post_formats", "Generating transcription format chart", generate_format_stats,
+              inputs=["aggregate"], outputs=["post_formats.png"], chart=True,
+              figure=create_format_stats_figure,
+              args=lambda config, aggregates: (config, aggregates.post_formats)),
+        Stage("post_types", "Generating transcription type chart", generate_type_stats,
+              inputs=["aggregate"], outputs=["post_types.png"], chart=True,
+              figure=create_type_stats_figure,
+              args=lambda config, aggregates: (config, aggregates.post_types)),
+        Stage("user_max_length", "Generating transcription length chart", generate_user_max_length_stats,
+              inputs=["aggregate"], outputs=["user_max_length.png"], chart=True,
+              figure=create_user_max_length_stats_figure,
+              args=lambda config, aggregates: (config, aggregates.user_chars)),
+        Stage("user_count_length", "Generating transcription count vs. length chart", generate_user_count_length_stats,
+              inputs=["aggregate"], outputs=["user_count_length.png"], chart=True,
+              figure=create_user_count_length_stats_figure,
+              args=lambda config, aggregates: (config, aggregates.user_gamma, aggregates.user_chars)),
+    ]
+
+
+def data_stages(config: Config) -> List[Stage]:
+    """
+    The stages loading and processing the data, before any outputs are generated.
+    """
+    return [
+        Stage("parse", "Processing logs", read_dones,
+              outputs=["done.log", "done.json"]),
+        Stage("fetch", "Processing transcriptions", process_transcription_data,
+              inputs=["parse"], outputs=["transcriptions.json"]),
+        Stage("aggregate", "Processing users, subreddits and post types", process_aggregates,
+              inputs=["fetch"], outputs=["aggregates.json", "user_gamma.json", "user_chars.json",
+                                         "user_list.txt", "sub_gamma.json", "sub_list.txt",
+                                         "post_types.json", "post_formats.json"]),
+        Stage("rollup", "Processing time buckets", process_rollup_data,
+              inputs=["fetch"], outputs=["rollups.json"]),
+    ]
 
 
+def create_pipeline(config: Config) -> Pipeline:
+    """
+    The stages of the analysis: parse -> fetch -> aggregate -> each chart.
+    """
+    stages = data_stages(config)
+
+    if config.renders_dashboard:
+        from tor_log_analyzer.dashboard import write_dashboard
+
+        stages.append(Stage("dashboard", "Generating dashboard", write_dashboard,
+                            inputs=["aggregate", "fetch", "rollup"],
+                            outputs=["dashboard.json", "dashboard.html"]))
+
+    if config.renders_images:
+        stages += chart_stages(config)
+
+    return Pipeline(stages, process_initializer=configure_plot_style)
+
+
+def load_transcriptions(config: Config) -> TranscriptionStore:
+    """
+    Reads the logs and loads the transcriptions of all "done"-ed posts.
+    """
+    return create_pipeline(config).run(config, only=["fetch"])["fetch"]
+
+
+def generate_stats(config: Config, transcription_data: TranscriptionStore):
+    """
+    Aggregates the already loaded transcriptions and generates the selected stats.
+    """
+    create_pipeline(config).run(config, only=config.only, skip=config.skip,
+                                results={"fetch": transcription_data})
+
+
+def write_profile(config: Config, profiler: Profiler):
+    """
+    Prints the stage profiles and writes them to profile.json in the output folder.
+    """
+    click.echo("Profile:")
+    for line in profile_summary(profiler):
+        click.echo(f"  {line}")
+
+    report = {
+        "version": __version__,
+        "config": {
+            "input-file": config.input_file,
+            "jobs": config.jobs,
+            "no-cache": config.no_cache,
+            "force-cache": config.force_cache,
+            "render-profile": config.render_profile.name,
+            "output-mode": config.output_mode,
+        },
+        **profiler.to_dict(),
+    }
+    with open(f"{config.output_dir}/profile.json", "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+def limit_cache_size(config: Config, used_configs: List[Config]):
+    """
+    Evicts the least recently used event caches in the output folder
+    if they take up more than the configured size.
+    """
+    if config.cache_max_size is None:
+        return
+
+    evicted = evict_caches(config.output_dir, config.cache_max_size * 2**20,
+                           keep=[used_config.cache_dir for used_config in used_configs])
+    for usage in evicted:
+        name = (usage.event or {}).get("name") or usage.cache_dir
+        click.echo(f"Evicted the cache of {name} ({usage.size / 2**20:.1f} MB).")
+
+
+def analyze_logs(config: Config):
+    """
+    Analyze the logs with the given configuration.
+    """
+    if config.profile:
+        start_profiling()
+        try:
+            _analyze_logs(config)
+        finally:
+            profiler = stop_profiling()
+        write_profile(config, profiler)
+    else:
+        _analyze_logs(config)
+
+
+def _analyze_logs(config: Config):
+    if config.serve:
+        from tor_log_analyzer.server import serve
+
+        create_directories(config)
+        serve(config)
+        return
+
+    if config.prefetch:
+        from tor_log_analyzer.prefetch import prefetch
+
+        create_directories(config)
+        prefetch(config)
+        return
+
+    if len(config.batch) > 0:
+        analyze_batch(config)
+        return
+
+    start = time.time()
+    click.echo("Configuring data.")
+
+    create_directories(config)
+    if config.renders_images:
+        configure_plot_style(config)
+
     click.echo("Processing data:")
-    # Read the logs and process them
-    with open(config.input_file) as f:
-        lines = f.read().splitlines()
-        process_lines(config, lines)
-    # Process data
-    click.echo("  Processing logs.")
-    dones = process_lines(config, lines)
-    click.echo("  Processing transcriptions.")
-    transcription_data = process_transcription_data(config, dones)
-    click.echo("  Processing users.")
-    user_gamma_data = process_user_gamma_data(config, transcription_data)
-    user_char_data = process_user_char_data(config, transcription_data)
-    click.echo("  Processing post types.")
-    post_type_data = process_post_type_data(config, transcription_data)
-    click.echo("  Processing subreddits.")
-    sub_gamma_data = process_sub_gamma_data(config, transcription_data)
-
-    click.echo("Generating stats:")
-    # Generate stats
-    click.echo("  Generating general stats.")
-    generate_general_stats(config, user_gamma_data, sub_gamma_data, transcription_data, post_type_data)
-    click.echo("  Generating history chart.")
-    generate_history(config, transcription_data)
-    click.echo("  Generating user transcription count chart.")
-    generate_user_gamma_stats(config, user_gamma_data)
-    click.echo("  Generating subreddit transcription count chart.")
-    generate_sub_stats(config, sub_gamma_data)
-    click.echo("  Generating transcription format chart chart.")
-    generate_format_stats(config, transcription_data)
-    click.echo("  Generating transcription type chart.")
-    generate_type_stats(config, post_type_data)
-    click.echo("  Generating transcription length chart.")
-    generate_user_max_length_stats(config, user_char_data)
-    click.echo("  Generating transcription count vs. length chart.")
-    generate_user_count_length_stats(config, user_gamma_data, user_char_data)
+    create_pipeline(config).run(config, only=config.only, skip=config.skip)
+    limit_cache_size(config, [config])
 
     end = time.time()
     duration = int((end - start))
     click.echo(f"Done in {duration} s.")
+
+
+def batch_window(events: List[EventConfig]) -> EventConfig:
+    """
+    The time frame that includes all of the given events.
+    """
+    starts = [event.start for event in events]
+    ends = [event.end for event in events]
+
+    return EventConfig(
+        start=min(starts) if None not in starts else None,
+        end=max(ends) if None not in ends else None,
+    )
+
+
+def batch_output_dirs(config: Config) -> List[str]:
+    """
+    The output folder of every event in the batch, named after the event.
+    """
+    output_dirs = []
+
+    for i, event in enumerate(config.batch):
+        name = event.abrv or event.name or f"event-{i + 1}"
+        slug = re.sub(r"[^\w-]+", "-", name).strip("-").lower()
+        if slug in output_dirs:
+            slug = f"{slug}-{i + 1}"
+        output_dirs.append(slug)
+
+    return [f"{config.output_dir}/{output_dir}" for output_dir in output_dirs]
+
+
+def _generate_batch_stats(config: Config, transcription_data: TranscriptionStore):
+    create_directories(config)
+    if config.renders_images:
+        configure_plot_style(config)
+    generate_stats(config, transcription_data)
+
+
+def analyze_batch(config: Config):
+    """
+    Analyze the logs for every event of the batch.
+    The logs and transcriptions are only loaded once for all events.
+    """
+    start = time.time()
+    click.echo("Configuring data.")
+
+    # Load the data for the time frame of all events together
+    batch_config = config_for_event(config, batch_window(config.batch), config.output_dir)
+    create_directories(batch_config)
+
+    click.echo("Processing data:")
+    transcription_data = load_transcriptions(batch_config)
+
+    # The events are already processed in parallel, render their charts serially
+    event_jobs = 1
+    event_configs = [config_for_event(config, event, output_dir, event_jobs)
+                     for event, output_dir in zip(config.batch, batch_output_dirs(config))]
+    event_data = [transcription_data.window(event.start, event.end) for event in config.batch]
+
+    if config.jobs > 1:
+        with ProcessPoolExecutor(max_workers=config.jobs) as executor:
+            for _ in executor.map(_generate_batch_stats, event_configs, event_data):
+                pass
+    else:
+        for event_config, data in zip(event_configs, event_data):
+            _generate_batch_stats(event_config, data)
+
+    limit_cache_size(config, [batch_config, *event_configs])
+
+    end = time.time()
+    duration = int((end - start))
+    click.echo(f"Done with {len(config.batch)} events in {duration} s.")
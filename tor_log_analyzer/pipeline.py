@@ -0,0 +1,238 @@
+"""
+The analysis as a graph of named stages with declared inputs and outputs.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import click
+
+from tor_log_analyzer.config import Config
+from tor_log_analyzer.chart_cache import ChartCache, chart_hash
+from tor_log_analyzer.profiling import active_profiler, measure, run_profiled
+
+
+class Stage():
+    """
+    A step of the analysis.
+
+    The stage runs once the results of all its input stages are available.
+    By default, it is called with the configuration and those results,
+    an `args` function can select the arguments from them instead.
+    Charts can run in worker processes and are skipped if their inputs didn't change.
+    """
+
+    def __init__(self, name: str, description: str, run: Callable, inputs: Iterable[str] = (),
+                 outputs: Iterable[str] = (), args: Optional[Callable] = None, chart: bool = False,
+                 figure: Optional[Callable] = None):
+        self._name = name
+        self._description = description
+        self._run = run
+        self._inputs = list(inputs)
+        self._outputs = list(outputs)
+        self._args = args
+        self._chart = chart
+        self._figure = figure
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        "What the stage does, shown while it runs."
+        return self._description
+
+    @property
+    def run(self) -> Callable:
+        return self._run
+
+    @property
+    def inputs(self) -> List[str]:
+        "The names of the stages whose results are needed."
+        return self._inputs
+
+    @property
+    def outputs(self) -> List[str]:
+        "The files written by the stage."
+        return self._outputs
+
+    @property
+    def chart(self) -> bool:
+        return self._chart
+
+    @property
+    def figure(self) -> Optional[Callable]:
+        "Creates the chart as a figure with the same arguments as `run`, instead of writing it."
+        return self._figure
+
+    def arguments(self, config: Config, results: Dict[str, Any]) -> tuple:
+        input_results = [results[name] for name in self._inputs]
+        if self._args is not None:
+            return tuple(self._args(config, *input_results))
+        return (config, *input_results)
+
+
+def _run_stage(name: str, run: Callable, *args) -> Any:
+    with measure(name):
+        return run(*args)
+
+
+class Pipeline():
+    """
+    Runs the stages in dependency order.
+
+    With more than one job, independent stages run concurrently in threads
+    and charts are rendered in worker processes.
+    """
+
+    def __init__(self, stages: List[Stage], process_initializer: Optional[Callable] = None):
+        self._stages: Dict[str, Stage] = {}
+        for stage in stages:
+            for name in stage.inputs:
+                if name not in self._stages:
+                    raise RuntimeError(
+                        f"The input '{name}' of stage '{stage.name}' must be defined before it.")
+            self._stages[stage.name] = stage
+        self._process_initializer = process_initializer
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._stages
+
+    def names(self) -> List[str]:
+        return list(self._stages)
+
+    def _check_names(self, names: Iterable[str]):
+        unknown = [name for name in names if name not in self._stages]
+        if len(unknown) > 0:
+            raise RuntimeError(
+                f"Unknown stages: {', '.join(unknown)}. Use some of: {', '.join(self._stages)}.")
+
+    def dependents(self, names: Iterable[str]) -> Set[str]:
+        """
+        The given stages with all stages that (indirectly) depend on them.
+        """
+        dependents = set(names)
+        # The stages are ordered, so dependents always come later
+        for stage in self._stages.values():
+            if any(name in dependents for name in stage.inputs):
+                dependents.add(stage.name)
+        return dependents
+
+    def select(self, only: Optional[List[str]] = None, skip: Optional[List[str]] = None,
+               available: Iterable[str] = ()) -> List[str]:
+        """
+        The stages needed for the selected ones, in dependency order.
+        Skipping a stage also skips everything that depends on it.
+        Stages with an available result don't need their inputs.
+        """
+        self._check_names(only or [])
+        self._check_names(skip or [])
+
+        skipped = self.dependents(skip or [])
+        targets = [name for name in (only or self._stages) if name not in skipped]
+        available = set(available)
+
+        needed = set()
+        todo = list(targets)
+        while len(todo) > 0:
+            name = todo.pop()
+            if name in needed:
+                continue
+            needed.add(name)
+            if name not in available:
+                todo.extend(self._stages[name].inputs)
+
+        return [name for name in self._stages if name in needed]
+
+    def run(self, config: Config, only: Optional[List[str]] = None, skip: Optional[List[str]] = None,
+            results: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Runs the selected stages and returns the results of all stages.
+        """
+        results = dict(results) if results is not None else {}
+        selected = [name for name in self.select(only, skip, results) if name not in results]
+        chart_cache = ChartCache(config)
+        hashes: Dict[str, str] = {}
+
+        def prepare(stage: Stage) -> Optional[tuple]:
+            "The arguments of the stage, or None if its outputs are up to date."
+            args = stage.arguments(config, results)
+            if stage.chart:
+                hashes[stage.name] = chart_hash(stage.outputs[0], args)
+                if chart_cache.is_current(stage.outputs[0], hashes[stage.name]):
+                    click.echo(f"  Skipping {stage.name}, it is up to date.")
+                    return None
+            click.echo(f"  {stage.description}.")
+            return args
+
+        def finish(stage: Stage, result: Any):
+            results[stage.name] = result
+            if stage.chart:
+                chart_cache.update(stage.outputs[0], hashes[stage.name])
+
+        if config.jobs <= 1:
+            for name in selected:
+                stage = self._stages[name]
+                args = prepare(stage)
+                finish(stage, _run_stage(stage.name, stage.run, *args) if args is not None else None)
+        else:
+            self._run_concurrently(config, selected, results, prepare, finish)
+
+        chart_cache.save()
+        return results
+
+    def _run_concurrently(self, config: Config, selected: List[str], results: Dict[str, Any],
+                          prepare: Callable, finish: Callable):
+        pending = list(selected)
+        running: Dict[Future, Stage] = {}
+        process_pool = None
+        # Worker processes record their own profiles, which are added to this one
+        profiler = active_profiler()
+
+        with ThreadPoolExecutor(max_workers=config.jobs) as thread_pool:
+            try:
+                while len(pending) > 0 or len(running) > 0:
+                    # Start every stage whose inputs are ready
+                    for name in list(pending):
+                        stage = self._stages[name]
+                        if any(input_name not in results for input_name in stage.inputs):
+                            continue
+                        pending.remove(name)
+
+                        args = prepare(stage)
+                        if args is None:
+                            finish(stage, None)
+                            continue
+
+                        if stage.chart:
+                            if process_pool is None:
+                                initargs = (config,) if self._process_initializer is not None else ()
+                                process_pool = ProcessPoolExecutor(
+                                    max_workers=config.jobs, initializer=self._process_initializer,
+                                    initargs=initargs)
+                            if profiler is not None:
+                                future = process_pool.submit(run_profiled, stage.name, stage.run, *args)
+                            else:
+                                future = process_pool.submit(stage.run, *args)
+                        else:
+                            future = thread_pool.submit(_run_stage, stage.name, stage.run, *args)
+                        running[future] = stage
+
+                    if len(running) == 0:
+                        # Skipped charts can make more stages ready
+                        continue
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage = running.pop(future)
+                        # Raise the errors of the stage
+                        result = future.result()
+                        if stage.chart and profiler is not None:
+                            result, profiles = result
+                            for profile in profiles:
+                                profiler.add(profile)
+                        finish(stage, result)
+            finally:
+                for future in running:
+                    future.cancel()
+                if process_pool is not None:
+                    process_pool.shutdown()
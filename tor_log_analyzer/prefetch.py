@@ -0,0 +1,170 @@
+"""
+Fetches the transcriptions of new "done"s into the cache while the log grows.
+
+Running this during an event spreads the requests to Reddit over the event,
+so that the final analysis can use the cache instead of fetching everything.
+"""
+from typing import Callable, Dict, List, Optional
+import time
+import click
+from prawcore.exceptions import NotFound, PrawcoreException
+
+from tor_log_analyzer.config import Config
+from tor_log_analyzer.data.done_data import DoneData
+from tor_log_analyzer.data_processors import TRANSCRIPTION_CHECKPOINT_INTERVAL, load_transcription_cache, merge_transcription_cache, process_lines, write_fetch_telemetry
+from tor_log_analyzer.log_follower import LogFollower
+from tor_log_analyzer.transcription import transcription_from_comment
+
+# The requests per minute that Reddit allows an OAuth client
+REDDIT_REQUESTS_PER_MINUTE = 60
+
+# Fetching a transcription loads at least the ToR submission and the target submission
+REQUESTS_PER_FETCH = 2
+
+# The seconds between checks for new lines in the log
+POLL_INTERVAL = 10.0
+
+
+class RateLimiter():
+    """
+    Spaces out calls to at most the given number per second.
+    """
+
+    def __init__(self, rate: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self._interval = 1 / rate
+        self._clock = clock
+        self._sleep = sleep
+        self._next: Optional[float] = None
+        self._waited = 0.0
+
+    @property
+    def waited(self) -> float:
+        "The seconds spent waiting so far."
+        return self._waited
+
+    def wait(self):
+        """
+        Waits until the next call is allowed.
+        """
+        now = self._clock()
+        if self._next is not None and now < self._next:
+            self._sleep(self._next - now)
+            self._waited += self._next - now
+            now = self._next
+        self._next = now + self._interval
+
+
+def prefetch_rate(config: Config) -> float:
+    "The transcriptions to fetch per second with the share of the API budget."
+    return config.prefetch_share * REDDIT_REQUESTS_PER_MINUTE / REQUESTS_PER_FETCH / 60
+
+
+class Prefetcher():
+    """
+    Fetches the transcriptions of the "done"s appended to the log into the cache.
+    """
+
+    def __init__(self, config: Config, reddit_api=None, limiter: Optional[RateLimiter] = None):
+        self._config = config
+        self._reddit_api = reddit_api
+        self._limiter = limiter if limiter is not None else RateLimiter(prefetch_rate(config))
+        self._follower = LogFollower(config.input_file)
+        self._cache: Dict[str, Dict] = load_transcription_cache(config)
+        self._missing = set()
+        # The "done"s whose fetch failed, they are retried on the next update
+        self._failed: List[DoneData] = []
+        self._fetched = 0
+
+    @property
+    def cache(self) -> Dict[str, Dict]:
+        "The cached transcriptions by post id."
+        return self._cache
+
+    @property
+    def fetched(self) -> int:
+        "The number of transcriptions fetched from Reddit so far."
+        return self._fetched
+
+    @property
+    def reddit_api(self):
+        "The connection to Reddit, None until the first transcription is fetched."
+        return self._reddit_api
+
+    def _get_reddit_api(self):
+        if self._reddit_api is None:
+            from tor_log_analyzer.reddit.reddit_api import RedditAPI
+            self._reddit_api = RedditAPI(self._config)
+        return self._reddit_api
+
+    def update(self) -> int:
+        """
+        Fetches the transcriptions of the new "done"s. Returns how many were fetched.
+        """
+        if self._follower.truncated():
+            click.echo("The log was truncated, reading it again.")
+
+        new_dones = process_lines(self._config, self._follower.read_new_lines(), write_artifacts=False)
+        dones = [done for done in self._failed + new_dones
+                 if done.post_id not in self._cache and done.post_id not in self._missing]
+        self._failed = []
+
+        fetched = {}
+        try:
+            for done in dones:
+                if done.post_id in fetched:
+                    continue
+                self._limiter.wait()
+                try:
+                    comment = self._get_reddit_api().get_transcription(done.post_id, done.username)
+                except NotFound:
+                    comment = None
+                except PrawcoreException as error:
+                    # E.g. a timeout or a server error, keep going with the other posts
+                    click.echo(f"Failed to fetch {done.post_id}, retrying later: {error}", err=True)
+                    self._failed.append(done)
+                    continue
+                if comment is None:
+                    # Don't ask again, the transcription was probably removed
+                    self._missing.add(done.post_id)
+                    continue
+
+                fetched[done.post_id] = transcription_from_comment(comment).to_dict()
+                if len(fetched) % TRANSCRIPTION_CHECKPOINT_INTERVAL == 0:
+                    merge_transcription_cache(self._config, fetched)
+        finally:
+            # Also keep the fetched transcriptions when interrupted
+            if len(fetched) > 0:
+                self._cache.update(fetched)
+                merge_transcription_cache(self._config, fetched)
+                self._fetched += len(fetched)
+        return len(fetched)
+
+
+def prefetch(config: Config, interval: float = POLL_INTERVAL):
+    """
+    Follows the log and fetches new transcriptions into the cache until interrupted.
+    """
+    if len(config.batch) > 0:
+        raise RuntimeError("Batches can't be prefetched, prefetch the log of a single event instead.")
+    if config.force_cache or config.no_cache:
+        raise RuntimeError("Prefetching needs the cache and Reddit, don't use --force-cache or --no-cache.")
+
+    prefetcher = Prefetcher(config)
+    click.echo(f"Prefetching transcriptions into {config.cache_dir}, "
+               f"at most {prefetch_rate(config) * 60:.0f} per minute.")
+    try:
+        while True:
+            try:
+                fetched = prefetcher.update()
+                if fetched > 0:
+                    click.echo(f"Fetched {fetched} transcriptions, {len(prefetcher.cache)} are cached.")
+            except Exception as error:
+                # Keep following the log, e.g. while Reddit is unreachable
+                click.echo(f"Failed to update: {error}", err=True)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    click.echo(f"Fetched {prefetcher.fetched} transcriptions in total.")
+    if prefetcher.reddit_api is not None:
+        write_fetch_telemetry(config, prefetcher.reddit_api.telemetry)
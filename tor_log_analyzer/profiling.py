@@ -0,0 +1,277 @@
+"""
+Optional profiling of the analysis stages.
+
+While a profiler is active, every `measure`-d block records its wall time,
+CPU time, traced memory and item counts. Blocks with the same name are summed up.
+Without an active profiler, `measure` does nothing.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+from contextlib import contextmanager
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+
+def max_rss_kb() -> Optional[int]:
+    "The peak resident set size of the process so far."
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class StageProfile():
+    """
+    The measurements of all runs of a stage.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._calls = 0
+        self._wall_time = 0.0
+        self._cpu_time = 0.0
+        self._memory_peak = 0
+        self._memory_delta = 0
+        self._max_rss_kb = None
+        self._counts: Dict[str, int] = {}
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    @property
+    def wall_time(self) -> float:
+        "The elapsed time in seconds."
+        return self._wall_time
+
+    @property
+    def cpu_time(self) -> float:
+        "The CPU time of the running thread in seconds."
+        return self._cpu_time
+
+    @property
+    def memory_peak(self) -> int:
+        "The highest traced memory above the start of a run, in bytes."
+        return self._memory_peak
+
+    @property
+    def memory_delta(self) -> int:
+        "The traced memory that is still allocated after the runs, in bytes."
+        return self._memory_delta
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        "The number of processed items, by kind."
+        return self._counts
+
+    def count(self, key: str, amount: int = 1):
+        self._counts[key] = self._counts.get(key, 0) + amount
+
+    def record(self, wall_time: float, cpu_time: float, memory_peak: int, memory_delta: int):
+        self._calls += 1
+        self._wall_time += wall_time
+        self._cpu_time += cpu_time
+        self._memory_peak = max(self._memory_peak, memory_peak)
+        self._memory_delta += memory_delta
+        self._max_rss_kb = max_rss_kb()
+
+    def merge(self, other: "StageProfile") -> "StageProfile":
+        self._calls += other._calls
+        self._wall_time += other._wall_time
+        self._cpu_time += other._cpu_time
+        self._memory_peak = max(self._memory_peak, other._memory_peak)
+        self._memory_delta += other._memory_delta
+        if other._max_rss_kb is not None:
+            self._max_rss_kb = max(self._max_rss_kb or 0, other._max_rss_kb)
+        for key, amount in other._counts.items():
+            self.count(key, amount)
+        return self
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "wall-time": round(self.wall_time, 6),
+            "cpu-time": round(self.cpu_time, 6),
+            "memory-peak": self.memory_peak,
+            "memory-delta": self.memory_delta,
+            "max-rss-kb": self._max_rss_kb,
+            "counts": self.counts,
+        }
+
+
+class _Frame():
+    "A running measurement, tracking the traced memory peak of nested measurements."
+
+    def __init__(self, memory_start: int):
+        self.memory_start = memory_start
+        self.memory_peak = memory_start
+
+
+class Profiler():
+    """
+    Collects the stage profiles of a run.
+
+    The traced memory is shared by all threads, so with concurrent stages
+    the memory numbers of a stage can include the allocations of others.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, StageProfile] = {}
+        self._frames: List[_Frame] = []
+        self._lock = threading.RLock()
+        self._started_tracing = False
+        self._start_time = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._start_time = time.perf_counter()
+
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @property
+    def total_time(self) -> float:
+        return time.perf_counter() - self._start_time if self._start_time is not None else 0.0
+
+    def stages(self) -> List[StageProfile]:
+        return list(self._stages.values())
+
+    def stage(self, name: str) -> StageProfile:
+        with self._lock:
+            if name not in self._stages:
+                self._stages[name] = StageProfile(name)
+            return self._stages[name]
+
+    def add(self, profile: StageProfile):
+        """
+        Adds a profile that was recorded elsewhere, e.g. in a worker process.
+        """
+        self.stage(profile.name).merge(profile)
+
+    def _enter(self) -> _Frame:
+        with self._lock:
+            current, peak = tracemalloc.get_traced_memory()
+            if len(self._frames) > 0:
+                # Keep the peak of the outer measurement before it is reset
+                self._frames[-1].memory_peak = max(self._frames[-1].memory_peak, peak)
+            tracemalloc.reset_peak()
+            frame = _Frame(current)
+            self._frames.append(frame)
+            return frame
+
+    def _exit(self, frame: _Frame) -> Tuple[int, int]:
+        with self._lock:
+            current, peak = tracemalloc.get_traced_memory()
+            frame.memory_peak = max(frame.memory_peak, peak)
+            self._frames.remove(frame)
+            if len(self._frames) > 0:
+                self._frames[-1].memory_peak = max(self._frames[-1].memory_peak, frame.memory_peak)
+            return frame.memory_peak - frame.memory_start, current - frame.memory_start
+
+    @contextmanager
+    def measure(self, name: str):
+        profile = self.stage(name)
+        frame = self._enter()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield profile
+        finally:
+            cpu_time = time.thread_time() - cpu_start
+            wall_time = time.perf_counter() - wall_start
+            memory_peak, memory_delta = self._exit(frame)
+            with self._lock:
+                profile.record(wall_time, cpu_time, memory_peak, memory_delta)
+
+    def to_dict(self) -> Dict:
+        return {
+            "wall-time": round(self.total_time, 6),
+            "max-rss-kb": max_rss_kb(),
+            "stages": [stage.to_dict() for stage in self._stages.values()],
+        }
+
+
+_profiler: Optional[Profiler] = None
+
+
+def active_profiler() -> Optional[Profiler]:
+    return _profiler
+
+
+def start_profiling() -> Profiler:
+    """
+    Starts recording all measured stages.
+    """
+    global _profiler
+    _profiler = Profiler()
+    _profiler.start()
+    return _profiler
+
+
+def stop_profiling() -> Optional[Profiler]:
+    global _profiler
+    profiler = _profiler
+    if profiler is not None:
+        profiler.stop()
+    _profiler = None
+    return profiler
+
+
+class _NoProfile():
+    "Stands in for a stage profile when profiling is off."
+
+    def count(self, key: str, amount: int = 1):
+        pass
+
+
+@contextmanager
+def measure(name: str):
+    """
+    Measures the block as the given stage, if profiling is active.
+    Yields the stage profile, to count the processed items.
+    """
+    profiler = _profiler
+    if profiler is None:
+        yield _NoProfile()
+        return
+    with profiler.measure(name) as profile:
+        yield profile
+
+
+def run_profiled(name: str, function: Callable, *args) -> Tuple[object, List[StageProfile]]:
+    """
+    Runs the function in a worker process with its own profiler.
+    Returns the result and the recorded stage profiles.
+    """
+    start_profiling()
+    try:
+        with measure(name):
+            result = function(*args)
+    finally:
+        profiler = stop_profiling()
+    return result, profiler.stages()
+
+
+def profile_summary(profiler: Profiler) -> List[str]:
+    """
+    A table of the stage profiles, one line per stage.
+    """
+    lines = [f"{'Stage':<32} {'Calls':>6} {'Wall (s)':>9} {'CPU (s)':>9} {'Peak (MiB)':>11}"]
+    for stage in profiler.stages():
+        lines.append(f"{stage.name:<32} {stage.calls:>6} {stage.wall_time:>9.3f} "
+                     f"{stage.cpu_time:>9.3f} {stage.memory_peak / 2**20:>11.2f}")
+    return lines
@@ -0,0 +1,169 @@
+"""
+Top-K rankings for the leaderboard charts.
+"""
+from typing import Dict, Hashable, Iterable, List, Tuple
+import heapq
+import itertools
+
+
+class Ranking():
+    """
+    The top entries of a leaderboard, sorted descending,
+    together with the aggregate of all other entries.
+    """
+
+    def __init__(self, top: List[Tuple[Hashable, int]], rest_total: int, rest_count: int):
+        self._top = top
+        self._rest_total = rest_total
+        self._rest_count = rest_count
+
+    @property
+    def top(self) -> List[Tuple[Hashable, int]]:
+        return self._top
+
+    @property
+    def rest_total(self) -> int:
+        "The sum of all entries that didn't make it in the top."
+        return self._rest_total
+
+    @property
+    def rest_count(self) -> int:
+        "The number of entries that didn't make it in the top."
+        return self._rest_count
+
+    @property
+    def has_rest(self) -> bool:
+        return self._rest_count > 0
+
+
+def top_k(entries: Iterable[Tuple[Hashable, int]], k: int) -> Ranking:
+    """
+    Ranks the (key, value) entries in a single pass in O(n log k).
+    Entries with the same value keep their original order.
+    """
+    total = 0
+    count = 0
+
+    def counted_entries():
+        nonlocal total, count
+        for entry in entries:
+            total += entry[1]
+            count += 1
+            yield entry
+
+    top = heapq.nlargest(k, counted_entries(), key=lambda e: e[1])
+
+    return Ranking(top, total - sum(entry[1] for entry in top), count - len(top))
+
+
+class SpaceSaving():
+    """
+    Streaming heavy hitters with the Space-Saving algorithm.
+
+    At most `capacity` keys are tracked. When a new key arrives and the
+    summary is full, it replaces the key with the smallest count and
+    inherits that count as its maximum overestimation.
+    Every key that occurs more than total / capacity times is guaranteed
+    to be tracked.
+    """
+
+    def __init__(self, capacity: int):
+        self._capacity = capacity
+        self._counts: Dict[Hashable, int] = {}
+        self._errors: Dict[Hashable, int] = {}
+        # Min-heap of (count, order, key) entries, outdated entries are skipped lazily
+        self._heap: List[Tuple[int, int, Hashable]] = []
+        self._order = itertools.count()
+        self._total = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def __len__(self):
+        return len(self._counts)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._counts
+
+    def __getitem__(self, key: Hashable) -> int:
+        "The (over-)estimated count of the key."
+        return self._counts[key] if key in self._counts else 0
+
+    def error(self, key: Hashable) -> int:
+        "The maximum overestimation of the count of the key."
+        return self._errors[key] if key in self._errors else 0
+
+    def add(self, key: Hashable, count: int = 1):
+        self._total += count
+
+        if key in self._counts:
+            self._counts[key] += count
+        elif len(self._counts) < self._capacity:
+            self._counts[key] = count
+            self._errors[key] = 0
+        else:
+            min_count, min_key = self._pop_min()
+            del self._counts[min_key]
+            del self._errors[min_key]
+            self._counts[key] = min_count + count
+            self._errors[key] = min_count
+
+        self._push(key)
+
+    def _push(self, key: Hashable):
+        heapq.heappush(self._heap, (self._counts[key], next(self._order), key))
+
+        # Drop the outdated entries before the heap grows too large
+        if len(self._heap) > 4 * self._capacity:
+            self._heap = [(count, next(self._order), key)
+                          for key, count in self._counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[int, Hashable]:
+        while True:
+            count, _, key = heapq.heappop(self._heap)
+            if self._counts.get(key) == count:
+                return count, key
+
+    def _min_count(self) -> int:
+        "The most that an untracked key can have occurred."
+        return min(self._counts.values()) if len(self._counts) >= self._capacity else 0
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """
+        Adds the counts of the other summary, e.g. of a later shard of the data.
+
+        A key missing on one side may have occurred up to that side's smallest
+        count there, so that count is added to its count and its error.
+        Only the `capacity` largest counts are kept afterwards.
+        """
+        self_min, other_min = self._min_count(), other._min_count()
+        counts, errors = {}, {}
+        for key in itertools.chain(self._counts, (key for key in other._counts if key not in self._counts)):
+            counts[key] = self._counts.get(key, self_min) + other._counts.get(key, other_min)
+            errors[key] = self._errors.get(key, self_min) + other._errors.get(key, other_min)
+
+        kept = heapq.nlargest(self._capacity, counts, key=lambda key: counts[key])
+        self._counts = dict((key, counts[key]) for key in kept)
+        self._errors = dict((key, errors[key]) for key in kept)
+        self._heap = [(count, next(self._order), key) for key, count in self._counts.items()]
+        heapq.heapify(self._heap)
+        self._total += other._total
+        return self
+
+    def top_k(self, k: int) -> Ranking:
+        """
+        The estimated top k keys. The rest aggregates all other counted values,
+        its count only includes the keys that are still tracked.
+        """
+        ranking = top_k(self._counts.items(), k)
+        top_total = sum(entry[1] for entry in ranking.top)
+        return Ranking(ranking.top, self._total - top_total, ranking.rest_count)
+
+    def to_dict(self) -> Dict:
+        return self._counts
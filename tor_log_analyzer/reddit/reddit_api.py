@@ -1,47 +1,171 @@
+from typing import Dict, List, Optional
 from time import sleep
+import math
+import threading
+import time
 
 import praw
+import requests
+from praw.models import MoreComments
 from praw.models.reddit.submission import Submission
 from praw.models.reddit.comment import Comment
 
+from tor_log_analyzer.auth_config import AuthConfig
 from tor_log_analyzer.config import Config
 from tor_log_analyzer.reddit import __user_agent__, __tor_link__
+from tor_log_analyzer.reddit.telemetry import FetchTelemetry
+from tor_log_analyzer.profiling import measure
 
+# The seconds to pause between two rounds of "load more comments" of a post
+EXPANSION_DELAY = 1
 
-class RedditAPI():
-    def __init__(self, config: Config):
+
+def find_transcription(comments: List, username: str) -> Optional[Comment]:
+    for comment in comments:
+        if isinstance(comment, Comment) and comment.author == username:
+            if __tor_link__ in comment.body and "&#32;" in comment.body:
+                return comment
+    return None
+
+
+class RedditClient():
+    """
+    A connection to Reddit with the credentials of one app,
+    with the rate limit that Reddit reported for it.
+    """
+
+    def __init__(self, auth: AuthConfig, telemetry: FetchTelemetry, praw_options: Optional[Dict] = None):
+        self._client_id = auth.client_id
+        self._requests = 0
+        self._posts = 0
+        self._remaining: Optional[float] = None
+        self._reset_at: Optional[float] = None
+
+        session = requests.Session()
+        session.hooks["response"].append(telemetry.response_hook())
+        session.hooks["response"].append(self._update_rate_limit)
         self._reddit = praw.Reddit(
-            client_id=config.auth.client_id,
-            client_secret=config.auth.client_secret,
+            client_id=auth.client_id,
+            client_secret=auth.client_secret,
             user_agent=__user_agent__,
+            requestor_kwargs={"session": session},
+            **(praw_options or {}),
         )
 
-    def get_tor_submission(self, submission_full_name: str) -> Submission:
+        # praw doesn't expose its rate limiters, so the waits are only recorded if they are found
+        for core in ["_read_only_core", "_authorized_core"]:
+            rate_limiter = getattr(getattr(self._reddit, core, None), "_rate_limiter", None)
+            if rate_limiter is not None:
+                rate_limiter.delay = telemetry.timed(rate_limiter.delay)
+
+    @property
+    def client_id(self) -> Optional[str]:
+        return self._client_id
+
+    @property
+    def reddit(self) -> praw.Reddit:
+        return self._reddit
+
+    @property
+    def requests(self) -> int:
+        "The number of requests made with this client."
+        return self._requests
+
+    @property
+    def posts(self) -> int:
+        "The number of posts given to this client."
+        return self._posts
+
+    def add_post(self):
+        self._posts += 1
+
+    def available(self, now: float) -> float:
+        """
+        The number of requests the client can make until its rate limit resets.
+        Infinite if Reddit didn't report a limit yet or the limit was reset.
+        """
+        if self._remaining is None or (self._reset_at is not None and now >= self._reset_at):
+            return math.inf
+        return self._remaining
+
+    def _update_rate_limit(self, response, *args, **kwargs):
+        self._requests += 1
+        if "x-ratelimit-remaining" in response.headers:
+            self._remaining = float(response.headers["x-ratelimit-remaining"])
+            self._reset_at = time.monotonic() + float(response.headers.get("x-ratelimit-reset", 0))
+        return response
+
+
+class RedditAPI():
+    """
+    Fetches from Reddit with a pool of clients, one per configured app.
+    Every post is fetched with the client that has the most requests left.
+    """
+
+    def __init__(self, config: Config, telemetry: Optional[FetchTelemetry] = None,
+                 praw_options: Optional[Dict] = None):
+        self._telemetry = telemetry if telemetry is not None else FetchTelemetry()
+        self._clients = [RedditClient(auth, self._telemetry, praw_options) for auth in config.auths]
+        self._lock = threading.Lock()
+
+    @property
+    def telemetry(self) -> FetchTelemetry:
+        "The measurements of the requests made so far."
+        return self._telemetry
+
+    @property
+    def clients(self) -> List[RedditClient]:
+        return self._clients
+
+    def _next_reddit(self) -> praw.Reddit:
+        now = time.monotonic()
+        with self._lock:
+            # Among clients with the same requests left, take the one with the fewest posts
+            client = max(self._clients, key=lambda client: (client.available(now), -client.posts))
+            client.add_post()
+        return client.reddit
+
+    def get_tor_submission(self, submission_full_name: str, reddit: Optional[praw.Reddit] = None) -> Submission:
         submission_id = submission_full_name[3:]
-        return self._reddit.submission(id=submission_id)
+        return (reddit or self._next_reddit()).submission(id=submission_id)
 
     def get_target_submission(self, submission_full_name: str) -> Submission:
-        tor_submission = self.get_tor_submission(submission_full_name)
-        return self._reddit.submission(url=tor_submission.url)
+        reddit = self._next_reddit()
+        tor_submission = self.get_tor_submission(submission_full_name, reddit)
+        return reddit.submission(url=tor_submission.url)
 
     def get_transcription(self, submission_full_name: str, username: str) -> Comment:
-        target_submission = self.get_target_submission(submission_full_name)
-        comments = target_submission.comments
-        comment_len = len(comments)
+        # The submissions are bound to the client that loaded them
+        reddit = self._next_reddit()
+        with measure("fetch.reddit.tor_submission"), self._telemetry.phase("tor_submission"):
+            # The submissions are lazy, accessing an attribute fetches them
+            tor_submission = self.get_tor_submission(submission_full_name, reddit)
+            target_url = tor_submission.url
+        with measure("fetch.reddit.target_submission"), self._telemetry.phase("target_submission"):
+            target_submission = reddit.submission(url=target_url)
+            comments = target_submission.comments
 
+        expansions = 0
         while True:
-            comment_list = comments.list()
-            for comment in comment_list:
-                if isinstance(comment, Comment) and comment.author == username:
-                    if __tor_link__ in comment.body and "&#32;" in comment.body:
-                        return comment
+            with measure("fetch.reddit.search_comments") as profile:
+                comment_list = comments.list()
+                profile.count("comments", len(comment_list))
+                transcription = find_transcription(comment_list, username)
+                more = sum(1 for comment in comment_list if isinstance(comment, MoreComments))
+
+            if transcription is not None or more == 0:
+                break
 
-            comments.replace_more()
+            with measure("fetch.reddit.replace_more"), self._telemetry.phase("replace_more"):
+                skipped = comments.replace_more()
 
-            if len(comments) == comment_len:
+            if len(skipped) == more:
+                # Nothing could be expanded
                 break
 
-            comment_len = len(comments)
-            sleep(1)
+            expansions += more - len(skipped)
+            sleep(EXPANSION_DELAY)
+            self._telemetry.add_expansion_delay(EXPANSION_DELAY)
 
-        return None
+        self._telemetry.add_post(expansions, transcription is not None)
+        return transcription
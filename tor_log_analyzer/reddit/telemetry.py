@@ -0,0 +1,287 @@
+"""
+Measurements of the requests to Reddit while fetching transcriptions.
+
+Every HTTP response is counted for the phase of the fetch it belongs to,
+with its latency and size. The time spent waiting for the rate limit and
+the "load more comments" expansions per post are recorded as well.
+"""
+from typing import Dict, List, Optional
+from contextlib import contextmanager
+import threading
+import time
+
+# The upper bounds of the latency histogram buckets in seconds
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# The phases of fetching a transcription
+PHASES = ["auth", "tor_submission", "target_submission", "replace_more"]
+
+
+def _bound(bound: Optional[float]) -> str:
+    return f"<={bound}" if bound is not None else f">{LATENCY_BUCKETS[-1]}"
+
+
+class LatencyHistogram():
+    """
+    The number of requests per latency bucket.
+    """
+
+    def __init__(self):
+        # The last bucket counts everything above the largest bound
+        self._counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._total = 0.0
+        self._max = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    @property
+    def total(self) -> float:
+        "The summed up latency in seconds."
+        return self._total
+
+    @property
+    def max(self) -> float:
+        return self._max
+
+    def add(self, seconds: float):
+        index = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+        self._counts[index] += 1
+        self._total += seconds
+        self._max = max(self._max, seconds)
+
+    def percentile(self, share: float) -> Optional[float]:
+        """
+        The upper bound of the bucket containing the given share of the requests.
+        None if there are no requests or the share is above the largest bound.
+        """
+        if self.count == 0:
+            return None
+        needed = share * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self._counts):
+            seen += count
+            if seen >= needed:
+                return bound
+        return None
+
+    def to_dict(self) -> Dict:
+        buckets = dict((f"<={bound}", count) for bound, count in zip(LATENCY_BUCKETS, self._counts))
+        buckets[f">{LATENCY_BUCKETS[-1]}"] = self._counts[-1]
+        return {
+            "count": self.count,
+            "total": round(self._total, 6),
+            "max": round(self._max, 6),
+            "buckets": buckets,
+        }
+
+
+class PhaseTelemetry():
+    """
+    The requests of one phase of the fetches.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._requests = 0
+        self._errors = 0
+        self._bytes = 0
+        self._latency = LatencyHistogram()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def requests(self) -> int:
+        return self._requests
+
+    @property
+    def errors(self) -> int:
+        "The number of responses with an error status."
+        return self._errors
+
+    @property
+    def bytes(self) -> int:
+        "The size of the received response bodies."
+        return self._bytes
+
+    @property
+    def latency(self) -> LatencyHistogram:
+        return self._latency
+
+    def add_response(self, status: int, size: int, seconds: float):
+        self._requests += 1
+        if status >= 400:
+            self._errors += 1
+        self._bytes += size
+        self._latency.add(seconds)
+
+    def to_dict(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "latency": self.latency.to_dict(),
+        }
+
+
+class FetchTelemetry():
+    """
+    The requests, waits and expansions of all fetches of a run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._phases: Dict[str, PhaseTelemetry] = dict((name, PhaseTelemetry(name)) for name in PHASES)
+        self._rate_limit_waits = 0
+        self._rate_limit_wait_time = 0.0
+        self._expansion_delay = 0.0
+        self._expansions: List[int] = []
+        self._not_found = 0
+
+    @property
+    def phases(self) -> Dict[str, PhaseTelemetry]:
+        return self._phases
+
+    @property
+    def rate_limit_waits(self) -> int:
+        "How often a request waited for the rate limit."
+        return self._rate_limit_waits
+
+    @property
+    def rate_limit_wait_time(self) -> float:
+        "The seconds spent waiting for the rate limit."
+        return self._rate_limit_wait_time
+
+    @property
+    def expansion_delay(self) -> float:
+        "The seconds spent pausing between \"load more comments\" expansions."
+        return self._expansion_delay
+
+    @property
+    def expansions(self) -> List[int]:
+        "The number of expanded \"load more comments\" per fetched post."
+        return self._expansions
+
+    @property
+    def posts(self) -> int:
+        return len(self._expansions)
+
+    @property
+    def not_found(self) -> int:
+        "The number of posts without a transcription."
+        return self._not_found
+
+    @property
+    def requests(self) -> int:
+        return sum(phase.requests for phase in self._phases.values())
+
+    @property
+    def bytes(self) -> int:
+        return sum(phase.bytes for phase in self._phases.values())
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Counts the responses received in the block for the given phase.
+        """
+        previous = getattr(self._local, "phase", None)
+        self._local.phase = name
+        try:
+            yield
+        finally:
+            self._local.phase = previous
+
+    def add_response(self, url: str, status: int, size: int, seconds: float):
+        # The access token is requested whenever it expires, during any phase
+        name = "auth" if "access_token" in url else getattr(self._local, "phase", None) or "other"
+        with self._lock:
+            if name not in self._phases:
+                self._phases[name] = PhaseTelemetry(name)
+            self._phases[name].add_response(status, size, seconds)
+
+    def add_rate_limit_wait(self, seconds: float):
+        with self._lock:
+            self._rate_limit_waits += 1
+            self._rate_limit_wait_time += seconds
+
+    def add_expansion_delay(self, seconds: float):
+        with self._lock:
+            self._expansion_delay += seconds
+
+    def add_post(self, expansions: int, found: bool):
+        with self._lock:
+            self._expansions.append(expansions)
+            if not found:
+                self._not_found += 1
+
+    def response_hook(self):
+        """
+        A `requests` response hook that records every response.
+        """
+        def hook(response, *args, **kwargs):
+            self.add_response(response.url, response.status_code, len(response.content),
+                              response.elapsed.total_seconds())
+            return response
+        return hook
+
+    def timed(self, delay):
+        """
+        Wraps the delay function of a rate limiter to record the waits.
+        """
+        def timed_delay(*args, **kwargs):
+            start = time.monotonic()
+            result = delay(*args, **kwargs)
+            waited = time.monotonic() - start
+            # Not waiting at all still takes a tiny bit of time
+            if waited >= 0.001:
+                self.add_rate_limit_wait(waited)
+            return result
+        return timed_delay
+
+    def summary(self) -> List[str]:
+        """
+        The telemetry as lines of text.
+        """
+        lines = [f"{self.posts} posts ({self.not_found} not found), {self.requests} requests, "
+                 f"{self.bytes / 1024:.1f} KB received"]
+        for phase in self._phases.values():
+            if phase.requests == 0:
+                continue
+            lines.append(
+                f"{phase.name}: {phase.requests} requests, {phase.bytes / 1024:.1f} KB, "
+                f"{phase.latency.total / phase.requests:.3f} s avg, "
+                f"p50 {_bound(phase.latency.percentile(0.5))} s, "
+                f"p95 {_bound(phase.latency.percentile(0.95))} s, "
+                f"max {phase.latency.max:.3f} s")
+        lines.append(f"rate limit: waited {self.rate_limit_wait_time:.1f} s in {self.rate_limit_waits} waits")
+        expanded = sum(self._expansions)
+        lines.append(f"load more comments: {expanded} expansions, "
+                     f"at most {max(self._expansions, default=0)} per post, "
+                     f"{self.expansion_delay:.1f} s paused between them")
+        return lines
+
+    def to_dict(self) -> Dict:
+        expansions: Dict[str, int] = {}
+        for count in self._expansions:
+            expansions[str(count)] = expansions.get(str(count), 0) + 1
+        return {
+            "posts": self.posts,
+            "not-found": self.not_found,
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "phases": dict((name, phase.to_dict()) for name, phase in self._phases.items()),
+            "rate-limit": {
+                "waits": self.rate_limit_waits,
+                "wait-time": round(self.rate_limit_wait_time, 6),
+            },
+            "expansions": {
+                "total": sum(self._expansions),
+                "delay": round(self.expansion_delay, 6),
+                # The number of posts by the number of expansions they needed
+                "posts": dict(sorted(expansions.items(), key=lambda item: int(item[0]))),
+            },
+        }
@@ -0,0 +1,65 @@
+from typing import Dict, Optional
+
+
+class RenderProfile:
+    def __init__(self, name: str, dpi: float, autolayout: bool, compress_level: Optional[int] = None):
+        self._name = name
+        self._dpi = dpi
+        self._autolayout = autolayout
+        self._compress_level = compress_level
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def dpi(self) -> float:
+        "The resolution of the charts."
+        return self._dpi
+
+    @property
+    def autolayout(self) -> bool:
+        "Whether the chart layouts are tightened automatically."
+        return self._autolayout
+
+    @property
+    def compress_level(self) -> Optional[int]:
+        "The PNG compression level from 0 to 9, or None for the default."
+        return self._compress_level
+
+    def savefig_kwargs(self) -> Dict:
+        """
+        The additional arguments to save a chart with this profile.
+        """
+        if self.compress_level is None:
+            return {}
+        return {"pil_kwargs": {"compress_level": self.compress_level}}
+
+
+DRAFT_PROFILE = RenderProfile(
+    name="draft",
+    dpi=100.0,
+    autolayout=False,
+    compress_level=1,
+)
+
+FINAL_PROFILE = RenderProfile(
+    name="final",
+    dpi=300.0,
+    autolayout=True,
+)
+
+RENDER_PROFILES = {
+    DRAFT_PROFILE.name: DRAFT_PROFILE,
+    FINAL_PROFILE.name: FINAL_PROFILE,
+}
+
+
+def render_profile_from_name(name: str) -> RenderProfile:
+    """
+    Gets the render profile with the given name.
+    """
+    if name not in RENDER_PROFILES:
+        raise RuntimeError(
+            f"Unknown render profile '{name}', use one of: {', '.join(RENDER_PROFILES)}.")
+    return RENDER_PROFILES[name]
@@ -0,0 +1,302 @@
+"""
+A local HTTP service that keeps the analysis in memory and follows the log.
+
+New lines of the log are parsed and added to the resident transcriptions and
+aggregates, without reading the whole log or the cache again. Every change
+increases the data version and the responses are cached per version.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+import click
+
+from tor_log_analyzer.aggregation import Aggregates, aggregate
+from tor_log_analyzer.config import Config
+from tor_log_analyzer.data.rollup_data import RollupData, RESOLUTIONS, rollup_from_table
+from tor_log_analyzer.data.transcription_store import TranscriptionStore
+from tor_log_analyzer.data.transcription_table import transcription_table_from_transcriptions
+from tor_log_analyzer.data_processors import aggregator_factories, fetch_transcriptions, load_transcription_cache, merge_transcription_cache, process_lines, rollup_patches
+from tor_log_analyzer.log_follower import LogFollower
+from tor_log_analyzer.transcription import Transcription
+
+# The service only listens on the local machine
+HOST = "127.0.0.1"
+
+# The seconds between checks for new lines in the log
+POLL_INTERVAL = 2.0
+
+CHART_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+
+class Response():
+    """
+    A rendered response of the service.
+    """
+
+    def __init__(self, status: int, content_type: str, body: bytes, etag: Optional[str] = None):
+        self._status = status
+        self._content_type = content_type
+        self._body = body
+        self._etag = etag
+
+    @property
+    def status(self) -> int:
+        return self._status
+
+    @property
+    def content_type(self) -> str:
+        return self._content_type
+
+    @property
+    def body(self) -> bytes:
+        return self._body
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self._etag
+
+
+def _json_response(data, etag: Optional[str] = None, status: int = 200) -> Response:
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf8")
+    return Response(status, "application/json; charset=utf-8", body, etag)
+
+
+class StatsService():
+    """
+    The analysis of a log that is kept up to date while the log grows.
+
+    Only one update runs at a time. It fetches the new transcriptions without
+    blocking the responses and only locks the state to swap in the changes.
+    """
+
+    def __init__(self, config: Config):
+        self._config = config
+        self._lock = threading.RLock()
+        self._update_lock = threading.Lock()
+        self._started = int(time.time())
+        self._responses: Dict[str, Tuple[int, Response]] = {}
+        self._charts: Optional[Dict[str, Callable]] = None
+        self._version = 0
+        self._reset()
+
+    def _reset(self):
+        table = transcription_table_from_transcriptions([])
+        with self._lock:
+            self._follower = LogFollower(self._config.input_file)
+            self._dones = 0
+            self._cache = load_transcription_cache(self._config)
+            self._known: Dict[str, Transcription] = {}
+            self._store = TranscriptionStore()
+            self._aggregates = aggregate([], factories=aggregator_factories(self._config))
+            self._rollups: Dict[str, RollupData] = dict(
+                (resolution, rollup_from_table(table, resolution)) for resolution in RESOLUTIONS)
+
+    def _in_event(self, transcription: Transcription) -> bool:
+        event = self._config.event
+        return (event.start is None or transcription.time > event.start) and \
+            (event.end is None or transcription.time < event.end)
+
+    @property
+    def version(self) -> int:
+        "The version of the data, increased by every change."
+        return self._version
+
+    @property
+    def transcriptions(self) -> TranscriptionStore:
+        return self._store
+
+    @property
+    def aggregates(self) -> Aggregates:
+        return self._aggregates
+
+    @property
+    def rollups(self) -> Dict[str, RollupData]:
+        return self._rollups
+
+    def _read_new_lines(self) -> List[str]:
+        if self._follower.truncated():
+            # The log was truncated or rotated, start over
+            click.echo("The log was truncated, reloading it.")
+            self._reset()
+            with self._lock:
+                self._version += 1
+        return self._follower.read_new_lines()
+
+    def update(self) -> bool:
+        """
+        Adds the new lines of the log. Returns whether the data changed.
+        """
+        # Only updates change the state, so it can be read without the lock here
+        with self._update_lock:
+            version = self._version
+            lines = self._read_new_lines()
+            if len(lines) == 0:
+                return self._version != version
+
+            dones = [done for done in process_lines(self._config, lines, write_artifacts=False)
+                     if done.post_id not in self._known]
+            self._dones += len(dones)
+            if len(dones) == 0:
+                return self._version != version
+
+            transcriptions = fetch_transcriptions(self._config, dones, self._cache)
+
+            fetched = dict((post_id, transcription.to_dict())
+                           for post_id, transcription in transcriptions.items()
+                           if post_id not in self._cache)
+            if len(fetched) > 0:
+                self._cache.update(fetched)
+                merge_transcription_cache(self._config, self._cache)
+
+            self._known.update(transcriptions)
+            new_transcriptions = [tr for tr in transcriptions.values() if self._in_event(tr)]
+            if len(new_transcriptions) == 0:
+                return self._version != version
+
+            # The statistics are sums, so the new transcriptions can be merged in any order
+            new_aggregates = aggregate(new_transcriptions, factories=aggregator_factories(self._config))
+            patches = rollup_patches(self._store, new_transcriptions)
+
+            with self._lock:
+                for transcription in new_transcriptions:
+                    self._store.add(transcription)
+                self._aggregates = self._aggregates.merge(new_aggregates)
+                self._rollups = dict((resolution, rollup.replaced(patches[resolution]))
+                                     for resolution, rollup in self._rollups.items())
+                self._version += 1
+            return True
+
+    def _etag(self) -> str:
+        return f'"{self._started}-{self._version}"'
+
+    def _chart_stages(self) -> Dict[str, Callable]:
+        if self._charts is None:
+            from tor_log_analyzer.main import chart_stages
+
+            self._charts = dict((stage.name, stage) for stage in chart_stages(self._config))
+        return self._charts
+
+    def _render(self, route: str) -> Response:
+        from tor_log_analyzer.dashboard import dashboard_data, render_dashboard_html
+
+        if route == "/status.json":
+            return _json_response({
+                "version": self._version,
+                "dones": self._dones,
+                "transcriptions": len(self._store),
+            }, self._etag())
+
+        if route in ["/", "/stats.json"]:
+            data = dashboard_data(self._config, self._aggregates, self._store, self._rollups)
+            if route == "/stats.json":
+                return _json_response(data, self._etag())
+            return Response(200, "text/html; charset=utf-8",
+                            render_dashboard_html(data).encode("utf8"), self._etag())
+
+        if route.startswith("/charts/"):
+            name, _, image_format = route[len("/charts/"):].rpartition(".")
+            stages = self._chart_stages()
+            if name in stages and image_format in CHART_TYPES:
+                import matplotlib
+                from tor_log_analyzer.main import plot_style
+                from tor_log_analyzer.stat_generators import figure_bytes
+
+                stage = stages[name]
+                with matplotlib.rc_context(plot_style(self._config)):
+                    fig = stage.figure(*stage.arguments(self._config, {
+                        "fetch": self._store,
+                        "aggregate": self._aggregates,
+                        "rollup": self._rollups,
+                    }))
+                    body = figure_bytes(self._config, fig, image_format)
+                return Response(200, CHART_TYPES[image_format], body, self._etag())
+
+        return _json_response({"error": f"Unknown path {route}."}, status=404)
+
+    def response(self, route: str) -> Response:
+        """
+        The response for the path, rendered once per data version.
+        """
+        cached = self._responses.get(route)
+        if cached is not None and cached[0] == self._version:
+            return cached[1]
+
+        with self._lock:
+            version = self._version
+            response = self._render(route)
+        if response.status == 200:
+            self._responses[route] = (version, response)
+        return response
+
+
+def create_handler(service: StatsService) -> type:
+    class StatsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            route = self.path.split("?", 1)[0]
+            response = service.response(route)
+
+            if response.etag is not None and self.headers.get("If-None-Match") == response.etag:
+                self.send_response(304)
+                self.send_header("ETag", response.etag)
+                self.end_headers()
+                return
+
+            self.send_response(response.status)
+            self.send_header("Content-Type", response.content_type)
+            self.send_header("Content-Length", str(len(response.body)))
+            if response.etag is not None:
+                self.send_header("ETag", response.etag)
+                self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(response.body)
+
+        def log_message(self, format: str, *args):
+            # The service runs for a long time, don't log every request
+            pass
+
+    return StatsHandler
+
+
+def follow_log(service: StatsService, stop: threading.Event, interval: float = POLL_INTERVAL):
+    """
+    Adds new lines of the log to the service until stopped.
+    """
+    while not stop.wait(interval):
+        try:
+            if service.update():
+                click.echo(f"Updated to version {service.version} with "
+                           f"{len(service.transcriptions)} transcriptions.")
+        except Exception as error:
+            # Keep serving the last data, e.g. while Reddit is unreachable
+            click.echo(f"Failed to update: {error}", err=True)
+
+
+def serve(config: Config):
+    """
+    Loads the log and serves the stats until interrupted.
+    """
+    if len(config.batch) > 0:
+        raise RuntimeError("Batches can't be served, serve a single event instead.")
+
+    click.echo("Loading the log.")
+    service = StatsService(config)
+    service.update()
+
+    server = ThreadingHTTPServer((HOST, config.port), create_handler(service))
+    stop = threading.Event()
+    follower = threading.Thread(target=follow_log, args=(service, stop), daemon=True)
+    follower.start()
+
+    click.echo(f"Serving {len(service.transcriptions)} transcriptions on http://{HOST}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
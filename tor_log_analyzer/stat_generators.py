@@ -1,6 +1,10 @@
-from typing import List, Tuple
-import json
-import matplotlib.pyplot as plt
+from typing import Dict, List, Tuple
+from datetime import datetime
+import io
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import numpy as np
 
 from tor_log_analyzer.transcription import Transcription
 from tor_log_analyzer.config import Config
@@ -8,32 +12,82 @@ from tor_log_analyzer.data.user_gamma_data import UserGammaData
 from tor_log_analyzer.data.user_char_data import UserCharData
 from tor_log_analyzer.data.sub_gamma_data import SubGammaData
 from tor_log_analyzer.data.post_type_data import PostTypeData
+from tor_log_analyzer.data.post_format_data import PostFormatData
+from tor_log_analyzer.data.rollup_data import RollupData
+from tor_log_analyzer.aggregation import Aggregates
+from tor_log_analyzer.ranking import Ranking, top_k
+from tor_log_analyzer.downsampling import lttb, point_budget
+from tor_log_analyzer.chart_data import compress_ranking, general_stats, history_series
 
 HBAR_HMARGIN = 0.1
 HBAR_VMARGIN = 0.02
 
+# The formats figures can be rendered to in memory
+IMAGE_FORMATS = ["png", "svg"]
 
-def add_watermark(config):
-    fig: plt.Figure = plt.gcf()
+# The measured watermark positions, by text and figure style
+_watermark_layouts: Dict[Tuple, Tuple[float, float]] = {}
+
+
+def create_figure() -> Figure:
+    """
+    Creates a new figure with its own Agg canvas, independent of pyplot.
+    """
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def save_figure(config: Config, fig: Figure, filename: str):
+    fig.savefig(f"{config.image_dir}/{filename}", **config.render_profile.savefig_kwargs())
+
+
+def figure_bytes(config: Config, fig: Figure, image_format: str = "png") -> bytes:
+    """
+    Renders the figure in memory as a PNG or SVG image.
+    """
+    if image_format not in IMAGE_FORMATS:
+        raise RuntimeError(
+            f"Unknown image format '{image_format}', use one of: {', '.join(IMAGE_FORMATS)}.")
+
+    buffer = io.BytesIO()
+    # The compression options only apply to PNGs
+    kwargs = config.render_profile.savefig_kwargs() if image_format == "png" else {}
+    fig.savefig(buffer, format=image_format, **kwargs)
+    return buffer.getvalue()
+
+
+def add_watermark(config: Config, fig: Figure):
     _, _, fw, fh = fig.bbox.bounds
+    layout_key = (config.event.organization, config.event.abrv, fw, fh, fig.dpi,
+                  tuple(matplotlib.rcParams["font.family"]))
+    # The positions only need to be measured once per text and style
+    layout = _watermark_layouts.get(layout_key)
+    renderer = fig.canvas.get_renderer() if layout is None else None
 
     posx, posy = 0.02, 0.02
 
     if config.event.organization:
         tor_text = fig.text(posx, posy, config.event.organization,
                             color=config.colors.secondary, fontsize="10", va="bottom")
-        # Calculate offset
-        _, yp, _, hp = tor_text.get_tightbbox(
-            plt.gcf().canvas.get_renderer()).bounds
-        posy = posy + (yp + hp) / fh
+        if layout is None:
+            # Calculate offset
+            _, yp, _, hp = tor_text.get_tightbbox(renderer).bounds
+            posy = posy + (yp + hp) / fh
+        else:
+            posy = layout[1]
 
     if config.event.abrv:
         txt = fig.text(posx, posy, config.event.abrv,
                        color=config.colors.primary, fontsize="17", va="bottom")
-        # Calculate offset
-        xp, _, wp, _ = txt.get_tightbbox(
-            plt.gcf().canvas.get_renderer()).bounds
-        posx = posx + (xp + wp) / fw
+        if layout is None:
+            # Calculate offset
+            xp, _, wp, _ = txt.get_tightbbox(renderer).bounds
+            posx = posx + (xp + wp) / fw
+        else:
+            posx = layout[0]
+
+    _watermark_layouts[layout_key] = (posx, posy)
 
     if config.event.start:
         date_str = config.event.start.strftime("%b %d, %Y")
@@ -41,215 +95,194 @@ def add_watermark(config):
                  color=config.colors.text, fontsize="10", va="bottom")
 
 
-def generate_user_gamma_stats(config: Config, user_gamma_data: UserGammaData):
-    top_count = config.top_count
+def annotate_bars(axes, data: List[int], labels: List[str]):
+    """
+    Writes the value next to every bar of a horizontal bar chart.
+    """
+    for x, y in zip(data, labels):
+        axes.annotate(x,  # label with value
+                      (x, y),
+                      textcoords="offset points",
+                      xytext=(3, 0),
+                      ha="left",
+                      va="center")
 
-    # Sort by user gamma
-    sorted_data: List[Tuple[str, int]] = [
-        (f"u/{username}", user_gamma_data[username]) for username in user_gamma_data]
-    sorted_data.sort(key=lambda e: e[1], reverse=True)
-    # Extract the top users
-    top_list = sorted_data[:top_count]
-    top_list.reverse()
 
-    compressed_data: List[Tuple[str, int]] = top_list
+def ranking_colors(config: Config, ranking: Ranking) -> List[str]:
+    """
+    The bar colors for a compressed ranking with the aggregated rest.
+    """
+    colors = [config.colors.primary for _ in range(len(ranking.top))]
 
-    if len(sorted_data) > top_count:
-        # Aggregate the rest of the users that didn't make it in the top to a single entry
-        rest: List[Tuple[str, int]] = [
-            ("Other Volunteers", sum([entry[1] for entry in sorted_data[top_count:]]))]
-        compressed_data = rest + top_list
+    if ranking.has_rest:
+        colors = [config.colors.secondary] + colors
 
-    labels = [entry[0] for entry in compressed_data]
-    data = [entry[1] for entry in compressed_data]
+    return colors
 
-    colors = [config.colors.primary for _ in range(len(top_list))]
 
-    if len(sorted_data) > top_count:
-        colors = [config.colors.secondary] + colors
+def create_user_gamma_stats_figure(config: Config, user_gamma_data: UserGammaData) -> Figure:
+    top_count = config.top_count
 
-    plt.barh(labels, data, color=colors)
-    plt.ylabel("User")
-    plt.xlabel("Transcriptions")
-    plt.title(f"Top {top_count} Contributors with the Most Transcriptions")
+    # Rank by user gamma
+    ranking = top_k(
+        ((f"u/{username}", user_gamma_data[username]) for username in user_gamma_data), top_count)
+    compressed_data = compress_ranking(ranking, "Other Volunteers")
 
-    add_watermark(config)
+    labels = [entry[0] for entry in compressed_data]
+    data = [entry[1] for entry in compressed_data]
 
-    plt.gca().margins(HBAR_HMARGIN, HBAR_VMARGIN)
+    colors = ranking_colors(config, ranking)
 
-    # Annotate data
-    for x, y in zip(data, labels):
-        plt.annotate(x,  # label with gamma
-                     (x, y),
-                     textcoords="offset points",
-                     xytext=(3, 0),
-                     ha="left",
-                     va="center")
+    fig = create_figure()
+    axes = fig.add_subplot()
+    axes.barh(labels, data, color=colors)
+    axes.set_ylabel("User")
+    axes.set_xlabel("Transcriptions")
+    axes.set_title(f"Top {top_count} Contributors with the Most Transcriptions")
 
-    plt.savefig(f"{config.image_dir}/user_gamma.png")
-    plt.close()
+    add_watermark(config, fig)
 
+    axes.margins(HBAR_HMARGIN, HBAR_VMARGIN)
 
-def generate_history(config: Config, transcriptions: List[Transcription]):
-    history_data = []
+    annotate_bars(axes, data, labels)
+
+    return fig
 
-    if config.event.start is not None:
-        history_data.append((config.event.start, 0))
 
-    for i, val in enumerate(transcriptions):
-        # Add a "step" for each transcription
-        history_data.append((val.time, i))
-        history_data.append((val.time, i + 1))
+def generate_user_gamma_stats(config: Config, user_gamma_data: UserGammaData):
+    fig = create_user_gamma_stats_figure(config, user_gamma_data)
+    save_figure(config, fig, "user_gamma.png")
+
 
-    if config.event.end is not None:
-        history_data.append((config.event.end, len(transcriptions)))
+def create_history_figure(config: Config, transcriptions: List[Transcription]) -> Figure:
+    dates, data = history_series(config, transcriptions)
 
-    dates = [entry[0] for entry in history_data]
-    data = [entry[1] for entry in history_data]
+    # Don't draw more points than the plot can show
+    axes_width = 0.83
+    fig = create_figure()
+    budget = point_budget(fig.get_figwidth(), fig.dpi, axes_width)
+    indexes = lttb(dates.astype(np.int64), data, budget)
+    dates = dates[indexes].astype(datetime)
+    data = data[indexes]
 
-    axes = plt.axes((0.12, 0.2, 0.83, 0.72))
+    axes = fig.add_axes((0.12, 0.2, axes_width, 0.72))
     axes.plot(dates, data, color=config.colors.primary)
     axes.grid()
-    plt.xlabel("Time")
-    plt.ylabel("Total Transcriptions")
-    plt.title("History")
+    axes.set_xlabel("Time")
+    axes.set_ylabel("Total Transcriptions")
+    axes.set_title("History")
 
-    add_watermark(config)
+    add_watermark(config, fig)
 
-    plt.savefig(f"{config.image_dir}/history.png")
-    plt.close()
+    return fig
 
 
-def generate_sub_stats(config: Config, sub_gamma_data: SubGammaData):
-    top_count = config.top_count
+def generate_history(config: Config, transcriptions: List[Transcription]):
+    fig = create_history_figure(config, transcriptions)
+    save_figure(config, fig, "history.png")
+
+
+def create_throughput_stats_figure(config: Config, rollup: RollupData) -> Figure:
+    hourly = rollup.dense()
+    dates = hourly.starts.astype("datetime64[us]").astype(datetime)
+    # The width of a bar is one bucket, in days
+    width = np.timedelta64(1, hourly.unit) / np.timedelta64(1, "D")
+
+    fig = create_figure()
+    axes = fig.add_axes((0.12, 0.2, 0.83, 0.72))
+    axes.bar(dates, hourly.counts, width=width, align="edge",
+             color=config.colors.primary)
+    axes.set_axisbelow(True)
+    axes.grid(axis="y")
+    axes.set_xlabel("Time")
+    axes.set_ylabel("Transcriptions")
+    axes.set_title(f"Transcriptions per {hourly.resolution.capitalize()}")
+
+    add_watermark(config, fig)
+
+    return fig
+
 
-    # Sort by sub gamma
-    sorted_data: List[Tuple[str, int]] = [
-        (f"r/{sub}", sub_gamma_data[sub]) for sub in sub_gamma_data]
-    sorted_data.sort(key=lambda e: e[1], reverse=True)
-    # Extract the top subs
-    top_list = sorted_data[:top_count]
-    top_list.reverse()
+def generate_throughput_stats(config: Config, rollup: RollupData):
+    fig = create_throughput_stats_figure(config, rollup)
+    save_figure(config, fig, "throughput.png")
 
-    compressed_data: List[Tuple[str, int]] = top_list
 
-    if len(sorted_data) > top_count:
-        # Aggregate the rest of the subs that didn't make it in the top to a single entry
-        rest: List[Tuple[str, int]] = [
-            ("Other Subreddits", sum([entry[1] for entry in sorted_data[top_count:]]))]
-        compressed_data = rest + top_list
+def create_sub_stats_figure(config: Config, sub_gamma_data: SubGammaData) -> Figure:
+    top_count = config.top_count
+
+    # Rank by sub gamma
+    ranking = top_k(
+        ((f"r/{sub}", sub_gamma_data[sub]) for sub in sub_gamma_data), top_count)
+    compressed_data = compress_ranking(ranking, "Other Subreddits")
 
     labels = [entry[0] for entry in compressed_data]
     data = [entry[1] for entry in compressed_data]
 
-    colors = [config.colors.primary for _ in range(len(top_list))]
+    colors = ranking_colors(config, ranking)
 
-    if len(sorted_data) > top_count:
-        colors = [config.colors.secondary] + colors
-
-    plt.barh(labels, data, color=colors)
-    plt.ylabel("Subreddit")
-    plt.xlabel("Transcriptions")
-    plt.title(f"Top {top_count} Subreddits with the Most Transcriptions")
+    fig = create_figure()
+    axes = fig.add_subplot()
+    axes.barh(labels, data, color=colors)
+    axes.set_ylabel("Subreddit")
+    axes.set_xlabel("Transcriptions")
+    axes.set_title(f"Top {top_count} Subreddits with the Most Transcriptions")
 
-    add_watermark(config)
+    add_watermark(config, fig)
 
-    plt.gca().margins(HBAR_HMARGIN, HBAR_VMARGIN)
+    axes.margins(HBAR_HMARGIN, HBAR_VMARGIN)
 
-    # Annotate data
-    for x, y in zip(data, labels):
-        plt.annotate(x,  # label with gamma
-                     (x, y),
-                     textcoords="offset points",
-                     xytext=(3, 0),
-                     ha="left",
-                     va="center")
+    annotate_bars(axes, data, labels)
 
-    plt.savefig(f"{config.image_dir}/sub_gamma.png")
-    plt.close()
+    return fig
 
 
-def generate_type_stats(config: Config, type_data: PostTypeData):
-    top_count = config.top_count
+def generate_sub_stats(config: Config, sub_gamma_data: SubGammaData):
+    fig = create_sub_stats_figure(config, sub_gamma_data)
+    save_figure(config, fig, "sub_gamma.png")
 
-    # Sort by types
-    sorted_data: List[Tuple[str, int]] = [
-        (f"{t_type}", type_data[t_type]) for t_type in type_data]
-    sorted_data.sort(key=lambda e: e[1], reverse=True)
-    # Extract the top subs
-    top_list = sorted_data[:top_count]
-    top_list.reverse()
 
-    compressed_data: List[Tuple[str, int]] = top_list
+def create_type_stats_figure(config: Config, type_data: PostTypeData) -> Figure:
+    top_count = config.top_count
 
-    if len(sorted_data) > top_count:
-        # Aggregate the rest of the subs that didn't make it in the top to a single entry
-        rest: List[Tuple[str, int]] = [
-            ("Other Types", sum([entry[1] for entry in sorted_data[top_count:]]))]
-        compressed_data = rest + top_list
+    # Rank by types
+    ranking = top_k(
+        ((f"{t_type}", type_data[t_type]) for t_type in type_data), top_count)
+    compressed_data = compress_ranking(ranking, "Other Types")
 
     labels = [entry[0] for entry in compressed_data]
     data = [entry[1] for entry in compressed_data]
 
-    colors = [config.colors.primary for _ in range(len(top_list))]
+    colors = ranking_colors(config, ranking)
 
-    if len(sorted_data) > top_count:
-        colors = [config.colors.secondary] + colors
-
-    axes = plt.axes((0.2, 0.2, 0.73, 0.72))
+    fig = create_figure()
+    axes = fig.add_axes((0.2, 0.2, 0.73, 0.72))
     axes.barh(labels, data, color=colors)
-    plt.ylabel("Type")
-    plt.xlabel("Transcriptions")
-    plt.title(f"Top {top_count} Post Types")
+    axes.set_ylabel("Type")
+    axes.set_xlabel("Transcriptions")
+    axes.set_title(f"Top {top_count} Post Types")
 
-    add_watermark(config)
+    add_watermark(config, fig)
 
-    plt.gca().margins(HBAR_HMARGIN, HBAR_VMARGIN)
+    axes.margins(HBAR_HMARGIN, HBAR_VMARGIN)
 
-    # Annotate data
-    for x, y in zip(data, labels):
-        plt.annotate(x,  # label with count
-                     (x, y),
-                     textcoords="offset points",
-                     xytext=(3, 0),
-                     ha="left",
-                     va="center")
+    annotate_bars(axes, data, labels)
 
-    plt.savefig(f"{config.image_dir}/post_types.png")
-    plt.close()
+    return fig
 
 
-def generate_format_stats(config: Config, transcriptions: List[Transcription]):
-    format_data = {}
-
-    for tr in transcriptions:
-        t_format = tr.t_format
-        if t_format in format_data:
-            format_data[t_format] += 1
-        else:
-            format_data[t_format] = 1
+def generate_type_stats(config: Config, type_data: PostTypeData):
+    fig = create_type_stats_figure(config, type_data)
+    save_figure(config, fig, "post_types.png")
 
-    with open(f"{config.cache_dir}/post_formats.json", "w") as f:
-        dumps = json.dumps(format_data, indent=2)
-        f.write(dumps + "\n")
 
+def create_format_stats_figure(config: Config, format_data: PostFormatData) -> Figure:
     top_count = config.top_count
 
-    # Sort by types
-    sorted_data: List[Tuple[str, int]] = [
-        (f"{t_format}", format_data[t_format]) for t_format in format_data]
-    sorted_data.sort(key=lambda e: e[1], reverse=True)
-    # Extract the top subs
-    top_list = sorted_data[:top_count]
-    top_list.reverse()
-
-    compressed_data: List[Tuple[str, int]] = top_list
-
-    if len(sorted_data) > top_count:
-        # Aggregate the rest of the subs that didn't make it in the top to a single entry
-        rest: List[Tuple[str, int]] = [
-            ("Other Formats", sum([entry[1] for entry in sorted_data[top_count:]]))]
-        compressed_data = rest + top_list
+    # Rank by formats
+    ranking = top_k(
+        ((f"{t_format}", format_data[t_format]) for t_format in format_data), top_count)
+    compressed_data = compress_ranking(ranking, "Other Formats")
 
     data = [entry[1] for entry in compressed_data]
     total = sum(data)
@@ -257,23 +290,29 @@ def generate_format_stats(config: Config, transcriptions: List[Transcription]):
         f"{entry[0]}\n{entry[1]} ({round(entry[1] * 100 / total)}%)" for entry in compressed_data]
 
     colors = [config.colors.primary, config.colors.secondary,
-              config.colors.tertiary] * (len(top_list) // 3 + 1)
+              config.colors.tertiary] * (len(ranking.top) // 3 + 1)
     colors.reverse()
 
-    if len(sorted_data) > top_count:
+    if ranking.has_rest:
         colors = [config.colors.secondary] + colors
 
-    plt.pie(data, labels=labels, colors=colors)
-    plt.title("Top Post Formats")
-    plt.gca().axis('equal')
+    fig = create_figure()
+    axes = fig.add_subplot()
+    axes.pie(data, labels=labels, colors=colors)
+    axes.set_title("Top Post Formats")
+    axes.axis('equal')
 
-    add_watermark(config)
+    add_watermark(config, fig)
 
-    plt.savefig(f"{config.image_dir}/post_formats.png")
-    plt.close()
+    return fig
 
 
-def generate_user_count_length_stats(config: Config, user_gamma_data: UserGammaData, user_char_data: UserCharData):
+def generate_format_stats(config: Config, format_data: PostFormatData):
+    fig = create_format_stats_figure(config, format_data)
+    save_figure(config, fig, "post_formats.png")
+
+
+def create_user_count_length_stats_figure(config: Config, user_gamma_data: UserGammaData, user_char_data: UserCharData) -> Figure:
     counts = []
     medians = []
 
@@ -282,81 +321,69 @@ def generate_user_count_length_stats(config: Config, user_gamma_data: UserGammaD
             counts.append(user_gamma_data[username])
             medians.append(user_char_data[username].median)
 
-    axes = plt.axes((0.12, 0.2, 0.83, 0.72))
+    fig = create_figure()
+    axes = fig.add_axes((0.12, 0.2, 0.83, 0.72))
     axes.scatter(medians, counts, c=[config.colors.primary])
-    plt.ylabel("Transcription Count")
-    plt.xlabel("Transcription Length Median (Characters)")
-    plt.title("Transcription Length vs. Transcription Count")
+    axes.set_ylabel("Transcription Count")
+    axes.set_xlabel("Transcription Length Median (Characters)")
+    axes.set_title("Transcription Length vs. Transcription Count")
 
-    add_watermark(config)
+    add_watermark(config, fig)
 
-    plt.savefig(f"{config.image_dir}/user_count_length.png")
-    plt.close()
+    return fig
 
 
-def generate_user_max_length_stats(config: Config, user_char_data: UserCharData):
-    top_count = config.top_count
+def generate_user_count_length_stats(config: Config, user_gamma_data: UserGammaData, user_char_data: UserCharData):
+    fig = create_user_count_length_stats_figure(config, user_gamma_data, user_char_data)
+    save_figure(config, fig, "user_count_length.png")
 
-    # Sort by user gamma
-    sorted_data: List[Tuple[str, int]] = [
-        (f"u/{username}", user_char_data[username].maximum) for username in user_char_data]
-    sorted_data.sort(key=lambda e: e[1], reverse=True)
-    # Extract the top users
-    top_list = sorted_data[:top_count]
-    top_list.reverse()
 
-    compressed_data: List[Tuple[str, int]] = top_list[:top_count]
+def create_user_max_length_stats_figure(config: Config, user_char_data: UserCharData) -> Figure:
+    top_count = config.top_count
+
+    # Rank by longest transcription
+    ranking = top_k(
+        ((f"u/{username}", user_char_data[username].maximum) for username in user_char_data), top_count)
+    # Only show the top users, without the rest
+    compressed_data = compress_ranking(ranking)
 
     labels = [entry[0] for entry in compressed_data]
     data = [entry[1] for entry in compressed_data]
 
-    colors = [config.colors.primary for _ in range(len(top_list))]
+    colors = [config.colors.primary for _ in range(len(compressed_data))]
 
-    plt.barh(labels, data, color=colors)
-    plt.ylabel("User")
-    plt.xlabel("Longest Transcription (Characters)")
-    plt.title(f"Top {top_count} Contributors with the Longest Transcriptions")
+    fig = create_figure()
+    axes = fig.add_subplot()
+    axes.barh(labels, data, color=colors)
+    axes.set_ylabel("User")
+    axes.set_xlabel("Longest Transcription (Characters)")
+    axes.set_title(f"Top {top_count} Contributors with the Longest Transcriptions")
 
-    add_watermark(config)
+    add_watermark(config, fig)
 
-    plt.gca().margins(HBAR_HMARGIN, HBAR_VMARGIN)
+    axes.margins(HBAR_HMARGIN, HBAR_VMARGIN)
 
-    # Annotate data
-    for x, y in zip(data, labels):
-        plt.annotate(x,  # label with gamma
-                     (x, y),
-                     textcoords="offset points",
-                     xytext=(3, 0),
-                     ha="left",
-                     va="center")
-
-    plt.savefig(f"{config.image_dir}/user_max_length.png")
-    plt.close()
-
-
-def generate_general_stats(config: Config, user_gamma_data: UserGammaData, sub_gamma_data: SubGammaData, transcription_data: List[Transcription], post_types: PostTypeData):
-    stats = {
-        "Participants": len(user_gamma_data),
-        "Subreddits": len(sub_gamma_data),
-        "Post types": len(post_types),
-        "Transcriptions": len(transcription_data),
-        "Words written": sum(tr.words for tr in transcription_data),
-        "Characters typed": sum(tr.characters for tr in transcription_data),
-    }
-
-    if len(transcription_data) >= 2:
-        # Get the total duration transcribed
-        duration = transcription_data[-1].time - transcription_data[0].time
-        # Strip off the seconds
-        duration_str = ':'.join(str(duration).split(':')[:2]) + " h"
-        stats["Duration"] = duration_str
-
-    plt.axis('off')
+    annotate_bars(axes, data, labels)
+
+    return fig
+
+
+def generate_user_max_length_stats(config: Config, user_char_data: UserCharData):
+    fig = create_user_max_length_stats_figure(config, user_char_data)
+    save_figure(config, fig, "user_max_length.png")
+
+
+def create_general_stats_figure(config: Config, aggregates: Aggregates, transcription_data: List[Transcription]) -> Figure:
+    stats = general_stats(aggregates, transcription_data)
+
+    fig = create_figure()
+    axes = fig.add_subplot()
+    axes.axis('off')
 
     title = f"{config.event.name} in Numbers" if config.event.name is not None else "General Stats"
 
-    plt.text(0.5, 0.95, title, horizontalalignment='center',
-             verticalalignment='center', fontsize='25', color=config.colors.text)
+    axes.text(0.5, 0.95, title, horizontalalignment='center',
+              verticalalignment='center', fontsize='25', color=config.colors.text)
 
     for i, key in enumerate(stats):
         height = 0.81 - i * 0.11
@@ -366,12 +393,16 @@ def generate_general_stats(config: Config, user_gamma_data: UserGammaData, sub_g
         if isinstance(stats[key], int):
             formatted_stat = "{:,}".format(stats[key])
 
-        plt.text(0.5, height, f"{formatted_stat} ", horizontalalignment='right',
-                 verticalalignment='center', fontsize='23', color=color)
-        plt.text(0.5, height, key, horizontalalignment='left',
-                 verticalalignment='center', fontsize='12', color=config.colors.text)
+        axes.text(0.5, height, f"{formatted_stat} ", horizontalalignment='right',
+                  verticalalignment='center', fontsize='23', color=color)
+        axes.text(0.5, height, key, horizontalalignment='left',
+                  verticalalignment='center', fontsize='12', color=config.colors.text)
+
+    add_watermark(config, fig)
+
+    return fig
 
-    add_watermark(config)
 
-    plt.savefig(f"{config.image_dir}/general_stats.png")
-    plt.close()
+def generate_general_stats(config: Config, aggregates: Aggregates, transcription_data: List[Transcription]):
+    fig = create_general_stats_figure(config, aggregates, transcription_data)
+    save_figure(config, fig, "general_stats.png")
@@ -1,12 +1,12 @@
-from typing import Dict
+from typing import Dict, TYPE_CHECKING
 from datetime import datetime
-from dateutil import parser
 import re
 
-from praw.models.reddit.comment import Comment
-
 from tor_log_analyzer.util import l_includes
 
+if TYPE_CHECKING:
+    from praw.models.reddit.comment import Comment
+
 
 def extract_components(body: str):
     """
@@ -167,6 +167,8 @@ class Transcription():
 
 
 def transcription_from_dict(transcription: Dict) -> Transcription:
+    from dateutil import parser
+
     return Transcription(
         tid=transcription["id"],
         url=transcription["url"],
@@ -177,7 +179,7 @@ def transcription_from_dict(transcription: Dict) -> Transcription:
     )
 
 
-def transcription_from_comment(comment: Comment) -> Transcription:
+def transcription_from_comment(comment: "Comment") -> Transcription:
     return Transcription(
         tid=comment.id,
         url=f"https://www.reddit.com{comment.permalink}",